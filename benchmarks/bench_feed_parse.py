@@ -0,0 +1,117 @@
+"""
+bench_feed_parse.py
+比較 RSS / Atom 解析：舊版 feedparser.parse 整份解析後再過濾 24 小時與截斷摘要 vs feed_stream.parse_feed
+串流解析（由新到舊的 feed 超過截止時間即停止、略過全文）。fixture 每小時一篇文章，其中約 24 篇在截止時間內，
+另附 HTML 摘要與 content:encoded / Atom content 全文；sorted 為由新到舊，shuffled 為未排序（須讀完整份）。
+
+每組列出解析耗時（取多次最佳）與 tracemalloc 記憶體峰值，並確認兩者取得的文章（標題、連結、
+發布時間、去除 HTML 後的摘要）相同；最後確認 XML 格式錯誤的 feed 會改用 feedparser 解析。
+
+用法：python benchmarks/bench_feed_parse.py [--items 100,500] [--content 5000] [--repeat 1]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import feedparser  # noqa: E402
+
+from fake_servers import make_atom_feed, make_rss_feed  # noqa: E402
+
+import feed_stream  # noqa: E402
+import fetch_news  # noqa: E402
+
+MALFORMED_FEED = (
+    b'<?xml version="1.0"?><rss version="2.0"><channel><title>Broken</title>'
+    b"<item><title>Fed&nbsp;holds rates</title><link>https://example.com/fed</link>"
+    b"<description>Rates unchanged&nbsp;again</description></item></channel></rss>"
+)
+
+
+def legacy_parse(raw: bytes) -> list[dict]:
+    """舊版 fetch_feed 的解析部分。"""
+    feed = feedparser.parse(raw)
+    articles = []
+    for entry in feed.entries:
+        if not fetch_news.is_within_24h(entry):
+            continue
+        summary = getattr(entry, "summary", "") or ""
+        articles.append({
+            "title": entry.get("title", "").strip(),
+            "link": entry.get("link", ""),
+            "published": fetch_news.parse_published(entry),
+            "summary": summary[:500],
+        })
+    return articles
+
+
+def stream_parse(raw: bytes) -> list[dict]:
+    return feed_stream.parse_feed(raw, fetch_news.CUTOFF)
+
+
+def best_ms(func, raw: bytes, repeat: int) -> tuple[float, list[dict]]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(raw)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), result
+
+
+def peak_mb(func, raw: bytes) -> float:
+    tracemalloc.start()
+    func(raw)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return peak
+
+
+def comparable(articles: list[dict]) -> list[tuple]:
+    # 舊版摘要保留 HTML 並先截斷，只比較去除 HTML 後共同的前段
+    return [(a["title"], a["link"], a["published"], feed_stream.strip_html(a["summary"])[:200])
+            for a in articles]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", default="100,500")
+    parser.add_argument("--content", type=int, default=5000, help="每篇全文的約略位元組數")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    # 固定截止時間，讓 fixture 中恰好 24 篇在 24 小時內（每小時一篇，第 24 篇起超過）
+    fetch_news.CUTOFF = datetime.now(timezone.utc) - timedelta(hours=23, minutes=30)
+    print(f"{'format':>6} {'order':>8} {'items':>6} {'MB in':>6} {'parser':>10} {'ms':>9} {'peak MB':>8} "
+          f"{'kept':>5}  check")
+    failed = False
+    for n in (int(x) for x in args.items.split(",")):
+        for fmt, make in (("rss", make_rss_feed), ("atom", make_atom_feed)):
+            for order in ("sorted", "shuffled"):
+                raw = make(fmt, n, content_size=args.content, shuffle=order == "shuffled")
+                results = {}
+                for label, func in (("feedparser", legacy_parse), ("stream", stream_parse)):
+                    ms, results[label] = best_ms(func, raw, args.repeat)
+                    peak = peak_mb(func, raw)
+                    ok = comparable(results[label]) == comparable(results["feedparser"])
+                    failed |= not ok
+                    print(f"{fmt:>6} {order:>8} {n:>6} {len(raw) / 1024 / 1024:>6.1f} {label:>10} {ms:>9.1f} "
+                          f"{peak:>8.2f} {len(results[label]):>5}  " + ("ok" if ok else "FAIL"))
+
+    try:
+        feed_stream.parse_feed(MALFORMED_FEED, fetch_news.CUTOFF)
+        fallback = []
+    except feed_stream.ParseError:
+        fallback = fetch_news.parse_with_feedparser(MALFORMED_FEED)
+    ok = [a["title"] for a in fallback] == ["Fed holds rates"]
+    failed |= not ok
+    print(f"\n格式錯誤的 feed：{'改用 feedparser 解析 ' + str(len(fallback)) + ' 篇' if ok else 'FAIL'}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
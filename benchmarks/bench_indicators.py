@@ -0,0 +1,226 @@
+"""
+bench_indicators.py
+比較逐幣 Python 迴圈版指標與 indicators.compute_matrix 向量化引擎的耗時與輸出：
+
+- core 欄位（原逐幣 calc_rsi / calc_sma / calc_ema / determine_signal）四捨五入後必須完全一致
+- MACD、布林通道、波動率、ATR 與交叉事件以逐日遞推的參考實作作為 golden value，
+  數值欄位比對至四捨五入精度，交叉事件必須完全一致
+
+另列出每個已登記指標在同一批次中的耗時；任何輸出不一致時以非零狀態結束。
+tests/test_indicators.py 以同一組參考實作斷言輸出。
+
+用法：python benchmarks/bench_indicators.py [--coins 500] [--days 31,91,365]
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import indicators  # noqa: E402
+
+
+def legacy_rsi(prices, period=14):
+    if len(prices) < period + 1:
+        return None
+    arr = np.array(prices, dtype=float)
+    deltas = np.diff(arr)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    avg_gain = np.mean(gains[:period])
+    avg_loss = np.mean(losses[:period])
+    for i in range(period, len(deltas)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+    if avg_loss == 0:
+        return 100.0
+    rs = avg_gain / avg_loss
+    return round(100.0 - (100.0 / (1.0 + rs)), 2)
+
+
+def legacy_ema(prices, period):
+    if len(prices) < period:
+        return None
+    arr = np.array(prices, dtype=float)
+    k = 2.0 / (period + 1)
+    ema = arr[0]
+    for price in arr[1:]:
+        ema = price * k + ema * (1 - k)
+    return round(float(ema), 6)
+
+
+def legacy_sma(prices, period):
+    if len(prices) < period:
+        return None
+    return round(float(np.mean(prices[-period:])), 6)
+
+
+def legacy_signal(rsi, sma7, sma20):
+    if rsi is None:
+        return "觀望"
+    signals = []
+    if rsi >= 70:
+        signals.append("RSI超買")
+    elif rsi <= 30:
+        signals.append("RSI超賣")
+    if sma7 is not None and sma20 is not None:
+        if sma7 > sma20:
+            signals.append("均線多頭")
+        elif sma7 < sma20:
+            signals.append("均線空頭")
+    if not signals:
+        return "中性"
+    return " / ".join(signals)
+
+
+def legacy_row(prices):
+    """原 fetch_market 逐幣計算的 core 欄位。"""
+    rsi = legacy_rsi(prices)
+    sma7 = legacy_sma(prices, 7)
+    sma20 = legacy_sma(prices, 20)
+    return {
+        "high_30d": round(float(max(prices)), 6),
+        "low_30d": round(float(min(prices)), 6),
+        "rsi": rsi,
+        "sma7": sma7,
+        "sma20": sma20,
+        "ema12": legacy_ema(prices, 12),
+        "ema26": legacy_ema(prices, 26),
+        "signal": legacy_signal(rsi, sma7, sma20),
+    }
+
+
+def legacy_ema_series(prices, period):
+    k = 2.0 / (period + 1)
+    values = [prices[0]]
+    for price in prices[1:]:
+        values.append(price * k + values[-1] * (1 - k))
+    return values
+
+
+def reference_crosses(fast, slow, up_name, down_name, steps):
+    events = []
+    diff = [f - s for f, s in zip(fast[-steps:], slow[-steps:])]
+    for j in range(1, steps):
+        if diff[j - 1] <= 0 < diff[j]:
+            events.append({"type": up_name, "days_ago": steps - 1 - j})
+        elif diff[j - 1] >= 0 > diff[j]:
+            events.append({"type": down_name, "days_ago": steps - 1 - j})
+    return events
+
+
+def reference_row(prices):
+    """MACD、布林通道、波動率、ATR 與交叉事件的逐日遞推參考實作；資料不足的指標不列出。"""
+    row = {}
+    fast_p, slow_p, signal_p = indicators.MACD_PERIODS
+    fast = legacy_ema_series(prices, fast_p)
+    slow = legacy_ema_series(prices, slow_p)
+    line = [f - s for f, s in zip(fast, slow)][slow_p - 1:]
+    signal = legacy_ema_series(line, signal_p)
+    has_macd = len(prices) >= indicators.REGISTRY["macd"].min_days
+    if has_macd:
+        row.update(macd=line[-1], macd_signal=signal[-1], macd_hist=line[-1] - signal[-1])
+
+    window = prices[-indicators.BOLLINGER_PERIOD:]
+    middle = statistics.fmean(window)
+    band = indicators.BOLLINGER_STDDEV * statistics.pstdev(window)
+
+    log_returns = [math.log(b / a) for a, b in zip(prices[-indicators.VOLATILITY_DAYS - 1:-1],
+                                                   prices[-indicators.VOLATILITY_DAYS:])]
+
+    ranges = [abs(b - a) for a, b in zip(prices, prices[1:])]
+    atr = statistics.fmean(ranges[:indicators.ATR_PERIOD])
+    for r in ranges[indicators.ATR_PERIOD:]:
+        atr = (atr * (indicators.ATR_PERIOD - 1) + r) / indicators.ATR_PERIOD
+
+    steps = indicators.CROSS_DAYS + 1
+    sma_fast = [statistics.fmean(prices[t - 7:t]) for t in range(len(prices) - steps + 1, len(prices) + 1)]
+    sma_slow = [statistics.fmean(prices[t - 20:t]) for t in range(len(prices) - steps + 1, len(prices) + 1)]
+    crosses = reference_crosses(sma_fast, sma_slow, "golden_cross", "death_cross", steps)
+    if has_macd:
+        crosses += reference_crosses(line, signal, "macd_bullish", "macd_bearish", steps)
+    row.update(
+        bb_upper=middle + band,
+        bb_middle=middle,
+        bb_lower=middle - band,
+        bb_width=2 * band / middle * 100,
+        volatility_30d=statistics.stdev(log_returns) * math.sqrt(365) * 100,
+        atr14=atr,
+        atr14_pct=atr / prices[-1] * 100,
+        crossovers=sorted(crosses, key=lambda x: (x["days_ago"], x["type"])),
+    )
+    return row
+
+
+PERCENT_FIELDS = {"bb_width", "volatility_30d", "atr14_pct"}  # 輸出四捨五入至 2 位，其餘為 6 位
+
+
+def golden_mismatch(expected: dict, actual: dict) -> bool:
+    for key, value in expected.items():
+        if key == "crossovers":
+            if actual[key] != value:
+                return True
+            continue
+        tolerance = 0.5 * 10 ** -(2 if key in PERCENT_FIELDS else 6) + 1e-9
+        if actual[key] is None or not math.isclose(actual[key], value, rel_tol=1e-12, abs_tol=tolerance):
+            return True
+    return False
+
+
+def random_walk(n_coins: int, n_days: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.1, 50_000, size=(n_coins, 1))
+    returns = rng.normal(0, 0.03, size=(n_coins, n_days))
+    return start * np.exp(np.cumsum(returns, axis=1))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--coins", type=int, default=500)
+    parser.add_argument("--days", default="31,91,365")
+    parser.add_argument("--core-days", type=int, default=31)
+    args = parser.parse_args()
+
+    print(f"{'coins':>6} {'days':>5} {'legacy (ms)':>12} {'matrix (ms)':>12} {'speedup':>8} "
+          f"{'core diff':>10} {'golden diff':>12}")
+    per_indicator = {}
+    failed = False
+    for n_days in (int(x) for x in args.days.split(",")):
+        matrix = random_walk(args.coins, n_days)
+        series = matrix.tolist()
+
+        start = time.perf_counter()
+        expected = [legacy_row(p[-args.core_days:]) for p in series]
+        golden = [reference_row(p) for p in series]
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        actual = indicators.compute_matrix(matrix, args.core_days)
+        matrix_ms = (time.perf_counter() - start) * 1000
+
+        core_mismatch = sum(1 for e, a in zip(expected, actual) if any(a[k] != v for k, v in e.items()))
+        golden_diff = sum(1 for e, a in zip(golden, actual) if golden_mismatch(e, a))
+        failed |= bool(core_mismatch or golden_diff)
+        print(f"{args.coins:>6} {n_days:>5} {legacy_ms:>12.1f} {matrix_ms:>12.2f} "
+              f"{legacy_ms / matrix_ms:>7.0f}x {core_mismatch:>10} {golden_diff:>12}")
+
+        ctx = indicators.Context(matrix, args.core_days)
+        for name, indicator in indicators.REGISTRY.items():
+            start = time.perf_counter()
+            indicator.func(ctx)
+            per_indicator.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    print("\nper indicator (ms, shared context):")
+    for name, timings in per_indicator.items():
+        print(f"  {name:<12} " + " ".join(f"{t:>8.2f}" for t in timings))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
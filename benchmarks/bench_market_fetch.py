@@ -0,0 +1,68 @@
+"""
+bench_market_fetch.py
+對本機假 CoinGecko 伺服器量測 fetch_market.fetch_coins 在市值前 5 / 100 / 250 / 500 名觀察清單下的耗時。
+
+每個規模執行兩次：
+    cold    價格庫為空，所有幣種以 market_chart 回補歷史（不限 MAX_CHART_BACKFILL）
+    daily   價格庫已有歷史、回應快取已過期，等同隔日的例行執行：只需分頁的 /coins/markets
+
+用法：python benchmarks/bench_market_fetch.py [--rate-per-minute 600] [--sizes 5,100,250,500]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fake_servers import FakeServer, make_coingecko_handler  # noqa: E402
+
+import coingecko  # noqa: E402
+import fetch_market  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+
+LEGACY_INTERVAL = 12  # 舊版每個請求之間固定等待秒數
+
+
+def run(label: str, n: int, handler, tmp: str) -> None:
+    # 每次使用新的回應快取，模擬快取已過期的下一次執行
+    coingecko.CACHE_FILE = os.path.join(tmp, f"coingecko_cache_{label}.sqlite3")
+    coingecko._cache_conn = None
+    before = dict(handler.stats)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = fetch_market.fetch_coins({"top_n": n})
+    elapsed = time.perf_counter() - start
+    requests = handler.stats["requests"] - before["requests"]
+    limited = handler.stats["rate_limited"] - before["rate_limited"]
+    failed = sum(1 for r in results if "error" in r or r["rsi"] is None)
+    print(f"{n:>6} {label:>6} {elapsed:>10.2f} {requests:>9} {limited:>6} {elapsed / n * 1000:>13.1f} "
+          f"{n * LEGACY_INTERVAL:>16}" + (f"  ({failed} incomplete)" if failed else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate-per-minute", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--sizes", default="5,100,250,500")
+    args = parser.parse_args()
+
+    print(f"{'coins':>6} {'run':>6} {'wall (s)':>10} {'requests':>9} {'429s':>6} {'ms per coin':>13} "
+          f"{'legacy est. (s)':>16}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        handler = make_coingecko_handler(args.rate_per_minute, args.latency)
+        with FakeServer(handler) as server:
+            tmp = tempfile.mkdtemp()
+            coingecko.BASE_URL = server.url
+            coingecko.LIMITER = TokenBucket(rate=args.rate_per_minute / 60, capacity=coingecko.RATE_BURST)
+            fetch_market.PRICE_DB = os.path.join(tmp, "prices.sqlite3")
+            fetch_market.MAX_CHART_BACKFILL = n
+            run("cold", n, handler, tmp)
+            run("daily", n, handler, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+bench_output.py
+以合成的大量新聞日（預設 1,000 與 10,000 篇）量測輸出層：
+
+- 中間檔（indent=2）：舊版 json.dump 直接寫最終路徑 vs json_output.write_json（標準 json / orjson）
+- 每日報告（最小化 + .gz / .br）：舊版整份 dumps 後再壓縮 vs report_writer.write_day 串流寫出
+
+每組列出耗時與 tracemalloc 記憶體峰值，並確認輸出可解析且內容相同；
+最後模擬寫到一半發生例外，確認原檔未被截斷、暫存檔已清除。
+
+用法：python benchmarks/bench_output.py [--articles 1000,10000]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import json_output  # noqa: E402
+import report_writer  # noqa: E402
+
+EN_WORDS = ("bitcoin", "ether", "etf", "inflows", "regulators", "exchange", "stablecoin", "rally", "solana", "court")
+ZH_WORDS = ("比特幣", "以太幣", "監管", "交易所", "資金流入", "穩定幣", "反彈", "法院")
+
+
+def synthetic_articles(n: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+
+    def text(words: int, vocab: tuple = EN_WORDS) -> str:
+        return " ".join(rng.choice(vocab) for _ in range(words))
+
+    return [{
+        "source": rng.choice(["CoinDesk", "CoinTelegraph", "TheBlock", "Decrypt", "CryptoPanic"]),
+        "title": text(12),
+        "link": f"https://example.com/news/{i}",
+        "published": f"2026-01-01T{i % 24:02d}:{i % 60:02d}:00+00:00",
+        "summary": text(70)[:500],
+        "title_zh": text(10, ZH_WORDS),
+        "summary_zh": text(20, ZH_WORDS),
+    } for i in range(n)]
+
+
+def measure(func) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def legacy_intermediate(path: str, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def legacy_day(report: dict, data_dir: str) -> None:
+    """舊版 report_writer：整份 dumps 成 bytes 後寫出並壓縮（另計舊格式大小）。"""
+    headline, news = report_writer.split_report(report)
+    len(json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8"))
+    for name, doc in ((f"{report['date']}.json", headline), (headline["news_file"], news)):
+        raw = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        path = os.path.join(data_dir, name)
+        with open(path, "wb") as f:
+            f.write(raw)
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+        if json_output.brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(json_output.brotli.compress(raw, quality=11))
+
+
+def check_same(path: str, expected) -> bool:
+    with open(path, "r", encoding="utf-8") as f:
+        if json.load(f) != expected:
+            return False
+    if os.path.exists(path + ".gz"):
+        with gzip.open(path + ".gz", "rt", encoding="utf-8") as f:
+            return json.load(f) == expected
+    return True
+
+
+def crash_test(tmp: str) -> bool:
+    """寫到一半拋出例外：原檔內容不變，且不留下暫存檔。"""
+    path = os.path.join(tmp, "crash.json")
+    json_output.write_json(path, {"articles": [1, 2, 3]})
+
+    def chunks():
+        yield b'{"articles":['
+        raise RuntimeError("模擬中斷")
+
+    try:
+        json_output.write_chunks(path, chunks(), compress=True)
+    except RuntimeError:
+        pass
+    leftovers = [f for f in os.listdir(tmp) if f.endswith(".tmp")]
+    with open(path, "r", encoding="utf-8") as f:
+        intact = json.load(f) == {"articles": [1, 2, 3]}
+    return intact and not leftovers and not os.path.exists(path + ".gz")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", default="1000,10000")
+    args = parser.parse_args()
+
+    orjson = json_output.orjson
+    print(f"orjson: {'已安裝' if orjson else '未安裝'}，brotli: {'已安裝' if json_output.brotli else '未安裝'}\n")
+    print(f"{'articles':>8} {'output':>14} {'writer':>16} {'ms':>9} {'peak MB':>8} {'MB out':>7}  check")
+    failed = False
+    tmp = tempfile.mkdtemp(prefix="bench_output_")
+    for n in (int(x) for x in args.articles.split(",")):
+        path = os.path.join(tmp, "intermediate.json")
+        day_dir = os.path.join(tmp, "day")
+        news_path = os.path.join(day_dir, "2026-01-01.news.json")
+        os.makedirs(day_dir, exist_ok=True)
+        runs = [
+            ("intermediate", "legacy", lambda d: legacy_intermediate(path, d["data"])),
+            ("intermediate", "stream/json", lambda d: json_output.write_json(path, d["data"], compact=False)),
+            ("intermediate", "stream/orjson", lambda d: json_output.write_json(path, d["data"], compact=False)),
+            ("day+gz", "legacy", lambda d: legacy_day(d["report"], day_dir)),
+            ("day+gz", "stream/json", lambda d: report_writer.write_day(d["report"], day_dir)),
+            ("day+gz", "stream/orjson", lambda d: report_writer.write_day(d["report"], day_dir)),
+        ]
+        reference = None
+        for output, writer, func in runs:
+            if writer.endswith("orjson") and not orjson:
+                continue
+            json_output.orjson = orjson if writer.endswith("orjson") else None
+            # 每次都用新的資料：orjson 會在非 ASCII 字串上快取 UTF-8 表示，共用資料會讓後面的執行少算這部分
+            articles = synthetic_articles(n)
+            inputs = {
+                "data": {"date": "2026-01-01", "count": n, "articles": articles},
+                "report": {"date": "2026-01-01", "generated_at": "2026-01-01T06:00:00+08:00",
+                           "summary": "摘要" * 500, "news": articles, "market": [], "signals": {}},
+            }
+            ms, peak = measure(lambda: func(inputs))
+            if output == "intermediate":
+                with open(path, "rb") as f:
+                    raw = f.read()
+                reference = reference or raw
+                # 串流輸出必須與舊版 json.dump(indent=2) 逐位元組相同
+                ok, size = check_same(path, inputs["data"]) and raw == reference, len(raw)
+            else:
+                ok = check_same(news_path, {"date": "2026-01-01", "news": articles})
+                size = os.path.getsize(news_path)
+            failed |= not ok
+            print(f"{n:>8} {output:>14} {writer:>16} {ms:>9.1f} {peak:>8.2f} {size / 1024 / 1024:>7.2f}  "
+                  + ("ok" if ok else "FAIL"))
+        json_output.orjson = orjson
+
+    ok = crash_test(tmp)
+    failed |= not ok
+    print(f"\n寫入中斷測試：{'原檔完整、無殘留暫存檔' if ok else 'FAIL'}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
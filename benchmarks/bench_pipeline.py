@@ -0,0 +1,200 @@
+"""
+bench_pipeline.py
+離線量測完整每日流程：以本機假伺服器取代所有上游（CoinGecko、Alternative.me、Reddit、
+RSS、CryptoPanic、OpenAI），依序執行各階段並回報牆鐘時間、請求數、傳輸量與記憶體峰值。
+所有狀態檔（快取、價格庫、去重索引、輸出）都寫在暫存目錄，每次執行從冷啟動開始。
+
+假伺服器使用固定埠號，--record 錄製的 cassette 可在之後以 --replay 回放（不啟動任何伺服器）。
+假資料的發布時間以錄製當下為基準，隔太久回放時 24 小時截止附近的文章會改變，cassette 適合當日回放。
+
+用法：
+    python benchmarks/bench_pipeline.py [--runs 2] [--feeds 4] [--items 50] [--record cassette.json]
+    python benchmarks/bench_pipeline.py --replay cassette.json
+"""
+import argparse
+import contextlib
+import functools
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fake_servers import (  # noqa: E402
+    FakeServer,
+    make_coingecko_handler,
+    make_cryptopanic_handler,
+    make_fear_greed_handler,
+    make_openai_handler,
+    make_reddit_handler,
+    make_rss_feed,
+    make_rss_handler,
+)
+
+import build_index  # noqa: E402
+import coingecko  # noqa: E402
+import fetch_market  # noqa: E402
+import fetch_news  # noqa: E402
+import fetch_signals  # noqa: E402
+import generate_summary  # noqa: E402
+import http_cassette  # noqa: E402
+import llm_client  # noqa: E402
+import news_dedup  # noqa: E402
+import reddit  # noqa: E402
+import report_writer  # noqa: E402
+import translate_news  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+from summary_cache import SummaryCache  # noqa: E402
+from translation_cache import TranslationCache  # noqa: E402
+
+UPSTREAMS = ("coingecko", "fear_greed", "reddit", "rss", "cryptopanic", "openai")
+
+
+def upstream_urls(port_base: int) -> dict:
+    return {name: f"http://127.0.0.1:{port_base + i}" for i, name in enumerate(UPSTREAMS)}
+
+
+def make_handlers(args) -> dict:
+    feeds = {f"/feed{i}.xml": make_rss_feed(f"feed{i}", args.items) for i in range(args.feeds)}
+    return {
+        "coingecko": make_coingecko_handler(latency=args.latency),
+        "fear_greed": make_fear_greed_handler(args.latency),
+        "reddit": make_reddit_handler(args.latency, posts_per_sub=args.reddit_posts),
+        "rss": make_rss_handler(feeds, args.latency),
+        "cryptopanic": make_cryptopanic_handler(latency=args.latency),
+        "openai": make_openai_handler(args.llm_latency),
+    }
+
+
+def configure(urls: dict, n_feeds: int, rate_per_minute: float, reddit_rate_per_minute: float) -> str:
+    """將所有模組的上游位址與狀態檔路徑指向假伺服器與新的暫存目錄，回傳暫存目錄。"""
+    tmp = tempfile.mkdtemp(prefix="bench_pipeline_")
+    coingecko.BASE_URL = urls["coingecko"]
+    coingecko.CACHE_FILE = os.path.join(tmp, "coingecko_cache.sqlite3")
+    coingecko._cache_conn = None
+    coingecko.LIMITER = TokenBucket(rate=rate_per_minute / 60, capacity=coingecko.RATE_BURST)
+    fetch_market.PRICE_DB = os.path.join(tmp, "price_history.sqlite3")
+
+    fetch_news.RSS_FEEDS = {f"Feed{i}": f"{urls['rss']}/feed{i}.xml" for i in range(n_feeds)}
+    fetch_news.FEED_CACHE_FILE = os.path.join(tmp, "feed_cache.json")
+    fetch_news.CRYPTOPANIC_URL = f"{urls['cryptopanic']}/api/v1/posts/"
+    fetch_news.CRYPTOPANIC_API_KEY = "bench"
+    fetch_news.dedupe = functools.partial(news_dedup.dedupe, index_path=os.path.join(tmp, "news_index.json"))
+    translate_news.TranslationCache = functools.partial(
+        TranslationCache, os.path.join(tmp, "translation_cache.sqlite3")
+    )
+    generate_summary.SummaryCache = functools.partial(SummaryCache, os.path.join(tmp, "summary_cache.sqlite3"))
+
+    fetch_signals.SIGNAL_DB = os.path.join(tmp, "signal_history.sqlite3")
+    fetch_signals.FEAR_GREED_URL = f"{urls['fear_greed']}/fng/"
+    reddit.BASE_URL = urls["reddit"]
+    reddit.LIMITER = TokenBucket(rate=reddit_rate_per_minute / 60, capacity=reddit.RATE_BURST)
+
+    os.environ["OPENAI_BASE_URL"] = f"{urls['openai']}/v1"
+    os.environ["OPENAI_API_KEY"] = "bench"
+    build_index.DATA_DIR = os.path.join(tmp, "docs")
+    return tmp
+
+
+class StageTimer:
+    """依序執行各階段，記錄牆鐘時間、請求數、傳輸量與 tracemalloc 記憶體峰值。"""
+
+    def __init__(self):
+        self.rows = []
+
+    def run(self, run_label: str, name: str, func):
+        before = http_cassette.totals()
+        llm_before = len(llm_client.CALL_LOG)
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        after = http_cassette.totals()
+        self.rows.append({
+            "run": run_label,
+            "stage": name,
+            "wall": elapsed,
+            "requests": after["requests"] - before["requests"],
+            "llm_calls": len(llm_client.CALL_LOG) - llm_before,
+            "kb_sent": (after["sent"] - before["sent"]) / 1024,
+            "kb_received": (after["received"] - before["received"]) / 1024,
+            "peak_mb": peak / 1024 / 1024,
+        })
+        return result
+
+    def print(self) -> None:
+        print(f"{'run':>5} {'stage':>10} {'wall (s)':>9} {'requests':>9} {'llm':>4} "
+              f"{'KB up':>8} {'KB down':>9} {'peak MB':>8}")
+        for r in self.rows:
+            print(f"{r['run']:>5} {r['stage']:>10} {r['wall']:>9.2f} {r['requests']:>9} {r['llm_calls']:>4} "
+                  f"{r['kb_sent']:>8.1f} {r['kb_received']:>9.1f} {r['peak_mb']:>8.2f}")
+        for label in dict.fromkeys(r["run"] for r in self.rows):
+            rows = [r for r in self.rows if r["run"] == label]
+            print(f"{label:>5} {'total':>10} {sum(r['wall'] for r in rows):>9.2f} "
+                  f"{sum(r['requests'] for r in rows):>9} {sum(r['llm_calls'] for r in rows):>4} "
+                  f"{sum(r['kb_sent'] for r in rows):>8.1f} {sum(r['kb_received'] for r in rows):>9.1f} "
+                  f"{max(r['peak_mb'] for r in rows):>8.2f}")
+
+
+def run_day(timer: StageTimer, run_label: str) -> None:
+    news = timer.run(run_label, "news", fetch_news.collect)
+    translated = timer.run(run_label, "translate", lambda: translate_news.translate_report(news))
+    market = timer.run(run_label, "market", fetch_market.collect)
+    signals = timer.run(run_label, "signals", lambda: fetch_signals.collect(news))
+    report = timer.run(run_label, "summary", lambda: generate_summary.build_report(translated, market, signals))
+    timer.run(run_label, "write", lambda: report_writer.write_day(report, build_index.DATA_DIR))
+    timer.run(run_label, "index", lambda: build_index.update(report))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2, help="同一組狀態檔連續執行次數（第 2 次起為熱快取）")
+    parser.add_argument("--feeds", type=int, default=4)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--reddit-posts", type=int, default=250, help="每個 subreddit 的假貼文數")
+    parser.add_argument("--latency", type=float, default=0.1, help="假上游 HTTP 延遲秒數")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="假 OpenAI 回覆延遲秒數")
+    parser.add_argument("--rate-per-minute", type=float, default=coingecko.RATE_PER_MINUTE)
+    parser.add_argument("--reddit-rate-per-minute", type=float, default=reddit.RATE_PER_MINUTE)
+    parser.add_argument("--port-base", type=int, default=18700)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="CASSETTE", help="錄製本次所有上游流量")
+    group.add_argument("--replay", metavar="CASSETTE", help="不啟動假伺服器，以 cassette 回放")
+    args = parser.parse_args()
+
+    if args.record or args.replay:
+        http_cassette.MODE = "record" if args.record else "replay"
+        http_cassette.CASSETTE_FILE = args.record or args.replay
+        http_cassette._cassette = None
+
+    urls = upstream_urls(args.port_base)
+    tmp = configure(urls, args.feeds, args.rate_per_minute, args.reddit_rate_per_minute)
+    timer = StageTimer()
+    tracemalloc.start()
+    with contextlib.ExitStack() as stack:
+        if not args.replay:
+            for i, handler in enumerate(make_handlers(args).values()):
+                stack.enter_context(FakeServer(handler, args.port_base + i))
+        for run in range(args.runs):
+            run_day(timer, "cold" if run == 0 else f"warm{run}")
+    tracemalloc.stop()
+    if args.record:
+        http_cassette.cassette().save()
+
+    print(f"mode: {http_cassette.MODE}，state: {tmp}")
+    timer.print()
+    print("\nper upstream:")
+    for host, t in sorted(http_cassette.TRAFFIC.items()):
+        print(f"  {host:<22} {t['requests']:>5} requests  {t['sent'] / 1024:>8.1f} KB up  "
+              f"{t['received'] / 1024:>9.1f} KB down")
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
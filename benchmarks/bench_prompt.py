@@ -0,0 +1,160 @@
+"""
+bench_prompt.py
+比較舊版 build_prompt（前 20 篇標題 + 全部幣種）與分群排序後依 token 預算組裝的 prompt：
+
+- 合成的一日新聞：每則事件由 1-5 家來源以不同措辭報導，發布時間隨機分散在 24 小時內，
+  另有重點事件（多家報導、提及主流幣）；觀察清單分別為 5 與 250 個幣種
+- docs/data 中最近幾份真實報告
+
+列出 prompt token 數、涵蓋的事件數（含多來源事件）與組裝耗時。token 數以 prompt_packer.count_tokens
+計算（有 tiktoken 編碼時為實際值）。
+
+用法：python benchmarks/bench_prompt.py [--events 120] [--coins 5,250] [--budget 1000] [--real 3]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import generate_summary  # noqa: E402
+import prompt_packer  # noqa: E402
+import report_writer  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
+SOURCES = ["CoinDesk", "CoinTelegraph", "TheBlock", "Decrypt", "CryptoPanic"]
+COINS = [("BTC", "Bitcoin", "比特幣"), ("ETH", "Ether", "以太幣"), ("SOL", "Solana", "Solana"),
+         ("XRP", "XRP", "XRP"), ("DOGE", "Dogecoin", "狗狗幣")]
+VERBS = [("launches", "推出"), ("acquires", "收購"), ("halts", "暫停"), ("expands", "擴大"), ("files", "申請"),
+         ("settles", "和解"), ("backs", "支持"), ("drops", "下跌")]
+OBJECTS = [("custody service", "託管服務"), ("lending desk", "借貸平台"), ("ETF", "ETF"), ("stablecoin", "穩定幣"),
+           ("treasury", "財庫"), ("mining pool", "礦池"), ("payments app", "支付應用")]
+TITLE_TEMPLATES = [
+    "{ent} {verb} {num} {obj} for {coin}",
+    "{coin} {obj}: {ent} {verb} ${num} plan",
+    "{ent} reportedly {verb} {obj} worth {num}, {coin} traders react",
+    "Why {ent} {verb} a {num} {coin} {obj}",
+    "{ent} {verb} {coin} {obj} as {num} deal nears",
+]
+ZH_TEMPLATES = [
+    "{ent}{verb}{coin}{obj}，規模 {num}",
+    "{ent} 傳出{verb}{num}{obj}，{coin}交易者關注",
+    "{coin}{obj}：{ent}{verb} {num} 計畫",
+    "為什麼 {ent} 要{verb}{coin}{obj}（{num}）",
+    "{ent}{verb}{obj}，{coin} 相關交易 {num} 即將完成",
+]
+
+
+def synthetic_day(n_events: int, seed: int) -> tuple[list[dict], list[int]]:
+    """回傳依發布時間排序（最新優先）的文章與每篇所屬的事件編號。"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for event in range(n_events):
+        ent = "".join(rng.choice("bcdfgklmnprstvz") + rng.choice("aeiou") for _ in range(3)).title()
+        symbol, coin, coin_zh = rng.choice(COINS) if rng.random() < 0.6 else ("", "token", "代幣")
+        verb, verb_zh = rng.choice(VERBS)
+        obj, obj_zh = rng.choice(OBJECTS)
+        num = f"{rng.randint(2, 900)}M"
+        n_sources = min(len(SOURCES), 1 + int(rng.expovariate(0.7)))
+        for source in rng.sample(SOURCES, n_sources):
+            k = rng.randrange(len(TITLE_TEMPLATES))
+            fields = dict(ent=ent, verb=verb, obj=obj, coin=coin, num=num)
+            fields_zh = dict(ent=ent, verb=verb_zh, obj=obj_zh, coin=coin_zh, num=num)
+            rows.append(({
+                "source": source,
+                "title": TITLE_TEMPLATES[k].format(**fields),
+                "title_zh": ZH_TEMPLATES[k].format(**fields_zh) + f"〔{source}〕",
+                "published": (now - timedelta(minutes=rng.randint(0, 24 * 60))).isoformat(),
+            }, event))
+    rows.sort(key=lambda r: r[0]["published"], reverse=True)
+    return [r[0] for r in rows], [r[1] for r in rows]
+
+
+def synthetic_market(n: int) -> dict:
+    coins = [{"symbol": symbol} for symbol, _, _ in COINS] + [{"symbol": f"C{i:03d}"} for i in range(n - len(COINS))]
+    for c in coins[:n]:
+        c.update(current_price=123.45, price_change_24h=-1.23, rsi=55.5, signal="中性")
+    return {"coins": coins[:n]}
+
+
+def legacy_prompt(news_data: dict, market_data: dict, signals_data: dict | None) -> str:
+    """舊版：前 20 篇標題照原樣貼上，加上全部幣種。"""
+    articles = news_data.get("articles", [])[:20]
+    news_text = "\n".join(f"- [{a['source']}] {a.get('title_zh', a['title'])}" for a in articles)
+    market_text = "\n".join(generate_summary.format_coin(c) for c in market_data.get("coins", []) if "error" not in c)
+    return generate_summary.PROMPT_TEMPLATE.format(
+        story_count=len(articles), article_count=len(articles), news_text=news_text, market_text=market_text,
+        signals_block=generate_summary.build_signals_block(signals_data),
+    )
+
+
+def covered_events(prompt: str, articles: list[dict], events: list[int]) -> set[int]:
+    return {e for a, e in zip(articles, events) if a["title_zh"] in prompt}
+
+
+def timed(func) -> tuple:
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=120)
+    parser.add_argument("--coins", default="5,250")
+    parser.add_argument("--budget", type=int, default=generate_summary.PROMPT_TOKEN_BUDGET)
+    parser.add_argument("--real", type=int, default=3, help="另外量測 docs/data 中最近幾份報告")
+    args = parser.parse_args()
+
+    encoding = prompt_packer._encoding(generate_summary.MODEL)
+    print(f"token 計算：{'tiktoken ' + encoding.name if encoding else '字元數估計（無 tiktoken 編碼）'}\n")
+
+    articles, events = synthetic_day(args.events, seed=1)
+    n_sources = {}
+    for a, e in zip(articles, events):
+        n_sources.setdefault(e, set()).add(a["source"])
+    multi = {e for e, s in n_sources.items() if len(s) > 1}
+    print(f"合成新聞 {len(articles)} 篇、{len(n_sources)} 則事件（{len(multi)} 則多來源）")
+    print(f"{'run':>14} {'coins':>6} {'tokens':>7} {'events':>7} {'multi-src':>10} {'ms':>7}")
+    news = {"articles": articles}
+    for n_coins in (int(x) for x in args.coins.split(",")):
+        market = synthetic_market(n_coins)
+        for label, build in (
+            ("legacy", lambda: legacy_prompt(news, market, None)),
+            (f"packed/{args.budget}", lambda: generate_summary.build_prompt(news, market, None, args.budget)),
+        ):
+            prompt, ms = timed(build)
+            covered = covered_events(prompt, articles, events)
+            print(f"{label:>14} {n_coins:>6} {prompt_packer.count_tokens(prompt):>7} {len(covered):>7} "
+                  f"{len(covered & multi):>4}/{len(multi):<5} {ms:>7.1f}")
+
+    days = sorted(p for p in glob.glob(os.path.join(DATA_DIR, "*.json"))
+                  if report_writer.REPORT_RE.match(os.path.basename(p)))
+    if not args.real or not days:
+        return
+    print(f"\n{'day':>10} {'articles':>9} {'legacy tok':>11} {'packed tok':>11} {'stories':>8} {'covered':>8}")
+    for path in days[-args.real:]:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        news = {"articles": report.get("news") or []}
+        market = {"coins": report.get("market") or []}
+        legacy = legacy_prompt(news, market, report.get("signals"))
+        packed, _ = timed(lambda: generate_summary.build_prompt(news, market, report.get("signals"), args.budget))
+        stories = prompt_packer.rank_stories(news["articles"], [c["symbol"] for c in market["coins"]])
+        included = [s for s in stories if s.line() in packed]
+        print(f"{os.path.basename(path)[:10]:>10} {len(news['articles']):>9} "
+              f"{prompt_packer.count_tokens(legacy):>11} {prompt_packer.count_tokens(packed):>11} "
+              f"{len(included):>8} {sum(len(s.articles) for s in included):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+bench_reddit.py
+對本機假 Reddit listing 伺服器量測 fetch_signals.fetch_reddit_sentiment 的分頁抓取：
+
+- 舊版：單一 subreddit、一頁 25 篇
+- 新版：多個 subreddit 依 after 游標分頁、共用限速器同時抓取，貼文逐篇串流評分
+
+每個規模檢查分析篇數等於 subreddit 數 × min(每版貼文數, 頁數 × 100)、各 subreddit 無錯誤，
+並列出請求數、429 次數、牆鐘時間與 tracemalloc 記憶體峰值（串流處理時峰值不隨頁數成長），
+檢查失敗時以非零狀態結束。分頁、請求上限與限速行為的斷言見 tests/test_reddit.py。
+
+用法：python benchmarks/bench_reddit.py [--subreddits 5] [--posts 250,1000] [--rate-per-minute 120]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fake_servers import FakeServer, make_reddit_handler  # noqa: E402
+
+import fetch_signals  # noqa: E402
+import reddit  # noqa: E402
+from rate_limiter import TokenBucket  # noqa: E402
+
+SUBREDDITS = ["CryptoCurrency", "Bitcoin", "ethereum", "solana", "CryptoMarkets", "ethtrader", "dogecoin",
+              "cardano"]
+
+
+def run(label: str, subreddits: list[str], max_pages: int, handler, expected: int) -> tuple[dict, bool]:
+    before = dict(handler.stats)
+    reddit.MAX_PAGES = max_pages
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fetch_signals.fetch_reddit_sentiment(subreddits=subreddits)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    requests = handler.stats["requests"] - before["requests"]
+    limited = handler.stats["rate_limited"] - before["rate_limited"]
+    errors = [s for s, info in result.get("subreddits", {}).items() if "error" in info]
+    ok = result.get("posts") == expected and not errors
+    print(f"{label:>10} {len(subreddits):>5} {result.get('posts', 0):>7} {requests:>9} {limited:>6} "
+          f"{elapsed:>9.2f} {peak / 1024 / 1024:>8.2f} {len(result.get('coins', {})):>6}  "
+          + ("ok" if ok else f"FAIL expected {expected} posts, errors {errors}"))
+    return result, ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subreddits", type=int, default=5)
+    parser.add_argument("--posts", default="250,1000", help="每個 subreddit 的貼文數")
+    parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--rate-per-minute", type=float, default=120, help="假伺服器限速")
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    subreddits = SUBREDDITS[:args.subreddits]
+    print(f"{'run':>10} {'subs':>5} {'posts':>7} {'requests':>9} {'429s':>6} {'wall (s)':>9} "
+          f"{'peak MB':>8} {'coins':>6}")
+    failed = False
+    for n in (int(x) for x in args.posts.split(",")):
+        handler = make_reddit_handler(args.latency, posts_per_sub=n, rate_per_minute=int(args.rate_per_minute))
+        with FakeServer(handler) as server:
+            reddit.BASE_URL = server.url
+            reddit.LIMITER = TokenBucket(rate=args.rate_per_minute / 60, capacity=reddit.RATE_BURST)
+            # 舊版等同單一 subreddit 的第一頁 25 篇
+            reddit.PAGE_SIZE = 25
+            _, ok = run("legacy", subreddits[:1], 1, handler, min(n, 25))
+            failed |= not ok
+            reddit.PAGE_SIZE = 100
+            result, ok = run(f"paged/{n}", subreddits, args.max_pages, handler,
+                             len(subreddits) * min(n, args.max_pages * reddit.PAGE_SIZE))
+            failed |= not ok
+    print("\n最後一次的各幣種情緒：")
+    for symbol, c in result["coins"].items():
+        print(f"  {symbol:<6} {c['sentiment_score']:>8.4f} {c['label']:<4} mentions={c['mentions']}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
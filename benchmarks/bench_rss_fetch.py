@@ -0,0 +1,55 @@
+"""
+bench_rss_fetch.py
+對本機假 RSS 伺服器量測 fetch_news.fetch_rss：第一次（完整下載與解析）與
+第二次（ETag / Last-Modified 命中，304 不解析）的耗時、請求數與傳輸量。
+
+用法：python benchmarks/bench_rss_fetch.py [--feeds 4,40] [--latency 0.3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fake_servers import FakeServer, make_rss_feed, make_rss_handler  # noqa: E402
+
+import fetch_news  # noqa: E402
+
+
+def run(label: str, n_feeds: int, handler) -> None:
+    before = dict(handler.stats)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        articles = fetch_news.fetch_rss()
+    elapsed = time.perf_counter() - start
+    requests = handler.stats["requests"] - before["requests"]
+    not_modified = handler.stats["not_modified"] - before["not_modified"]
+    kb = (handler.stats["bytes"] - before["bytes"]) / 1024
+    print(f"{n_feeds:>6} {label:>6} {elapsed:>10.2f} {requests:>9} {not_modified:>5} {kb:>10.1f} {len(articles):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--feeds", default="4,40")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{'feeds':>6} {'run':>6} {'wall (s)':>10} {'requests':>9} {'304s':>5} {'KB down':>10} {'articles':>9}")
+    for n in (int(x) for x in args.feeds.split(",")):
+        feeds = {f"/feed{i}.xml": make_rss_feed(f"feed{i}", args.items) for i in range(n)}
+        handler = make_rss_handler(feeds, args.latency)
+        with FakeServer(handler) as server:
+            fetch_news.RSS_FEEDS = {f"Feed{i}": f"{server.url}/feed{i}.xml" for i in range(n)}
+            fetch_news.FEED_CACHE_FILE = os.path.join(tempfile.mkdtemp(), "feed_cache.json")
+            run("cold", n, handler)
+            run("warm", n, handler)
+        print(f"{'':>6} {'legacy':>6} {n * args.latency:>10.2f}  (sequential latency floor)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+bench_sentiment.py
+檢查 sentiment 詞庫引擎在固定語料上的判斷，並比較舊版 split() + 10 字集合與新引擎的吞吐量。
+
+FIXTURES 每筆為 (文字, 預期極性 +1 / 0 / -1, 預期提及幣種)；全部通過才會列出耗時。
+吞吐量以合成的 Reddit 標題 + 內文與新聞標題 + 摘要量測。
+
+用法：python benchmarks/bench_sentiment.py [--posts 5000] [--articles 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import sentiment  # noqa: E402
+
+FIXTURES = [
+    ("BTC pumps!", 1, ("BTC",)),
+    ("bullish, very bullish on $ETH", 1, ("ETH",)),
+    ("Bitcoin is not bullish anymore", -1, ("BTC",)),
+    ("Honestly not bad at all for SOL holders", 1, ("SOL",)),
+    ("ETH crashed hard but the recovery looks strong", 1, ("ETH",)),
+    ("Exchange hacked, $40M drained from hot wallets 💀", -1, ()),
+    ("XRP to the moon 🚀🚀", 1, ("XRP",)),
+    ("Solana network outage halts block production", -1, ("SOL",)),
+    ("Ethereum ETF inflows hit a record high", 1, ("ETH",)),
+    ("Bitcoin and Ether slide as liquidations mount", -1, ("BTC", "ETH")),
+    ("Don't panic sell your DOGE", 1, ("DOGE",)),
+    ("link in bio, near the top of the page", 0, ()),
+    ("Weekly discussion thread: ask anything about LINK and DOT", 0, ("LINK", "DOT")),
+    ("SEC approves spot ether ETFs", 1, ("ETH",)),
+    ("Crypto lender files for bankruptcy after bank run", -1, ()),
+    ("$ada slightly up today", 1, ("ADA",)),
+    ("Massive sell-off wipes out leveraged longs", -1, ()),
+    ("This is a rug pull, stay away", -1, ()),
+    ("Price update for BNB", 0, ("BNB",)),
+    ("Never seen such a brutal bloodbath in alts", -1, ()),
+]
+
+POSITIVE_WORDS = {"bullish", "moon", "pump", "surge", "rally", "gain", "high", "ath", "up", "buy"}
+NEGATIVE_WORDS = {"bearish", "crash", "dump", "drop", "fall", "low", "fud", "down", "sell", "fear"}
+
+LEXICON_VOCAB = ("BTC", "ETH", "Solana", "$XRP", "bullish", "bearish", "pumps", "crashed", "not", "very",
+                 "rally", "liquidations", "to the moon", "hack", "but", "recovery", "strong", "weak", "🚀", "!",
+                 ",", "inflows", "outflows")
+FILLER_VOCAB = ("the", "a", "of", "to", "and", "in", "on", "for", "is", "this", "with", "from", "that", "at",
+                "market", "price", "today", "week", "new", "crypto", "exchange", "users", "network", "token",
+                "project", "team", "says", "report", "after", "over", "more", "first", "year", "data", "fund",
+                "trading", "analysts", "could", "would", "just", "update", "why", "holders", "ETF")
+LEXICON_SHARE = 0.15   # 合成文字中詞庫詞的比例，其餘為一般單字
+
+
+def legacy_polarity(text: str) -> int:
+    words = set(text.lower().split())
+    pos, neg = words & POSITIVE_WORDS, words & NEGATIVE_WORDS
+    return 1 if pos and not neg else -1 if neg and not pos else 0
+
+
+def polarity(compound: float) -> int:
+    return 1 if compound >= sentiment.NEUTRAL_BAND else -1 if compound <= -sentiment.NEUTRAL_BAND else 0
+
+
+def synthetic_texts(n: int, words: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(LEXICON_VOCAB if rng.random() < LEXICON_SHARE else FILLER_VOCAB)
+                 for _ in range(rng.randint(words // 2, words)))
+        for _ in range(n)
+    ]
+
+
+def check_fixtures(lexicon: sentiment.Lexicon) -> int:
+    failed = 0
+    print(f"{'expected':>8} {'legacy':>6} {'engine':>7} {'compound':>9}  text")
+    for text, expected, coins in FIXTURES:
+        result = lexicon.score(text)
+        ok = polarity(result.compound) == expected and set(result.coins) == set(coins)
+        failed += not ok
+        print(f"{expected:>8} {legacy_polarity(text):>6} {polarity(result.compound):>7} {result.compound:>9.4f}  "
+              f"{text}" + ("" if ok else f"   <-- FAIL coins={result.coins}"))
+    legacy_ok = sum(legacy_polarity(t) == e for t, e, _ in FIXTURES)
+    print(f"\nengine {len(FIXTURES) - failed}/{len(FIXTURES)} 通過，舊版極性 {legacy_ok}/{len(FIXTURES)} 正確\n")
+    return failed
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--articles", type=int, default=2000)
+    args = parser.parse_args()
+
+    load_ms = timed(sentiment.default_lexicon)
+    lexicon = sentiment.default_lexicon()
+    print(f"詞庫編譯 {load_ms:.1f} ms（{len(lexicon.words)} 個單字形式，{len(lexicon.phrases)} 個片語）\n")
+    if check_fixtures(lexicon):
+        raise SystemExit(1)
+
+    posts = synthetic_texts(args.posts, 40, seed=1)
+    upvotes = [random.Random(i).randint(0, 5000) for i in range(args.posts)]
+    articles = [{"title": t, "summary": s} for t, s in zip(synthetic_texts(args.articles, 14, seed=2),
+                                                           synthetic_texts(args.articles, 60, seed=3))]
+
+    def engine_posts():
+        aggregate = sentiment.Aggregate(lexicon)
+        for text, score in zip(posts, upvotes):
+            aggregate.add(text, sentiment.upvote_weight(score))
+        return aggregate.summary()
+
+    legacy_ms = timed(lambda: [legacy_polarity(t) for t in posts])
+    posts_ms = timed(engine_posts)
+    news_ms = timed(lambda: sentiment.score_articles(articles, lexicon))
+    print(f"{'workload':>22} {'items':>7} {'ms':>9} {'µs / item':>10}")
+    print(f"{'legacy posts':>22} {args.posts:>7} {legacy_ms:>9.1f} {legacy_ms / args.posts * 1000:>10.1f}")
+    print(f"{'engine posts':>22} {args.posts:>7} {posts_ms:>9.1f} {posts_ms / args.posts * 1000:>10.1f}")
+    print(f"{'engine news':>22} {args.articles:>7} {news_ms:>9.1f} {news_ms / args.articles * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+bench_signal_store.py
+量測 signal_store 的訊號歷史：
+
+- 每日一次開啟儲存、追加一點、讀取滾動統計並關閉，依歷史長度分段列出每點平均耗時
+  （滾動統計為 O(1) 更新，耗時不應隨歷史變長而增加）
+- 舊做法：讀取最近 180 份每日報告計算 30 / 90 日統計 vs stats() 與 window_stats() 查詢
+- 每隔一段以點資料暴力重算各視窗的均值、標準差、z 分數與百分位，確認與增量狀態一致
+
+合成序列為恐懼貪婪指數（0-100 整數）與情緒分數（-1..1）的隨機漫步，約每 20 天缺一天。
+
+用法：python benchmarks/bench_signal_store.py [--days 1095] [--reports 180]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import build_index  # noqa: E402
+import json_output  # noqa: E402
+import signal_store  # noqa: E402
+
+
+def synthetic_days(n: int, seed: int = 1) -> list[tuple[str, int, float]]:
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    fear_greed, score = 50, 0.0
+    days = []
+    for i in range(n):
+        fear_greed = min(100, max(0, fear_greed + rng.randint(-6, 6)))
+        score = min(1.0, max(-1.0, score + rng.gauss(0, 0.08)))
+        if rng.random() < 0.05:
+            continue
+        days.append(((start + timedelta(days=i)).isoformat(), fear_greed, round(score, 4)))
+    return days
+
+
+def brute_force(store: signal_store.SignalStore, series: str, end: str) -> dict:
+    spec = signal_store.SERIES[series]
+    value = dict(store.query(series, end, end))[end]
+    result = {}
+    for w in signal_store.WINDOWS:
+        start = (date.fromisoformat(end) - timedelta(days=w - 1)).isoformat()
+        values = [v for _, v in store.query(series, start, end)]
+        mean = sum(values) / len(values)
+        std = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+        b = spec.bucket(value)
+        below = sum(spec.bucket(v) < b for v in values) + sum(spec.bucket(v) == b for v in values) / 2
+        result[str(w)] = (mean, std, (value - mean) / std if std > 1e-9 else 0.0, below / len(values) * 100)
+    return result
+
+
+def matches(stats: dict, expected: dict) -> bool:
+    for w, (mean, std, z, pct) in expected.items():
+        s = stats["windows"][w]
+        if abs(s["mean"] - mean) > 1e-3 or abs(s["std"] - std) > 1e-3 or abs(s["z"] - z) > 0.01 \
+                or abs(s["percentile"] - pct) > 0.1:
+            return False
+    return True
+
+
+def write_reports(data_dir: str, days: list) -> None:
+    """舊做法需要讀取的每日報告（headline 檔：市場 20 幣 + 訊號）。"""
+    os.makedirs(data_dir, exist_ok=True)
+    market = [{"symbol": f"C{i:02d}", "current_price": 123.45, "price_change_24h": -1.2, "rsi": 55.0,
+               "signal": "中性", "sma_7": 120.0, "sma_25": 118.0} for i in range(20)]
+    for day, fear_greed, score in days:
+        json_output.write_json(os.path.join(data_dir, f"{day}.json"), {
+            "date": day, "summary": "摘要" * 400, "market": market, "news_count": 80,
+            "signals": {
+                "fear_greed": {"value": fear_greed, "classification": "Neutral",
+                               "history": [{"date": day, "value": fear_greed, "classification": "Neutral"}] * 7},
+                "reddit_sentiment": {"sentiment_score": score, "posts": 500},
+                "news_sentiment": {"sentiment_score": score},
+            },
+        })
+
+
+def legacy_trends(data_dir: str, n: int) -> dict:
+    """舊做法：掃描並讀取最近 n 份每日報告，計算恐懼貪婪指數的 30 / 90 日均值。"""
+    dates = sorted(m.group(1) for m in map(build_index.REPORT_RE.match, os.listdir(data_dir)) if m)[-n:]
+    values = [build_index.load_report(data_dir, d)["signals"]["fear_greed"]["value"] for d in dates]
+    return {w: sum(values[-w:]) / len(values[-w:]) for w in (30, 90)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--reports", type=int, default=180)
+    parser.add_argument("--check-every", type=int, default=25)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_signal_store_")
+    path = os.path.join(tmp, "signal_history.sqlite3")
+    days = synthetic_days(args.days)
+    failed = False
+    print(f"{'history':>12} {'points':>7} {'ms/day':>8}  check")
+    segment, segment_start, checked = [], 0, 0
+    for i, (day, fear_greed, score) in enumerate(days):
+        start = time.perf_counter()
+        with signal_store.SignalStore(path) as store:
+            store.append("fear_greed", [(day, fear_greed)])
+            store.append("reddit_sentiment", [(day, score)])
+            stats = store.stats("fear_greed")
+        segment.append((time.perf_counter() - start) * 1000)
+        if i % args.check_every == 0 or i == len(days) - 1:
+            with signal_store.SignalStore(path) as store:
+                ok = all(matches(store.stats(s), brute_force(store, s, day))
+                         for s in ("fear_greed", "reddit_sentiment"))
+            checked += 1
+            failed |= not ok
+        if len(segment) == 250 or i == len(days) - 1:
+            print(f"{segment_start:>5}-{i:<6} {len(segment):>7} {sum(segment) / len(segment):>8.2f}  "
+                  + ("ok" if not failed else "FAIL"))
+            segment, segment_start = [], i + 1
+    print(f"暴力重算比對 {checked} 次：{'一致' if not failed else '不一致'}")
+    print(f"最新：{stats['date']} 恐懼貪婪 {stats['value']}，狀態 {stats['regime']}（自 {stats['regime_since']}）")
+
+    data_dir = os.path.join(tmp, "docs")
+    write_reports(data_dir, days[-args.reports:])
+    print(f"\n{'query':>28} {'ms':>8}")
+    start = time.perf_counter()
+    legacy = legacy_trends(data_dir, args.reports)
+    print(f"{'legacy: read ' + str(args.reports) + ' reports':>28} {(time.perf_counter() - start) * 1000:>8.2f}")
+    with signal_store.SignalStore(path) as store:
+        start = time.perf_counter()
+        stats = store.stats("fear_greed")
+        print(f"{'stats() rolling':>28} {(time.perf_counter() - start) * 1000:>8.2f}")
+        start = time.perf_counter()
+        window = store.window_stats("fear_greed", 90)
+        print(f"{'window_stats(90)':>28} {(time.perf_counter() - start) * 1000:>8.2f}")
+        start = time.perf_counter()
+        changes = store.regime_changes("fear_greed")
+        print(f"{'regime_changes()':>28} {(time.perf_counter() - start) * 1000:>8.2f}  ({len(changes)} 次切換)")
+    # 報告只涵蓋有資料的日期，日曆天視窗內的點數相同
+    ok = abs(window["mean"] - stats["windows"]["90"]["mean"]) < 1e-3
+    failed |= not ok
+    print(f"90 日均值：rolling {stats['windows']['90']['mean']}，window_stats {window['mean']}，"
+          f"legacy（最近 90 份報告）{legacy[90]:.4f}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+bench_summary_cache.py
+對本機假 OpenAI 伺服器量測 generate_summary 的摘要快取：
+
+- 第一次（未命中）：呼叫 OpenAI，寫入快取
+- 重跑（相同輸入）：直接沿用快取，不發出請求
+- --force：略過快取重新呼叫
+- 輸入改變（多一則新聞）：雜湊不同，重新呼叫
+
+並檢查快取超過 MAX_ENTRIES 時會淘汰最久未使用的項目。
+
+用法：python benchmarks/bench_summary_cache.py [--llm-latency 0.5]
+"""
+import argparse
+import contextlib
+import functools
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fake_servers import FakeServer, make_openai_handler  # noqa: E402
+
+import generate_summary  # noqa: E402
+from summary_cache import SummaryCache  # noqa: E402
+
+
+def sample_inputs(n_articles: int) -> tuple[dict, dict, dict]:
+    news = {"articles": [
+        {"source": "CoinDesk", "title": f"Headline {i} about bitcoin", "title_zh": f"關於比特幣的新聞 {i}",
+         "published": "2026-01-01T00:00:00+00:00"}
+        for i in range(n_articles)
+    ]}
+    market = {"coins": [{"symbol": "BTC", "current_price": 100000, "price_change_24h": 1.5, "rsi": 55,
+                         "signal": "中性"}]}
+    signals = {"fear_greed": {"value": 60, "classification": "Greed"}}
+    return news, market, signals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_summary_cache_")
+    cache_file = os.path.join(tmp, "summary_cache.sqlite3")
+    generate_summary.SummaryCache = functools.partial(SummaryCache, cache_file)
+    handler = make_openai_handler(args.llm_latency)
+    failed = False
+    with FakeServer(handler) as server:
+        os.environ["OPENAI_BASE_URL"] = f"{server.url}/v1"
+        os.environ["OPENAI_API_KEY"] = "bench"
+        print(f"{'run':>14} {'ms':>9} {'requests':>9} {'summary_hash':>14}")
+        hashes = {}
+        for label, n_articles, force, expected_requests in (
+            ("miss", 30, False, 1),
+            ("rerun (hit)", 30, False, 0),
+            ("--force", 30, True, 1),
+            ("changed input", 31, False, 1),
+        ):
+            before = handler.stats["requests"]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                report = generate_summary.build_report(*sample_inputs(n_articles), force=force)
+            elapsed = (time.perf_counter() - start) * 1000
+            requests = handler.stats["requests"] - before
+            hashes[label] = report["summary_hash"]
+            ok = requests == expected_requests
+            failed |= not ok
+            print(f"{label:>14} {elapsed:>9.1f} {requests:>9} {report['summary_hash'][:12]:>14}"
+                  + ("" if ok else f"   <-- FAIL expected {expected_requests} requests"))
+    if len({hashes["miss"], hashes["rerun (hit)"], hashes["--force"]}) != 1 or hashes["changed input"] == hashes["miss"]:
+        print("FAIL: summary_hash 與輸入不一致")
+        failed = True
+
+    with SummaryCache(cache_file, max_entries=3) as cache:
+        for i in range(5):
+            cache.put(f"key{i}", generate_summary.MODEL, f"summary {i}")
+            time.sleep(0.01)
+        cache.get("key0")
+    with SummaryCache(cache_file, max_entries=3) as cache:
+        kept = [f"key{i}" for i in range(5) if cache.get(f"key{i}") is not None]
+    ok = kept == ["key0", "key3", "key4"]
+    failed |= not ok
+    print(f"\n淘汰後保留：{kept}" + ("" if ok else "   <-- FAIL expected ['key0', 'key3', 'key4']"))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+bench_translate.py
+對本機假 OpenAI chat-completions 伺服器量測 translate_news.translate_all：
+比較逐批序列執行（MAX_IN_FLIGHT=1，等同舊版）與並行執行的耗時，並注入無法解析的回覆
+確認切批重試只補翻失敗的項目。
+
+用法：python benchmarks/bench_translate.py [--titles 100,300] [--malformed-every 7]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fake_servers import FakeServer, make_openai_handler  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+
+import translate_news  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", default="100,300")
+    parser.add_argument("--in-flight", default="1,4,8")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--malformed-every", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'titles':>6} {'in-flight':>9} {'wall (s)':>10} {'requests':>9} {'malformed':>10} {'translated':>11}")
+    for n in (int(x) for x in args.titles.split(",")):
+        titles = [f"Headline number {i} about bitcoin, ether and regulators" for i in range(n)]
+        for in_flight in (int(x) for x in args.in_flight.split(",")):
+            handler = make_openai_handler(args.latency, malformed_every=args.malformed_every)
+            with FakeServer(handler) as server:
+                translate_news.MAX_IN_FLIGHT = in_flight
+                client = AsyncOpenAI(api_key="bench", base_url=f"{server.url}/v1", max_retries=0)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = asyncio.run(translate_news.translate_all(client, titles))
+                elapsed = time.perf_counter() - start
+            ok = sum(1 for r in results if r)
+            print(f"{n:>6} {in_flight:>9} {elapsed:>10.2f} {handler.stats['requests']:>9} "
+                  f"{handler.stats['malformed']:>10} {ok:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+fake_servers.py
+本機假 API 伺服器，供 benchmark 在無網路環境下模擬上游服務。
+"""
+import hashlib
+import html
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeServer:
+    """在背景執行緒啟動 ThreadingHTTPServer，可作為 context manager 使用；port=0 時由系統指定。"""
+
+    def __init__(self, handler_cls, port: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler_cls)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status: int = 200, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+
+# 假市值排名：前五名為預設觀察清單，其後以 fake-coin-N 補足
+FAKE_TOP = ["bitcoin", "ethereum", "solana", "binancecoin", "ripple"] + [f"fake-coin-{i}" for i in range(5, 1000)]
+FAKE_SYMBOLS = {"bitcoin": "btc", "ethereum": "eth", "solana": "sol", "binancecoin": "bnb", "ripple": "xrp"}
+
+
+def fake_price(coin_id: str, day: float) -> float:
+    """以幣種 id 與 epoch 日數（可含小數）產生可重現的價格，同一時間點重複查詢結果一致。"""
+    seed = sum(ord(c) for c in coin_id)
+    base = 10 + seed % 1000
+    return base * (1 + 0.05 * math.sin(seed + day / 3))
+
+
+def fake_market_item(coin_id: str, now_ms: int) -> dict:
+    """/coins/markets?sparkline=true 的單一幣種資料，sparkline 為 168 個每小時價格。"""
+    return {
+        "id": coin_id,
+        "symbol": FAKE_SYMBOLS.get(coin_id, coin_id.replace("fake-coin-", "fc")),
+        "current_price": fake_price(coin_id, now_ms / DAY_MS),
+        "market_cap": 1e12 / (FAKE_TOP.index(coin_id) + 1) if coin_id in FAKE_TOP else 1e6,
+        "price_change_percentage_24h": 1.23,
+        "total_volume": 1e9,
+        "circulating_supply": 19_800_000,
+        "max_supply": 21_000_000,
+        "last_updated": datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+        "sparkline_in_7d": {"price": [
+            fake_price(coin_id, (now_ms - (167 - i) * HOUR_MS) / DAY_MS) for i in range(168)
+        ]},
+    }
+
+
+def make_coingecko_handler(rate_per_minute: int = 600, latency: float = 0.05):
+    """建立假 CoinGecko handler：滑動視窗限速，超過時回 429 + Retry-After。"""
+    window = deque()
+    lock = threading.Lock()
+    stats = {"requests": 0, "rate_limited": 0}
+
+    class CoinGeckoHandler(JSONHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            now = time.monotonic()
+            with lock:
+                stats["requests"] += 1
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= rate_per_minute:
+                    stats["rate_limited"] += 1
+                    retry_after = max(1, math.ceil(60 - (now - window[0])))
+                    self.send_json({"status": {"error_code": 429}}, 429, {"Retry-After": str(retry_after)})
+                    return
+                window.append(now)
+
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.rstrip("/").split("/")
+            if url.path.endswith("/coins/markets"):
+                if "ids" in query:
+                    ids = [c for c in query["ids"][0].split(",") if c]
+                else:
+                    per_page = int(query.get("per_page", ["100"])[0])
+                    page = int(query.get("page", ["1"])[0])
+                    ids = FAKE_TOP[(page - 1) * per_page:page * per_page]
+                now_ms = int(time.time() * 1000)
+                self.send_json([fake_market_item(coin_id, now_ms) for coin_id in ids])
+            elif len(parts) >= 2 and parts[-1] == "market_chart":
+                days = int(query.get("days", ["30"])[0])
+                today = int(time.time() * 1000) // DAY_MS
+                self.send_json({"prices": [
+                    [day * DAY_MS, fake_price(parts[-2], day)] for day in range(today - days, today + 1)
+                ]})
+            elif url.path.endswith("/global"):
+                self.send_json({"data": {
+                    "active_cryptocurrencies": 17000,
+                    "market_cap_percentage": {"btc": 57.1234, "eth": 11.5},
+                    "total_market_cap": {"usd": 3.2e12},
+                }})
+            else:
+                self.send_json({"error": "not found"}, 404)
+
+    CoinGeckoHandler.stats = stats
+    return CoinGeckoHandler
+
+
+def feed_order(n_items: int, shuffle: bool) -> list[int]:
+    """文章順序（第 i 篇發布於 i 小時前）：預設由新到舊，shuffle 時為固定種子的隨機順序。"""
+    order = list(range(n_items))
+    if shuffle:
+        random.Random(n_items).shuffle(order)
+    return order
+
+
+def make_rss_feed(name: str, n_items: int, body_size: int = 2000, content_size: int = 0,
+                  shuffle: bool = False) -> bytes:
+    """產生含 n_items 篇文章、每小時一篇的 RSS 2.0 fixture；content_size > 0 時另附 content:encoded 全文，
+    shuffle 時文章不依時間排序。"""
+    now = datetime.now(timezone.utc)
+    body = "<p>" + "lorem ipsum " * (body_size // 12) + "</p>"
+    content = "".join(
+        f"<p>Paragraph {k}: <a href='https://example.com/{k}'>dolor</a> sit amet &amp; consectetur.</p>"
+        for k in range(content_size // 90)
+    )
+    items = "".join(
+        f"<item><title>{name} headline {i}</title>"
+        f"<link>https://example.com/{name}/{i}</link>"
+        f"<pubDate>{format_datetime(now - timedelta(hours=i))}</pubDate>"
+        f"<description><![CDATA[{body}]]></description>"
+        + (f"<content:encoded><![CDATA[{content}]]></content:encoded>" if content else "")
+        + "</item>"
+        for i in feed_order(n_items, shuffle)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel>'
+        f"<title>{name}</title>{items}</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_atom_feed(name: str, n_items: int, body_size: int = 2000, content_size: int = 0,
+                   shuffle: bool = False) -> bytes:
+    """make_rss_feed 的 Atom 版本（summary 為 type="html"，全文放在 content）。"""
+    now = datetime.now(timezone.utc)
+    body = html.escape("<p>" + "lorem ipsum " * (body_size // 12) + "</p>")
+    content = html.escape("".join(
+        f"<p>Paragraph {k}: <a href='https://example.com/{k}'>dolor</a> sit amet.</p>"
+        for k in range(content_size // 80)
+    ))
+    entries = "".join(
+        f"<entry><title>{name} headline {i}</title>"
+        f'<link rel="alternate" href="https://example.com/{name}/{i}"/>'
+        f"<id>urn:{name}:{i}</id>"
+        f"<published>{(now - timedelta(hours=i)).replace(microsecond=0).isoformat()}</published>"
+        f'<summary type="html">{body}</summary>'
+        + (f'<content type="html">{content}</content>' if content else "")
+        + "</entry>"
+        for i in feed_order(n_items, shuffle)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{name}</title>{entries}</feed>"
+    ).encode("utf-8")
+
+
+def make_rss_handler(feeds: dict, latency: float = 0.2):
+    """建立假 RSS handler：依路徑回傳 fixture，支援 ETag / Last-Modified 條件式 GET。
+
+    stats["log"] 依序記錄每個請求的 (路徑, If-None-Match, If-Modified-Since, 狀態碼)。
+    """
+    stats = {"requests": 0, "not_modified": 0, "bytes": 0, "log": []}
+    lock = threading.Lock()
+    last_modified = format_datetime(datetime.now(timezone.utc), usegmt=True)
+
+    class RSSHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = feeds.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            not_modified = (
+                self.headers.get("If-None-Match") == etag
+                or self.headers.get("If-Modified-Since") == last_modified
+            )
+            with lock:
+                stats["requests"] += 1
+                stats["not_modified"] += int(not_modified)
+                stats["bytes"] += 0 if not_modified else len(body)
+                stats["log"].append((self.path, self.headers.get("If-None-Match"),
+                                     self.headers.get("If-Modified-Since"), 304 if not_modified else 200))
+            if not_modified:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+    RSSHandler.stats = stats
+    return RSSHandler
+
+
+def make_openai_handler(latency: float = 0.5, per_item: float = 0.02, malformed_every: int = 0,
+                        skip_every: int = 0, cut_every: int = 0):
+    """建立假 OpenAI chat-completions handler。
+
+    翻譯 prompt 依其中「N. 標題」行數回傳翻譯 JSON 陣列（元素附上編號 index）；以下參數 > 0 時，每 N 個請求：
+    - malformed_every：回覆一次無法解析的內容，用於測試切批重試
+    - skip_every：漏掉中間一條翻譯，用於確認後面的翻譯不會錯位
+    - cut_every：串流送出一半後中斷連線，用於確認已完成的部分保留、其餘重試
+    """
+    stats = {"requests": 0, "malformed": 0, "skipped": 0, "cut": 0, "items": 0}
+    lock = threading.Lock()
+
+    class OpenAIHandler(JSONHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", "0"))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            prompt = body.get("messages", [{}])[-1].get("content", "")
+            # 只有翻譯 prompt 要求 title_zh；摘要 prompt 的編號段落不當成標題
+            titles = [
+                line.split(". ", 1)[1] for line in prompt.splitlines()
+                if ". " in line and line.split(". ", 1)[0].isdigit()
+            ] if "title_zh" in prompt else []
+            with lock:
+                stats["requests"] += 1
+                stats["items"] += len(titles)
+                malformed = malformed_every > 0 and stats["requests"] % malformed_every == 0
+                skip = skip_every > 0 and stats["requests"] % skip_every == 0 and len(titles) > 1
+                cut = cut_every > 0 and stats["requests"] % cut_every == 0 and bool(body.get("stream"))
+                stats["malformed"] += int(malformed)
+                stats["skipped"] += int(skip)
+                stats["cut"] += int(cut)
+            time.sleep(latency + per_item * len(titles))
+            if titles:
+                items = [{"index": i + 1, "title_zh": f"譯：{t}", "summary_zh": f"摘要：{t}"}
+                         for i, t in enumerate(titles)]
+                if skip:
+                    del items[len(items) // 2]
+                content = "```json\n" + json.dumps(items, ensure_ascii=False) + "\n```"
+            else:
+                content = "今日摘要（假資料）"
+            if malformed:
+                content = content[: len(content) // 2]
+            usage = {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 2,
+                "total_tokens": len(prompt) // 4 + len(content) // 2,
+            }
+            if body.get("stream"):
+                self.send_stream(body, content, usage, cut)
+                return
+            self.send_json({
+                "id": f"chatcmpl-{stats['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", ""),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        def send_stream(self, body: dict, content: str, usage: dict, cut: bool = False) -> None:
+            """以 SSE 格式每 16 字元送出一個 chunk，最後附上 usage 與 [DONE]。
+
+            cut 時宣告完整長度但只送出前一半即關閉連線，client 端會收到連線中斷的錯誤。
+            """
+            base = {"id": "chatcmpl-stream", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": body.get("model", "")}
+            events = []
+            for i in range(0, len(content), 16):
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": content[i:i + 16]},
+                                              "finish_reason": None}]}
+                events.append(f"data: {json.dumps(chunk)}\n\n")
+            if body.get("stream_options", {}).get("include_usage"):
+                events.append(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n")
+            events.append("data: [DONE]\n\n")
+            payload = "".join(events).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if cut:
+                sent = "".join(events[:len(events) // 2]).encode("utf-8")
+                self.wfile.write(sent)
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(payload)
+
+    OpenAIHandler.stats = stats
+    return OpenAIHandler
+
+
+def make_fear_greed_handler(latency: float = 0.1):
+    """建立假 Alternative.me 恐懼貪婪指數 handler（/fng/?limit=N）。"""
+    stats = {"requests": 0}
+    labels = ["Extreme Fear", "Fear", "Neutral", "Greed", "Extreme Greed"]
+
+    class FearGreedHandler(JSONHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            stats["requests"] += 1
+            limit = int(parse_qs(urlparse(self.path).query).get("limit", ["1"])[0])
+            today = int(time.time()) // 86400 * 86400
+            data = []
+            for i in range(limit):
+                value = 50 + int(40 * math.sin((today // 86400 - i) / 5))
+                data.append({
+                    "value": str(value),
+                    "value_classification": labels[min(value // 20, 4)],
+                    "timestamp": str(today - i * 86400),
+                })
+            self.send_json({"name": "Fear and Greed Index", "data": data})
+
+    FearGreedHandler.stats = stats
+    return FearGreedHandler
+
+
+REDDIT_WORDS = ["bullish", "moon", "crash", "dump", "rally", "fud", "update", "question"]
+REDDIT_COINS = ["BTC", "ETH", "SOL", "$XRP", "Bitcoin", "the market"]
+
+
+def make_reddit_handler(latency: float = 0.2, posts_per_sub: int = 250, rate_per_minute: int | None = None,
+                        reject: tuple = (), retry_after: str | None = "3"):
+    """建立假 Reddit listing handler（/r/{sub}/hot.json?limit=N&after=t3_...）。
+
+    每個 subreddit 有 posts_per_sub 篇貼文，依 after 游標分頁，最後一頁 after 為 null；
+    設定 rate_per_minute 時以滑動視窗限速，回應附上 X-Ratelimit-Remaining / Reset，超過時回 429。
+    reject 為固定回 429 的請求序號（1 起算），附上 Retry-After: retry_after（None 時不附）。
+    stats["log"] 依序記錄每個請求的 (subreddit, after, 狀態碼)。
+    """
+    window = deque()
+    lock = threading.Lock()
+    stats = {"requests": 0, "rate_limited": 0, "log": []}
+
+    class RedditHandler(JSONHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            now = time.monotonic()
+            headers = {}
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            sub = url.path.split("/")[2] if url.path.startswith("/r/") else "all"
+            after = query.get("after", [""])[0]
+            with lock:
+                stats["requests"] += 1
+                if stats["requests"] in reject:
+                    stats["rate_limited"] += 1
+                    stats["log"].append((sub, after or None, 429))
+                    self.send_json({"message": "Too Many Requests", "error": 429}, 429,
+                                   {"Retry-After": retry_after} if retry_after else {})
+                    return
+                if rate_per_minute:
+                    while window and now - window[0] > 60:
+                        window.popleft()
+                    reset = max(1, math.ceil(60 - (now - window[0]))) if window else 60
+                    if len(window) >= rate_per_minute:
+                        stats["rate_limited"] += 1
+                        stats["log"].append((sub, after or None, 429))
+                        self.send_json({"message": "Too Many Requests", "error": 429}, 429,
+                                       {"Retry-After": str(reset)})
+                        return
+                    window.append(now)
+                    headers = {"X-Ratelimit-Remaining": str(rate_per_minute - len(window)),
+                               "X-Ratelimit-Reset": str(reset)}
+                stats["log"].append((sub, after or None, 200))
+            limit = min(100, int(query.get("limit", ["25"])[0]))
+            start = int(after.rsplit("_", 1)[1]) + 1 if after else 0
+            end = min(posts_per_sub, start + limit)
+            children = [
+                {"kind": "t3", "data": {
+                    "id": f"{sub}_{i}",
+                    "name": f"t3_{sub}_{i}",
+                    "title": f"{REDDIT_COINS[i % len(REDDIT_COINS)]} {REDDIT_WORDS[i % len(REDDIT_WORDS)]} "
+                             f"post {i} in r/{sub}",
+                    "selftext": "Long discussion body. " * (i % 5),
+                    "score": (i * 37) % 500,
+                }}
+                for i in range(start, end)
+            ]
+            next_after = f"t3_{sub}_{end - 1}" if end < posts_per_sub else None
+            self.send_json({"kind": "Listing", "data": {"children": children, "after": next_after}}, 200, headers)
+
+    RedditHandler.stats = stats
+    return RedditHandler
+
+
+def make_cryptopanic_handler(n_posts: int = 40, latency: float = 0.2):
+    """建立假 CryptoPanic posts handler，每半小時一篇新聞。"""
+    stats = {"requests": 0}
+
+    class CryptoPanicHandler(JSONHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            stats["requests"] += 1
+            now = datetime.now(timezone.utc)
+            self.send_json({"results": [
+                {
+                    "title": f"CryptoPanic story {i} on ether staking flows",
+                    "url": f"https://example.com/cryptopanic/{i}",
+                    "published_at": (now - timedelta(minutes=30 * i)).isoformat().replace("+00:00", "Z"),
+                }
+                for i in range(n_posts)
+            ]})
+
+    CryptoPanicHandler.stats = stats
+    return CryptoPanicHandler
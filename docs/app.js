@@ -20,6 +20,19 @@
     return toDateStr(d);
   }
 
+  // index.json 中可用的日期（新到舊）；載入前或載入失敗時為 null，改用逐日切換
+  let availableDates = null;
+
+  function adjacentDate(dateStr, direction) {
+    if (!availableDates || availableDates.length === 0) return shiftDate(dateStr, direction);
+    // direction = -1 找較早的日期，+1 找較晚的日期
+    const candidates = availableDates.filter(function (d) {
+      return direction < 0 ? d < dateStr : d > dateStr;
+    });
+    if (candidates.length === 0) return dateStr;
+    return direction < 0 ? candidates[0] : candidates[candidates.length - 1];
+  }
+
   function todayStr() {
     return new Intl.DateTimeFormat('en-CA', { timeZone: 'Asia/Taipei' }).format(new Date());
   }
@@ -110,8 +123,14 @@
           '<span class="reddit-post-score">▲ ' + Number(p.score).toLocaleString('en-US') + '</span>' +
           '</div>';
       }).join('');
+      var coinScores = Object.keys(reddit.coins || {}).slice(0, 5).map(function (symbol) {
+        var c = reddit.coins[symbol];
+        return '<span>' + esc(symbol) + ' ' + (c.sentiment_score >= 0 ? '+' : '') +
+          c.sentiment_score.toFixed(2) + '</span>';
+      }).join('');
       cards += '<div class="signal-card">' +
-        '<div class="signal-card-title">💬 Reddit 社群情緒</div>' +
+        '<div class="signal-card-title">💬 Reddit 社群情緒' +
+          (reddit.posts ? '（' + reddit.posts + ' 篇）' : '') + '</div>' +
         '<div style="font-size:1.4rem;font-weight:800;color:#e6edf3">' + score.toFixed(2) + ' <span style="font-size:0.9rem;color:#8b949e">' + esc(reddit.label || '') + '</span></div>' +
         '<div class="sentiment-bar-wrap">' +
           '<div class="sentiment-bar-neg" style="width:' + negPct.toFixed(1) + '%"></div>' +
@@ -123,6 +142,7 @@
           '<span>🔴 負面 ' + (reddit.negative_count || 0) + '</span>' +
           '<span>⚪ 中立 ' + (reddit.neutral_count || 0) + '</span>' +
         '</div>' +
+        (coinScores ? '<div class="sentiment-counts">' + coinScores + '</div>' : '') +
         (topPosts ? '<div style="margin-top:0.75rem">' + topPosts + '</div>' : '') +
         '</div>';
     }
@@ -174,6 +194,9 @@
           'RSI: ' + (c.rsi != null ? c.rsi : 'N/A') + '<br>' +
           'SMA7: ' + (c.sma7 != null ? formatPrice(c.sma7) : 'N/A') + '<br>' +
           'SMA20: ' + (c.sma20 != null ? formatPrice(c.sma20) : 'N/A') +
+          (c.macd_hist != null ? '<br>MACD 柱: ' + (c.macd_hist >= 0 ? '+' : '') + formatPrice(c.macd_hist) : '') +
+          (c.bb_width != null ? '<br>布林寬度: ' + c.bb_width + '%' : '') +
+          (c.volatility_30d != null ? '<br>30 日波動率: ' + c.volatility_30d + '%' : '') +
         '</div>' +
         '<span class="coin-signal">' + esc(c.signal || '中性') + '</span>' +
         '</div>';
@@ -235,6 +258,14 @@
 
   // ── Data loading ───────────────────────────────────────────────────────────
 
+  function renderReport(data, dateStr) {
+    var html = renderSignals(data.signals) +
+               renderMarket(data.market) +
+               renderSummary(data.summary) +
+               renderNews(data.news);
+    appContent.innerHTML = html || renderEmpty(dateStr);
+  }
+
   function loadReport(dateStr) {
     dateDisplay.textContent = dateStr;
     appContent.innerHTML = '<div class="empty-state"><div class="icon">⏳</div><p>載入中...</p></div>';
@@ -246,11 +277,17 @@
         return res.json();
       })
       .then(function (data) {
-        var html = renderSignals(data.signals) +
-                   renderMarket(data.market) +
-                   renderSummary(data.summary) +
-                   renderNews(data.news);
-        appContent.innerHTML = html || renderEmpty(dateStr);
+        // 新格式的新聞另存於 news_file，先顯示 headline 再補上新聞
+        if (data.news === undefined && data.news_file) {
+          renderReport(data, dateStr);
+          return fetch('data/' + data.news_file)
+            .then(function (res) { return res.ok ? res.json() : { news: [] }; })
+            .then(function (news) {
+              data.news = news.news;
+              renderReport(data, dateStr);
+            });
+        }
+        renderReport(data, dateStr);
       })
       .catch(function () {
         appContent.innerHTML = renderEmpty(dateStr);
@@ -265,14 +302,14 @@
 
   btnPrev.addEventListener('click', function () {
     var current = datePicker.value || todayStr();
-    var prev = shiftDate(current, -1);
+    var prev = adjacentDate(current, -1);
     datePicker.value = prev;
     loadReport(prev);
   });
 
   btnNext.addEventListener('click', function () {
     var current = datePicker.value || todayStr();
-    var next = shiftDate(current, 1);
+    var next = adjacentDate(current, 1);
     datePicker.value = next;
     loadReport(next);
   });
@@ -294,5 +331,19 @@
   var initial = todayStr();
   datePicker.value = initial;
   initAds();
-  loadReport(initial);
+  fetch('data/index.json')
+    .then(function (res) {
+      if (!res.ok) throw new Error('no index');
+      return res.json();
+    })
+    .then(function (index) {
+      availableDates = (index.dates || []).map(function (e) { return e.date; });
+      // 今日報告尚未產生時，改顯示最新一份
+      if (availableDates.length && availableDates.indexOf(initial) < 0) {
+        initial = availableDates[0];
+        datePicker.value = initial;
+      }
+    })
+    .catch(function () { availableDates = null; })
+    .then(function () { loadReport(initial); });
 }());
@@ -0,0 +1,162 @@
+"""
+backfill.py
+以本機紀錄重建過去日期的報告，不呼叫即時 API：
+
+- 價格：本機價格庫（data/price_history.sqlite3）中該日之前的日收盤價（與即時執行當下可取得的相同）
+- 當日即時價、24h 漲跌、成交量、情緒訊號、新聞與摘要：沿用該日報告中已記錄的值
+
+各日期互相獨立，以 process pool 並行重算 market 區段；每完成一天寫入
+data/backfill/{date}.json 檢查點，中斷後重新執行會略過已完成的日期（--force 可全部重做）。
+價格庫歷史不足時可先以 --seed-days 一次抓取長期日 K（每幣一次請求）。
+
+用法：
+    python scripts/backfill.py --start 2026-04-01 --end 2026-09-30 [--workers 4] [--seed-days 365] [--force]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import build_index
+import fetch_market
+import indicators
+import json_output
+import report_writer
+from price_store import PriceStore, split_points
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
+CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "backfill")
+
+
+def date_range(start: str, end: str) -> list[str]:
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+def checkpoint_path(checkpoint_dir: str, day: str) -> str:
+    return os.path.join(checkpoint_dir, f"{day}.json")
+
+
+def seed_store(days: int) -> None:
+    """一次抓取各幣最近 days 天的日 K 寫入價格庫，作為回溯重算的資料來源。"""
+    coins, _ = fetch_market.fetch_watchlist(fetch_market.load_watchlist())
+    with PriceStore(fetch_market.PRICE_DB) as store:
+        for symbol, coin_id in coins.items():
+            daily, _ = split_points(fetch_market.fetch_coin_chart(coin_id, days))
+            store.append(coin_id, daily)
+            print(f"[backfill] {symbol} 寫入 {len(daily)} 天日 K")
+
+
+def recorded_market_info(coin: dict, coin_id: str) -> dict:
+    """報告中已記錄的即時市場資料，轉回 build_coin 所需的 CoinGecko 欄位名稱。"""
+    if "error" in coin or coin.get("current_price") is None:
+        return {}
+    return {
+        "id": coin_id,
+        "current_price": coin["current_price"],
+        "price_change_percentage_24h": coin.get("price_change_24h"),
+        "total_volume": coin.get("volume_24h"),
+    }
+
+
+def rebuild_market(report: dict, store: PriceStore) -> tuple[list, int]:
+    """以報告日期之前的日收盤價加上當日記錄的即時價重算 market 區段，回傳 (market, 重算幣數)。
+
+    幣種 id 取自報告中的 id 欄位；較早的報告沒有 id，以預設 COINS 對照。
+    """
+    symbols, infos, histories = [], [], []
+    for coin in report.get("market", []):
+        symbol = coin["symbol"]
+        coin_id = coin.get("id") or fetch_market.COINS.get(symbol)
+        info = recorded_market_info(coin, coin_id)
+        if not info or coin_id is None:
+            continue
+        # 即時執行在台北時間 06:00（UTC 前一日 22:00），報告日期 00:00 UTC 的收盤價當時尚不存在
+        closes = store.series_before(coin_id, report["date"], fetch_market.LOOKBACK_DAYS)
+        # 與即時執行相同：日收盤價 + 當日即時價；資料不足 HISTORY_DAYS 時保留原紀錄
+        if len(closes) < fetch_market.HISTORY_DAYS:
+            continue
+        symbols.append(symbol)
+        infos.append(info)
+        histories.append(closes + [info["current_price"]])
+
+    all_metrics = indicators.compute_all(histories, core_days=fetch_market.HISTORY_DAYS + 1)
+    rebuilt = {
+        symbol: fetch_market.build_coin(symbol, info, metrics)
+        for symbol, info, metrics in zip(symbols, infos, all_metrics)
+    }
+    market = [rebuilt.get(c["symbol"], c) for c in report.get("market", [])]
+    return market, len(rebuilt)
+
+
+def backfill_day(day: str, data_dir: str, checkpoint_dir: str) -> dict:
+    """重建單一日期的報告並寫入檢查點（在子行程中執行）。"""
+    started = time.perf_counter()
+    try:
+        report = build_index.load_report(data_dir, day)
+    except FileNotFoundError:
+        result = {"date": day, "status": "missing"}
+    else:
+        with PriceStore(fetch_market.PRICE_DB) as store:
+            report["market"], rebuilt = rebuild_market(report, store)
+        # 舊格式（含 news）順便改寫為分檔格式；新格式只改寫 headline，新聞分檔不變
+        if "news" in report:
+            report_writer.write_day(report, data_dir)
+        else:
+            report_writer.write_headline(report, data_dir)
+        result = {"date": day, "status": "done", "rebuilt": rebuilt}
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["finished_at"] = datetime.now(build_index.TZ_TPE).isoformat()
+    json_output.write_json(checkpoint_path(checkpoint_dir, day), result)
+    return result
+
+
+def backfill(days: list[str], data_dir: str = DATA_DIR, checkpoint_dir: str = CHECKPOINT_DIR,
+             workers: int | None = None, force: bool = False) -> list[dict]:
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    pending = [d for d in days if force or not os.path.exists(checkpoint_path(checkpoint_dir, d))]
+    print(f"[backfill] 共 {len(days)} 天，已完成 {len(days) - len(pending)} 天，待處理 {len(pending)} 天")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(backfill_day, d, data_dir, checkpoint_dir): d for d in pending}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[backfill] {futures[future]} 失敗: {e}")
+                continue
+            results.append(result)
+            if result["status"] == "missing":
+                print(f"[backfill] {result['date']} 無報告，略過")
+            else:
+                print(f"[backfill] {result['date']} 重算 {result['rebuilt']} 幣（{result['seconds']}s）")
+
+    if any(r["status"] == "done" for r in results):
+        build_index.write(*build_index.rebuild(data_dir), data_dir)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以本機紀錄回溯重建指定日期範圍的報告")
+    parser.add_argument("--start", required=True, help="起始日期 YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="結束日期 YYYY-MM-DD（含）")
+    parser.add_argument("--workers", type=int, default=None, help="process pool 大小（預設為 CPU 數）")
+    parser.add_argument("--seed-days", type=int, default=0, help="重算前先抓取最近 N 天日 K 寫入價格庫")
+    parser.add_argument("--force", action="store_true", help="忽略檢查點，重做所有日期")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    args = parser.parse_args()
+
+    if args.seed_days:
+        seed_store(args.seed_days)
+    started = time.perf_counter()
+    results = backfill(date_range(args.start, args.end), args.data_dir, args.checkpoint_dir,
+                       args.workers, args.force)
+    done = sum(r["status"] == "done" for r in results)
+    print(f"[backfill] 完成 {done} 天，耗時 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+build_index.py
+維護 docs/data 的 archive 索引與滾動時間序列，供前端一次載入：
+
+    docs/data/index.json    可用日期清單與每日 headline 統計（新到舊）
+    docs/data/series.json   欄式時間序列：dates + 各欄位陣列（價格、RSI、恐懼貪婪、Reddit 情緒）
+
+每次執行只以當日報告增量更新（upsert 一個日期），不重新掃描所有每日檔案；
+索引不存在或指定 --rebuild 時才完整重建。過期日期的移除由 cleanup_old_data 負責，
+索引因此同時是保留機制的 manifest。
+
+用法：python scripts/build_index.py [--rebuild]
+"""
+import argparse
+import bisect
+import json
+import os
+import re
+from datetime import datetime, timezone, timedelta
+
+import json_output
+import metrics
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
+INDEX_NAME = "index.json"
+SERIES_NAME = "series.json"
+TZ_TPE = timezone(timedelta(hours=8))
+
+REPORT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.json$")
+
+
+def headline_stats(report: dict) -> dict:
+    """每日報告在索引中的摘要統計。"""
+    signals = report.get("signals") or {}
+    coins = {c["symbol"]: c for c in report.get("market", []) if "error" not in c}
+    btc = coins.get("BTC", {})
+    news_count = report.get("news_count")
+    if news_count is None:
+        news_count = len(report.get("news", []))
+    return {
+        "date": report["date"],
+        "news_count": news_count,
+        "fear_greed": (signals.get("fear_greed") or {}).get("value"),
+        "reddit_sentiment": (signals.get("reddit_sentiment") or {}).get("sentiment_score"),
+        "btc_price": btc.get("current_price"),
+        "btc_change_24h": btc.get("price_change_24h"),
+        "btc_signal": btc.get("signal"),
+    }
+
+
+def series_values(report: dict) -> dict:
+    """每日報告在時間序列中各欄位的值，欄位名稱如 "BTC.price"、"fear_greed"。"""
+    signals = report.get("signals") or {}
+    values = {
+        "fear_greed": (signals.get("fear_greed") or {}).get("value"),
+        "reddit_sentiment": (signals.get("reddit_sentiment") or {}).get("sentiment_score"),
+    }
+    for coin in report.get("market", []):
+        if "error" in coin:
+            continue
+        values[f"{coin['symbol']}.price"] = coin.get("current_price")
+        values[f"{coin['symbol']}.rsi"] = coin.get("rsi")
+    return values
+
+
+def load(path: str, default: dict) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save(path: str, data: dict) -> None:
+    with metrics.span("write", file=os.path.basename(path)):
+        json_output.write_json(path, data)
+
+
+def upsert_index(index: dict, stats: dict) -> None:
+    entries = [e for e in index.get("dates", []) if e["date"] != stats["date"]]
+    entries.append(stats)
+    entries.sort(key=lambda e: e["date"], reverse=True)
+    index["dates"] = entries
+
+
+def upsert_series(series: dict, date: str, values: dict) -> None:
+    """在欄式序列中寫入一天的值；新日期依序插入，新欄位以 None 補齊。"""
+    dates = series.setdefault("dates", [])
+    columns = series.setdefault("columns", {})
+    pos = bisect.bisect_left(dates, date)
+    if pos == len(dates) or dates[pos] != date:
+        dates.insert(pos, date)
+        for column in columns.values():
+            column.insert(pos, None)
+    for name, value in values.items():
+        column = columns.setdefault(name, [None] * len(dates))
+        column[pos] = value
+
+
+def remove_dates(index: dict, series: dict, dates: set) -> None:
+    """自索引與時間序列移除指定日期。"""
+    index["dates"] = [e for e in index.get("dates", []) if e["date"] not in dates]
+    keep = [i for i, d in enumerate(series.get("dates", [])) if d not in dates]
+    series["dates"] = [series["dates"][i] for i in keep]
+    series["columns"] = {k: [v[i] for i in keep] for k, v in series.get("columns", {}).items()}
+
+
+def load_all(data_dir: str = DATA_DIR) -> tuple[dict, dict]:
+    """讀取索引與時間序列；任一檔案不存在時掃描每日報告完整重建。"""
+    index_path = os.path.join(data_dir, INDEX_NAME)
+    series_path = os.path.join(data_dir, SERIES_NAME)
+    if not os.path.exists(index_path) or not os.path.exists(series_path):
+        return rebuild(data_dir)
+    return load(index_path, {"dates": []}), load(series_path, {"dates": [], "columns": {}})
+
+
+def write(index: dict, series: dict, data_dir: str = DATA_DIR) -> None:
+    now = datetime.now(TZ_TPE).isoformat()
+    index["updated_at"] = series["updated_at"] = now
+    save(os.path.join(data_dir, INDEX_NAME), index)
+    save(os.path.join(data_dir, SERIES_NAME), series)
+
+
+def load_report(data_dir: str, date: str) -> dict:
+    """讀取每日報告；新格式的 news 另存於 news_file，索引只需要 news_count，不必讀取。"""
+    with open(os.path.join(data_dir, f"{date}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rebuild(data_dir: str = DATA_DIR) -> tuple[dict, dict]:
+    index: dict = {"dates": []}
+    series: dict = {"dates": [], "columns": {}}
+    dates = sorted(m.group(1) for m in map(REPORT_RE.match, os.listdir(data_dir)) if m)
+    for date in dates:
+        report = load_report(data_dir, date)
+        upsert_index(index, headline_stats(report))
+        upsert_series(series, date, series_values(report))
+    print(f"[index] 完整重建索引，共 {len(index['dates'])} 天")
+    return index, series
+
+
+def update(report: dict) -> None:
+    """以當日報告增量更新索引與時間序列。"""
+    index, series = load_all(DATA_DIR)
+    upsert_index(index, headline_stats(report))
+    upsert_series(series, report["date"], series_values(report))
+    # 明確傳入 DATA_DIR：write 的預設值在定義時即已綁定，呼叫端替換 DATA_DIR 時不會跟著改變
+    write(index, series, DATA_DIR)
+    print(f"[index] 已更新 {report['date']}，索引共 {len(index['dates'])} 天")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="更新 archive 索引與時間序列")
+    parser.add_argument("--rebuild", action="store_true", help="掃描所有每日報告完整重建")
+    args = parser.parse_args()
+
+    today = datetime.now(TZ_TPE).strftime("%Y-%m-%d")
+    if args.rebuild:
+        write(*rebuild(DATA_DIR), DATA_DIR)
+        return
+    path = os.path.join(DATA_DIR, f"{today}.json")
+    if not os.path.exists(path):
+        print(f"找不到每日報告: {path}，跳過索引更新。")
+        return
+    update(load_report(DATA_DIR, today))
+
+
+if __name__ == "__main__":
+    main()
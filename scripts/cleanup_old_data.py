@@ -1,37 +1,208 @@
 """
 cleanup_old_data.py
-掃描 data/ 目錄，刪除超過 180 天的 .json 檔案。
-根據檔名前 10 字元解析日期 (YYYY-MM-DD)。
+依 archive 索引（docs/data/index.json）清理超過 180 天的每日報告。
+索引依日期排序，只需檢查最舊端已過期的日期，不必列出並解析整個目錄。
+
+刪除前先將過期日降採樣為月度封存檔 docs/data/archive/YYYY-MM.json：每日資料併入當月的
+統計（筆數、平均、最高、最低、月初與月底值），摘要重點每週只保留一則，
+讓長期歷史仍可低成本查詢，同時維持 Pages 資料量有上限。
+
+用法：python scripts/cleanup_old_data.py [--dry-run] [--full-scan]
 """
+import argparse
+import json
 import os
+import re
 from datetime import datetime, timezone, timedelta
 
+import build_index
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
 RETENTION_DAYS = 180
 TZ_TPE = timezone(timedelta(hours=8))
 CUTOFF = datetime.now(TZ_TPE) - timedelta(days=RETENTION_DAYS)
 
+ARCHIVE_DIRNAME = "archive"
+DATE_PREFIX_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})[._]")
+SUMMARY_HEADLINE_CHARS = 300
+
+
+def summary_headline(summary: str) -> str:
+    """摘要只保留第一個段落（今日重點），並截斷至 SUMMARY_HEADLINE_CHARS 字。"""
+    first = (summary or "").strip().split("\n\n")[0]
+    return first[:SUMMARY_HEADLINE_CHARS]
+
+
+def add_value(stats: dict, name: str, date: str, value) -> None:
+    """將一天的值併入 stats[name]：筆數、總和、平均、最高、最低，以及最早與最晚日期的值。"""
+    if value is None:
+        return
+    stat = stats.get(name)
+    if stat is None:
+        stats[name] = {"n": 1, "sum": value, "mean": value, "min": value, "max": value,
+                       "first": [date, value], "last": [date, value]}
+        return
+    stat["n"] += 1
+    stat["sum"] += value
+    stat["mean"] = round(stat["sum"] / stat["n"], 6)
+    stat["min"] = min(stat["min"], value)
+    stat["max"] = max(stat["max"], value)
+    if date < stat["first"][0]:
+        stat["first"] = [date, value]
+    if date > stat["last"][0]:
+        stat["last"] = [date, value]
+
+
+def empty_archive(month: str) -> dict:
+    return {"month": month, "dates": [], "news_count": 0, "headlines": {}, "signals": {}, "market": {}}
+
+
+def rollup_day(archive: dict, report: dict) -> bool:
+    """將每日報告併入月度封存；該日已在封存中時不重複計入，回傳是否有併入。"""
+    date = report["date"]
+    if date in archive["dates"]:
+        return False
+    archive["dates"] = sorted(archive["dates"] + [date])
+
+    news_count = report.get("news_count")
+    if news_count is None:
+        news_count = len(report.get("news", []))
+    archive["news_count"] += news_count
+
+    # 摘要重點每週（ISO 週）保留最晚一天的
+    year, week, _ = datetime.strptime(date, "%Y-%m-%d").isocalendar()
+    key = f"{year}-W{week:02d}"
+    headline = archive["headlines"].get(key)
+    if headline is None or date > headline["date"]:
+        archive["headlines"][key] = {"date": date, "summary": summary_headline(report.get("summary", ""))}
+
+    signals = report.get("signals") or {}
+    add_value(archive["signals"], "fear_greed", date, (signals.get("fear_greed") or {}).get("value"))
+    add_value(archive["signals"], "reddit_sentiment", date, (signals.get("reddit_sentiment") or {}).get("sentiment_score"))
+    add_value(archive["signals"], "btc_dominance", date, (signals.get("onchain") or {}).get("btc_dominance"))
+
+    for coin in report.get("market", []):
+        if "error" in coin:
+            continue
+        entry = archive["market"].setdefault(coin["symbol"], {"signals": {}})
+        add_value(entry, "price", date, coin.get("current_price"))
+        add_value(entry, "rsi", date, coin.get("rsi"))
+        if coin.get("signal"):
+            entry["signals"][coin["signal"]] = entry["signals"].get(coin["signal"], 0) + 1
+    return True
+
+
+def expired_dates(index: dict, cutoff: str) -> list[str]:
+    """索引為新到舊排序，由尾端往前取出早於 cutoff 的日期，遇到未過期者即停止。"""
+    expired = []
+    for entry in reversed(index.get("dates", [])):
+        if entry["date"] >= cutoff:
+            break
+        expired.append(entry["date"])
+    return expired
+
+
+def day_files(data_dir: str, date: str) -> list[str]:
+    """某日在目錄中的所有檔案（報告、新聞分檔、壓縮檔、執行量測、殘留中間檔）。"""
+    names = [f"{date}.json", f"{date}.news.json"] + [f"{date}_{kind}.json" for kind in ("news", "market", "signals", "metrics")]
+    return [
+        name + ext for name in names for ext in ("", ".gz", ".br")
+        if os.path.exists(os.path.join(data_dir, name + ext))
+    ]
+
+
+def archive_days(data_dir: str, dates: list[str], dry_run: bool) -> list[str]:
+    """將過期日依月份併入 archive/YYYY-MM.json；已封存的日期不重複計入。
+
+    回傳可以刪除的日期：已併入（或先前已在）封存中，或根本沒有報告檔（只有殘留中間檔）的日期；
+    報告存在但無法讀取的日期不回傳，留待修復後再封存。
+    """
+    by_month: dict[str, list[str]] = {}
+    for date in dates:
+        by_month.setdefault(date[:7], []).append(date)
+
+    archived = []
+    archive_dir = os.path.join(data_dir, ARCHIVE_DIRNAME)
+    for month, month_dates in sorted(by_month.items()):
+        path = os.path.join(archive_dir, f"{month}.json")
+        archive = build_index.load(path, empty_archive(month))
+        added = 0
+        for date in month_dates:
+            if not os.path.exists(os.path.join(data_dir, f"{date}.json")):
+                archived.append(date)
+                continue
+            try:
+                report = build_index.load_report(data_dir, date)
+            except (OSError, ValueError) as e:
+                print(f"警告：無法讀取 {date} 報告，略過封存並保留該日檔案: {e}")
+                continue
+            added += rollup_day(archive, report)
+            archived.append(date)
+        if not added:
+            continue
+        if dry_run:
+            print(f"[dry-run] 將 {added} 天封存至 {ARCHIVE_DIRNAME}/{month}.json")
+        else:
+            build_index.save(path, archive)
+            print(f"已封存 {added} 天至 {ARCHIVE_DIRNAME}/{month}.json")
+    return archived
+
+
+def full_scan_dates(data_dir: str, cutoff: str) -> list[str]:
+    """掃描整個目錄找出過期日期，用於清理不在索引中的殘留檔案。"""
+    dates = set()
+    for filename in os.listdir(data_dir):
+        m = DATE_PREFIX_RE.match(filename)
+        if m and m.group(1) < cutoff:
+            dates.add(m.group(1))
+    return sorted(dates)
+
+
+def cleanup(data_dir: str = DATA_DIR, cutoff: str | None = None, dry_run: bool = False,
+            full_scan: bool = False) -> int:
+    if cutoff is None:
+        cutoff = CUTOFF.strftime("%Y-%m-%d")
+    index, series = build_index.load_all(data_dir)
+    expired = expired_dates(index, cutoff)
+    if full_scan:
+        expired = sorted(set(expired) | set(full_scan_dates(data_dir, cutoff)))
+    if not expired:
+        print("沒有需要清理的資料。")
+        return 0
+
+    archived = archive_days(data_dir, sorted(expired), dry_run)
+    kept = sorted(set(expired) - set(archived))
+    if kept:
+        print(f"警告：{len(kept)} 天未能封存，保留檔案: {', '.join(kept)}")
+
+    deleted = 0
+    for date in archived:
+        for filename in day_files(data_dir, date):
+            if dry_run:
+                print(f"[dry-run] 將刪除: {filename}")
+            else:
+                os.remove(os.path.join(data_dir, filename))
+                print(f"已刪除: {filename}")
+            deleted += 1
+
+    if not dry_run:
+        build_index.remove_dates(index, series, set(archived))
+        build_index.write(index, series, data_dir)
+    print(f"共{'需刪除' if dry_run else '刪除'} {deleted} 個舊檔案（{len(archived)} 天）。")
+    return deleted
+
 
 def main():
+    parser = argparse.ArgumentParser(description="清理超過保留期限的每日報告")
+    parser.add_argument("--dry-run", action="store_true", help="只列出將封存與刪除的項目")
+    parser.add_argument("--full-scan", action="store_true", help="另外掃描整個目錄，清理索引外的殘留檔案")
+    args = parser.parse_args()
+
     if not os.path.exists(DATA_DIR):
         print(f"資料目錄不存在: {DATA_DIR}，跳過清理。")
         return
     print(f"清理超過 {RETENTION_DAYS} 天的舊資料（截止日期: {CUTOFF.date()}）")
-    deleted = 0
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"):
-            continue
-        date_str = filename[:10]
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=TZ_TPE)
-        except ValueError:
-            continue
-        if file_date < CUTOFF:
-            filepath = os.path.join(DATA_DIR, filename)
-            os.remove(filepath)
-            print(f"已刪除: {filename}")
-            deleted += 1
-    print(f"共刪除 {deleted} 個舊檔案。")
+    cleanup(DATA_DIR, dry_run=args.dry_run, full_scan=args.full_scan)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+"""
+coingecko.py
+fetch_market 與 fetch_signals 共用的 CoinGecko client：
+- 所有請求經由同一個 token bucket 限速，429 時依 Retry-After 或指數退避重試
+- 以 TTL 為基礎的本機回應快取（SQLite），同一端點在有效期間內不重複抓取
+- 請求合併（coalescing）：多個執行緒同時請求相同端點時只送出一次
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+
+import http_cassette
+import metrics
+from rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+BASE_URL = os.environ.get("COINGECKO_BASE", "https://api.coingecko.com/api/v3")
+CACHE_FILE = os.environ.get(
+    "COINGECKO_CACHE", os.path.join(os.path.dirname(__file__), "..", "data", "coingecko_cache.sqlite3")
+)
+
+# CoinGecko 免費版限速（每分鐘約 5-15 次請求），以 token bucket 控制整體請求速率
+RATE_PER_MINUTE = float(os.environ.get("COINGECKO_RATE_PER_MINUTE", "10"))
+RATE_BURST = float(os.environ.get("COINGECKO_RATE_BURST", "5"))
+
+RETRY_BASE_WAIT = 15  # 無 Retry-After 時的退避起始秒數
+RETRY_MAX_WAIT = 60   # CoinGecko 免費版 rate limit window 為 1 分鐘
+
+MARKETS_TTL = 300     # /coins/markets、/global 快取秒數
+MARKETS_PAGE_SIZE = 250  # /coins/markets 每頁上限
+CHART_TTL = 3600      # market_chart 快取秒數
+
+LIMITER = TokenBucket(rate=RATE_PER_MINUTE / 60, capacity=RATE_BURST)
+SESSION = http_cassette.session()
+
+_cache_lock = threading.Lock()
+_cache_conn: sqlite3.Connection | None = None
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+STATS = {"requests": 0, "cache_hits": 0, "coalesced": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    # fetch_market / fetch_signals 的工作執行緒同時更新
+    with _stats_lock:
+        STATS[name] += 1
+
+
+def request_with_retry(url: str, params: dict, timeout: int = 15, max_retries: int = 4) -> requests.Response:
+    """經由共用限速器發送 HTTP GET 請求，遇到 429 時依 Retry-After 或指數退避重試。"""
+    last_resp = None
+    for attempt in range(max_retries):
+        LIMITER.acquire()
+        _count("requests")
+        last_resp = SESSION.get(url, params=params, timeout=timeout)
+        if last_resp.status_code == 429:
+            wait = parse_retry_after(last_resp.headers.get("Retry-After"))
+            if wait is None:
+                wait = backoff_delay(attempt, RETRY_BASE_WAIT, RETRY_MAX_WAIT)
+            print(f"[CoinGecko] Rate limited (429)，等待 {wait:.1f} 秒後重試...")
+            metrics.incr("coingecko.rate_limited")
+            LIMITER.penalize(wait)
+            continue
+        last_resp.raise_for_status()
+        LIMITER.reward()
+        return last_resp
+    last_resp.raise_for_status()
+    return last_resp  # unreachable, but satisfies type checker
+
+
+def _cache() -> sqlite3.Connection:
+    global _cache_conn
+    if _cache_conn is None:
+        os.makedirs(os.path.dirname(CACHE_FILE) or ".", exist_ok=True)
+        _cache_conn = sqlite3.connect(CACHE_FILE, check_same_thread=False)
+        _cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, body TEXT NOT NULL) WITHOUT ROWID"
+        )
+        # 快取只用於同一次或相近的執行，超過一天的回應直接清除
+        _cache_conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - 86400,))
+    return _cache_conn
+
+
+def _cache_get(key: str, ttl: float):
+    with _cache_lock:
+        row = _cache().execute("SELECT fetched_at, body FROM responses WHERE key = ?", (key,)).fetchone()
+    if row and time.time() - row[0] < ttl:
+        return json.loads(row[1])
+    return None
+
+
+def _cache_put(key: str, data) -> None:
+    with _cache_lock:
+        conn = _cache()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, fetched_at, body) VALUES (?, ?, ?)",
+            (key, time.time(), json.dumps(data)),
+        )
+        conn.commit()
+
+
+def request_key(path: str, params: dict) -> str:
+    canonical = path + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_json(path: str, params: dict | None = None, ttl: float = MARKETS_TTL, timeout: int = 15):
+    """取得 CoinGecko 端點的 JSON；優先使用未過期的快取，並合併同時進行的相同請求。"""
+    params = params or {}
+    key = request_key(path, params)
+    cached = _cache_get(key, ttl)
+    if cached is not None:
+        _count("cache_hits")
+        return cached
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        _count("coalesced")
+        return future.result()
+
+    try:
+        data = request_with_retry(f"{BASE_URL}{path}", params=params, timeout=timeout).json()
+        _cache_put(key, data)
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _markets_params(**extra) -> dict:
+    return {
+        "vs_currency": "usd",
+        "price_change_percentage": "24h",
+        "sparkline": "true",
+        "per_page": str(MARKETS_PAGE_SIZE),
+        **extra,
+    }
+
+
+def markets(coin_ids) -> dict:
+    """批次取得指定幣種的市場資料（價格、24h 漲跌幅、成交量、供給量、7 日 sparkline），以 id 為鍵。
+
+    每 MARKETS_PAGE_SIZE 個 id 一個請求，id 排序後分頁，相同幣種集合共用快取。
+    """
+    ids = sorted(set(coin_ids))
+    result = {}
+    for i in range(0, len(ids), MARKETS_PAGE_SIZE):
+        params = _markets_params(ids=",".join(ids[i:i + MARKETS_PAGE_SIZE]))
+        result.update({item["id"]: item for item in get_json("/coins/markets", params, ttl=MARKETS_TTL)})
+    return result
+
+
+def top_markets(n: int) -> dict:
+    """市值前 n 名幣種的市場資料，以 id 為鍵並依市值排名排序。"""
+    result = {}
+    for page in range(1, -(-n // MARKETS_PAGE_SIZE) + 1):
+        params = _markets_params(order="market_cap_desc", page=str(page))
+        items = get_json("/coins/markets", params, ttl=MARKETS_TTL)
+        result.update({item["id"]: item for item in items})
+        if len(items) < MARKETS_PAGE_SIZE:
+            break
+    return dict(list(result.items())[:n])
+
+
+def market_chart(coin_id: str, days: int) -> list:
+    """單一幣種最近 days 天的每日價格點（[timestamp_ms, price]）。"""
+    params = {"vs_currency": "usd", "days": str(days), "interval": "daily"}
+    return get_json(f"/coins/{coin_id}/market_chart", params, ttl=CHART_TTL).get("prices", [])
+
+
+def global_data() -> dict:
+    return get_json("/global", ttl=MARKETS_TTL).get("data", {})
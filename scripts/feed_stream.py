@@ -0,0 +1,132 @@
+"""
+feed_stream.py
+RSS 2.0 / Atom 的串流解析：以 XMLPullParser 分段餵入回應內容，每讀完一篇文章就取出需要的欄位並丟棄元素，
+不建立整份 feed 的樹，也不保留用不到的全文（content:encoded 等）。
+
+- 已讀到的文章皆由新到舊排列時，連續 STALE_LIMIT 篇早於截止時間即停止解析，後面的內容不再讀取；
+  一旦出現順序不一致（置頂舊文、未排序的 feed）就讀完整份，只略過過期文章
+- 欄位只保留原始文字，文章確定保留時才去除 HTML、合併空白並將摘要（description / summary，
+  沒有時才用全文）截至 SUMMARY_CHARS 字；已有摘要時不讀取全文，過期文章不做任何處理
+- XML 格式錯誤（未定義的 HTML entity 等）時拋出 ParseError，由呼叫端改用 feedparser
+
+    articles = feed_stream.parse_feed(resp.content, cutoff)
+"""
+import html
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+ParseError = ET.ParseError
+
+CHUNK_BYTES = 64 * 1024     # 每次餵給 parser 的位元組數
+STALE_LIMIT = 3             # 文章皆由新到舊時，連續幾篇超過截止時間後停止
+SUMMARY_CHARS = 500
+
+ITEM_TAGS = {"item", "entry"}
+SUMMARY_TAGS = {"description", "summary"}
+CONTENT_TAGS = {"encoded", "content"}               # content:encoded、Atom content
+DATE_TAGS = ("pubDate", "published", "date", "issued", "updated", "modified")   # 依優先順序
+
+SKIP_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.S | re.I)
+TAG_RE = re.compile(r"<[^>]*>")
+SPACE_RE = re.compile(r"\s+")
+
+
+def strip_html(text: str, limit: int = SUMMARY_CHARS) -> str:
+    """去除標籤（含 script / style 內容）、還原 entity 並合併空白。"""
+    if "<" in text:
+        text = TAG_RE.sub(" ", SKIP_RE.sub(" ", text))
+    return SPACE_RE.sub(" ", html.unescape(text)).strip()[:limit]
+
+
+def parse_date(text: str) -> datetime | None:
+    """RFC 822（RSS）或 ISO 8601（Atom）時間，轉為 UTC；無法解析時回傳 None。"""
+    text = text.strip()
+    try:
+        dt = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _read_field(fields: dict, name: str, elem: ET.Element) -> None:
+    """從文章的直接子元素取出欄位的原始文字；同名欄位以第一個為準。"""
+    if name == "title":
+        fields.setdefault("title", "".join(elem.itertext()))
+    elif name == "link":
+        # RSS 為元素文字；Atom 為 rel="alternate"（或未指定 rel）的 href
+        href = (elem.text or "").strip() or (elem.get("href") if elem.get("rel", "alternate") == "alternate" else "")
+        if href:
+            fields.setdefault("link", href)
+    elif name in ("guid", "id"):
+        if (elem.text or "").startswith("http") and elem.get("isPermaLink") != "false":
+            fields.setdefault("permalink", elem.text.strip())
+    elif name in SUMMARY_TAGS:
+        if fields.setdefault("summary", "".join(elem.itertext())).strip():
+            fields.pop("content", None)
+    elif name in CONTENT_TAGS:
+        # 全文只在沒有摘要（或摘要為空）時使用；摘要已讀到時不組合全文文字
+        if not fields.get("summary", "").strip() and "content" not in fields:
+            fields["content"] = "".join(elem.itertext())
+    elif name in DATE_TAGS and elem.text:
+        fields.setdefault(name, elem.text)
+
+
+def parse_feed(raw: bytes, cutoff: datetime) -> list[dict]:
+    """解析 feed，回傳截止時間內文章的 title / link / published / summary。
+
+    無發布時間的文章視為在截止時間內，published 為 None，由呼叫端補上。
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: list[ET.Element] = []
+    item, item_depth, fields = None, 0, {}
+    articles, stale = [], 0
+    ordered, previous = True, None
+    for offset in range(0, len(raw), CHUNK_BYTES):
+        parser.feed(raw[offset:offset + CHUNK_BYTES])
+        for event, elem in parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                if item is None and _local(elem.tag) in ITEM_TAGS:
+                    item, item_depth, fields = elem, len(stack), {}
+                continue
+            stack.pop()
+            if item is None:
+                continue
+            if len(stack) == item_depth:
+                # 文章的直接子元素：取出欄位後立即清空，全文不會留在記憶體中
+                _read_field(fields, _local(elem.tag), elem)
+                elem.clear()
+            elif elem is item:
+                if stack:
+                    stack[-1].remove(elem)
+                item = None
+                dates = (parse_date(fields[tag]) for tag in DATE_TAGS if tag in fields)
+                published = next((dt for dt in dates if dt is not None), None)
+                if published is not None:
+                    ordered = ordered and (previous is None or published <= previous)
+                    previous = published
+                if published is not None and published < cutoff:
+                    stale += 1
+                    if ordered and stale >= STALE_LIMIT:
+                        return articles
+                    continue
+                stale = 0
+                articles.append({
+                    "title": strip_html(fields.get("title", ""), limit=None),
+                    "link": fields.get("link") or fields.get("permalink", ""),
+                    "published": published.isoformat() if published else None,
+                    "summary": strip_html(fields.get("summary") or fields.get("content", "")),
+                })
+    parser.close()
+    return articles
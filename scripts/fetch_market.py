@@ -1,21 +1,30 @@
 """
 fetch_market.py
-使用免費 CoinGecko API 取得主流幣 30 天價格歷史，並計算技術指標。
+使用免費 CoinGecko API 增量更新觀察清單中各幣的價格歷史（本機 SQLite），並批次計算技術指標。
+
+觀察清單由 config/watchlist.json（或環境變數 WATCHLIST_FILE 指定的檔案）決定：
+
+    {"coins": {"BTC": "bitcoin", "ETH": "ethereum"}}   指定幣種
+    {"top_n": 250}                                      市值前 N 名
+
+市場資料以分頁的 /coins/markets?sparkline=true 批次取得（每 250 幣一個請求），
+7 日 sparkline 即可補上每日收盤價；只有價格庫中尚無歷史的新幣才需要個別的 market_chart 回補。
 """
 import json
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
-import numpy as np
-import requests
+import coingecko
+import indicators
+import json_output
+from price_store import PriceStore, sparkline_daily, split_points
 
 TZ_TPE = timezone(timedelta(hours=8))
 TODAY = datetime.now(TZ_TPE).strftime("%Y-%m-%d")
 OUTPUT_FILE = os.path.join(os.path.dirname(__file__), "..", "docs", "data", f"{TODAY}_market.json")
 
-COINGECKO_BASE = "https://api.coingecko.com/api/v3"
-
+# 未提供觀察清單設定檔時的預設幣種
 COINS = {
     "BTC": "bitcoin",
     "ETH": "ethereum",
@@ -23,174 +32,151 @@ COINS = {
     "BNB": "binancecoin",
     "XRP": "ripple",
 }
+WATCHLIST_FILE = os.environ.get(
+    "WATCHLIST_FILE", os.path.join(os.path.dirname(__file__), "..", "config", "watchlist.json")
+)
 
-REQUEST_INTERVAL = 12  # CoinGecko 免費版限速（每分鐘約 5-10 次請求）
-
+MAX_WORKERS = int(os.environ.get("COINGECKO_MAX_WORKERS", "4"))
 
-RETRY_WAITS = [30, 45, 60]  # CoinGecko 免費版 rate limit window 為 1 分鐘
+HISTORY_DAYS = int(os.environ.get("HISTORY_DAYS", "30"))  # RSI / SMA / EMA / 區間高低點使用的日 K 數
+# MACD、波動率、交叉偵測等指標使用的較長序列（價格庫保留 PRICE_RETENTION_DAYS 天，不需額外請求）
+LOOKBACK_DAYS = max(HISTORY_DAYS, indicators.LOOKBACK_DAYS)
+PRICE_DB = os.environ.get(
+    "PRICE_DB", os.path.join(os.path.dirname(__file__), "..", "data", "price_history.sqlite3")
+)
+PRICE_RETENTION_DAYS = 400  # 本機價格歷史保留天數
+# 每次執行最多為幾個新幣呼叫 market_chart 回補歷史，其餘留待之後的執行（sparkline 會先補上最近 7 天）
+MAX_CHART_BACKFILL = int(os.environ.get("MAX_CHART_BACKFILL", "25"))
 
 
-def request_with_retry(url: str, params: dict, timeout: int = 15, max_retries: int = 3) -> requests.Response:
-    """發送 HTTP GET 請求，遇到 429 或其他錯誤時自動重試。"""
-    last_resp = None
-    for attempt in range(max_retries):
-        last_resp = requests.get(url, params=params, timeout=timeout)
-        if last_resp.status_code == 429:
-            wait = RETRY_WAITS[attempt]
-            print(f"[CoinGecko] Rate limited (429)，等待 {wait} 秒後重試...")
-            time.sleep(wait)
-            continue
-        last_resp.raise_for_status()
-        return last_resp
-    last_resp.raise_for_status()
-    return last_resp  # unreachable, but satisfies type checker
+def load_watchlist(path: str = WATCHLIST_FILE) -> dict:
+    """讀取觀察清單設定；檔案不存在時使用預設 COINS。"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return {"coins": dict(COINS)}
+    if "top_n" not in config and not config.get("coins"):
+        raise ValueError(f"觀察清單需設定 coins 或 top_n: {path}")
+    return config
 
 
 def fetch_all_market_data(coin_ids: list) -> dict:
-    """一次取得所有幣種的市場基本資料（價格、24h 漲跌幅、成交量）。"""
+    """一次取得所有幣種的市場基本資料（價格、24h 漲跌幅、成交量、7 日 sparkline）。"""
     try:
-        market_url = f"{COINGECKO_BASE}/coins/markets"
-        market_params = {
-            "vs_currency": "usd",
-            "ids": ",".join(coin_ids),
-            "price_change_percentage": "24h",
-        }
-        resp = request_with_retry(market_url, params=market_params, timeout=15)
-        return {item["id"]: item for item in resp.json()}
+        return coingecko.markets(coin_ids)
     except Exception as e:
         print(f"[CoinGecko] 批次市場資料抓取失敗: {e}")
         return {}
 
 
-def fetch_coin_chart(coin_id: str) -> list:
-    """取得單一幣種的 30 天價格歷史。"""
+def fetch_watchlist(watchlist: dict) -> tuple[dict, dict]:
+    """依觀察清單抓取市場資料，回傳 ({symbol: coin_id}, {coin_id: 市場資料})。
+
+    top_n 模式的幣種由市值排名決定，symbol 重複時保留排名較前者。
+    """
+    if "top_n" not in watchlist:
+        coins = watchlist["coins"]
+        return coins, fetch_all_market_data(list(coins.values()))
+    try:
+        market_data = coingecko.top_markets(int(watchlist["top_n"]))
+    except Exception as e:
+        print(f"[CoinGecko] 市值排名抓取失敗: {e}")
+        return {}, {}
+    coins = {}
+    for coin_id, item in market_data.items():
+        coins.setdefault(item["symbol"].upper(), coin_id)
+    return coins, market_data
+
+
+def fetch_coin_chart(coin_id: str, days: int = HISTORY_DAYS) -> list:
+    """取得單一幣種最近 days 天的價格點（[timestamp_ms, price]）。"""
     try:
-        history_url = f"{COINGECKO_BASE}/coins/{coin_id}/market_chart"
-        history_params = {
-            "vs_currency": "usd",
-            "days": "30",
-            "interval": "daily",
-        }
-        resp = request_with_retry(history_url, params=history_params, timeout=15)
-        return [p[1] for p in resp.json().get("prices", [])]
+        return coingecko.market_chart(coin_id, days)
     except Exception as e:
         print(f"[CoinGecko] {coin_id} 歷史資料抓取失敗: {e}")
         return []
 
 
-def calc_rsi(prices: list, period: int = 14) -> float | None:
-    """計算 RSI (14 期)。"""
-    if len(prices) < period + 1:
-        return None
-    arr = np.array(prices, dtype=float)
-    deltas = np.diff(arr)
-    gains = np.where(deltas > 0, deltas, 0.0)
-    losses = np.where(deltas < 0, -deltas, 0.0)
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    for i in range(period, len(deltas)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-    if avg_loss == 0:
-        return 100.0
-    rs = avg_gain / avg_loss
-    return round(100.0 - (100.0 / (1.0 + rs)), 2)
-
-
-def calc_sma(prices: list, period: int) -> float | None:
-    if len(prices) < period:
-        return None
-    return round(float(np.mean(prices[-period:])), 6)
-
-
-def calc_ema(prices: list, period: int) -> float | None:
-    if len(prices) < period:
-        return None
-    arr = np.array(prices, dtype=float)
-    k = 2.0 / (period + 1)
-    ema = arr[0]
-    for price in arr[1:]:
-        ema = price * k + ema * (1 - k)
-    return round(float(ema), 6)
-
-
-def determine_signal(rsi: float | None, sma7: float | None, sma20: float | None) -> str:
-    """根據 RSI 超買/超賣與均線交叉判斷綜合訊號。"""
-    if rsi is None:
-        return "觀望"
-    signals = []
-    if rsi >= 70:
-        signals.append("RSI超買")
-    elif rsi <= 30:
-        signals.append("RSI超賣")
-    if sma7 is not None and sma20 is not None:
-        if sma7 > sma20:
-            signals.append("均線多頭")
-        elif sma7 < sma20:
-            signals.append("均線空頭")
-    if not signals:
-        return "中性"
-    return " / ".join(signals)
-
-
-def process_coin(symbol: str, coin_id: str, market_info: dict) -> dict:
-    print(f"抓取 {symbol} ({coin_id}) 歷史資料...")
-    prices = fetch_coin_chart(coin_id)
-
-    if not market_info or not prices:
+def build_coin(symbol: str, market_info: dict, metrics: dict | None) -> dict:
+    if not market_info or not metrics:
         return {"symbol": symbol, "error": "資料抓取失敗"}
-
-    rsi = calc_rsi(prices)
-    sma7 = calc_sma(prices, 7)
-    sma20 = calc_sma(prices, 20)
-    ema12 = calc_ema(prices, 12)
-    ema26 = calc_ema(prices, 26)
-    high_30d = round(float(max(prices)), 6) if prices else None
-    low_30d = round(float(min(prices)), 6) if prices else None
-    signal = determine_signal(rsi, sma7, sma20)
-
     return {
         "symbol": symbol,
+        "id": market_info.get("id"),
         "current_price": market_info.get("current_price"),
         "price_change_24h": market_info.get("price_change_percentage_24h"),
         "volume_24h": market_info.get("total_volume"),
-        "high_30d": high_30d,
-        "low_30d": low_30d,
-        "rsi": rsi,
-        "sma7": sma7,
-        "sma20": sma20,
-        "ema12": ema12,
-        "ema26": ema26,
-        "signal": signal,
+        **{field: metrics[field] for field in indicators.fields()},
     }
 
 
-def main():
-    print(f"開始抓取市場資料，日期: {TODAY}")
-
-    # 一次取得所有幣種的市場基本資料
+def load_histories(coin_ids: list, market_data: dict) -> list[list[float]]:
+    """以 sparkline 與本機價格庫組出各幣最近 LOOKBACK_DAYS 日收盤價加上最新即時價。
+
+    sparkline 推估的日收盤價不覆蓋 market_chart 的正式日 K；價格庫中歷史不足或中斷超過
+    sparkline 範圍的幣種，依清單順序最多 MAX_CHART_BACKFILL 個以 market_chart 回補。
+    完整回補過的幣種即使上市未滿 LOOKBACK_DAYS 天，之後也只補缺口，不再佔用回補額度。
+    """
+    today = datetime.now(timezone.utc).date()
+    with PriceStore(PRICE_DB) as store:
+        for coin_id in coin_ids:
+            store.append(coin_id, sparkline_daily(market_data.get(coin_id, {})), replace=False)
+
+        plan = {}
+        for coin_id in coin_ids:
+            days = store.missing_days(coin_id, today, LOOKBACK_DAYS)
+            if days > 1:
+                plan[coin_id] = days
+        deferred = len(plan) - MAX_CHART_BACKFILL
+        plan = dict(list(plan.items())[:MAX_CHART_BACKFILL])
+        print(f"sparkline 更新 {len(coin_ids)} 個幣種，market_chart 回補 {len(plan)} 個幣種"
+              + (f"（{deferred} 個留待下次執行）" if deferred > 0 else ""))
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            for coin_id, points in zip(plan, pool.map(fetch_coin_chart, plan.keys(), plan.values())):
+                store.append(coin_id, split_points(points)[0])
+                if points and plan[coin_id] >= LOOKBACK_DAYS:
+                    store.mark_backfilled(coin_id, plan[coin_id])
+
+        histories = []
+        for coin_id in coin_ids:
+            live = market_data.get(coin_id, {}).get("current_price")
+            # 最後 HISTORY_DAYS + 1 個點與 market_chart?days=30 相同，core 指標只看這一段
+            if live is None:
+                prices = store.series(coin_id, LOOKBACK_DAYS + 1)
+            else:
+                prices = store.series(coin_id, LOOKBACK_DAYS) + [float(live)]
+            histories.append(prices)
+        store.prune(today, PRICE_RETENTION_DAYS)
+    return histories
+
+
+def fetch_coins(watchlist: dict) -> list:
+    """抓取觀察清單中所有幣種資料；市場資料與 sparkline 分頁批次取得，指標以矩陣一次批次計算。"""
     print("批次抓取市場基本資料...")
-    all_market_data = fetch_all_market_data(list(COINS.values()))
-    time.sleep(REQUEST_INTERVAL)
-
-    coins_data = []
-    coin_items = list(COINS.items())
-    for i, (symbol, coin_id) in enumerate(coin_items):
-        market_info = all_market_data.get(coin_id, {})
-        result = process_coin(symbol, coin_id, market_info)
-        coins_data.append(result)
-        # 間隔等待（最後一個幣不需要等待）
-        if i < len(COINS) - 1:
-            time.sleep(REQUEST_INTERVAL)
-
-    output = {
+    coins, all_market_data = fetch_watchlist(watchlist)
+
+    histories = load_histories(list(coins.values()), all_market_data)
+    all_metrics = indicators.compute_all(histories, core_days=HISTORY_DAYS + 1)
+    return [
+        build_coin(symbol, all_market_data.get(coin_id, {}), metrics)
+        for (symbol, coin_id), metrics in zip(coins.items(), all_metrics)
+    ]
+
+
+def collect() -> dict:
+    """抓取所有幣種市場資料與指標，回傳 _market.json 的內容。"""
+    print(f"開始抓取市場資料，日期: {TODAY}")
+    return {
         "date": TODAY,
-        "coins": coins_data,
+        "coins": fetch_coins(load_watchlist()),
     }
 
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+
+def main():
+    output = collect()
+
+    json_output.write_json(OUTPUT_FILE, output, compact=False)
 
     print(f"市場資料儲存至 {OUTPUT_FILE}")
 
@@ -1,14 +1,20 @@
 """
 fetch_news.py
 從 RSS 來源和 CryptoPanic API 抓取 24 小時內的加密貨幣新聞。
+RSS 以 feed_stream 串流解析（讀到超過 24 小時的文章即停止），格式錯誤的 feed 才改用 feedparser。
 """
 import json
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
 import feedparser
-import requests
+
+import feed_stream
+import http_cassette
+import json_output
+import metrics
+from news_dedup import dedupe
 
 TZ_TPE = timezone(timedelta(hours=8))
 TODAY = datetime.now(TZ_TPE).strftime("%Y-%m-%d")
@@ -21,8 +27,15 @@ RSS_FEEDS = {
     "Decrypt": "https://decrypt.co/feed",
 }
 
+# 各 feed 的 ETag / Last-Modified 與上次解析結果，未變更時以 304 直接沿用
+FEED_CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "feed_cache.json")
+FEED_WORKERS = 8
+USER_AGENT = "crypto-daily-digest/1.0 (automated news aggregator)"
+
+SESSION = http_cassette.session(pool_maxsize=FEED_WORKERS, user_agent=USER_AGENT)
+
 CRYPTOPANIC_API_KEY = os.environ.get("CRYPTOPANIC_API_KEY", "")
-CRYPTOPANIC_URL = "https://cryptopanic.com/api/v1/posts/"
+CRYPTOPANIC_URL = os.environ.get("CRYPTOPANIC_URL", "https://cryptopanic.com/api/v1/posts/")
 
 CUTOFF = datetime.now(TZ_TPE) - timedelta(hours=24)
 
@@ -43,24 +56,92 @@ def is_within_24h(entry) -> bool:
     return True  # 無法判斷時保留
 
 
+def parse_with_feedparser(raw: bytes) -> list[dict]:
+    """格式不合 XML 的 feed 改以 feedparser（容錯較高但較慢）解析，欄位與 feed_stream.parse_feed 相同。"""
+    feed = feedparser.parse(raw)
+    return [{
+        "title": feed_stream.strip_html(entry.get("title", ""), limit=None),
+        "link": entry.get("link", ""),
+        "published": parse_published(entry),
+        "summary": feed_stream.strip_html(getattr(entry, "summary", "") or ""),
+    } for entry in feed.entries if is_within_24h(entry)]
+
+
+def load_feed_cache() -> dict:
+    try:
+        with open(FEED_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_feed_cache(cache: dict) -> None:
+    json_output.write_json(FEED_CACHE_FILE, cache)
+
+
+def fetch_feed(source: str, url: str, cached: dict) -> dict:
+    """以條件式 GET 抓取單一 feed，回傳新的快取紀錄（validators + 24 小時內文章）。"""
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    resp = SESSION.get(url, headers=headers, timeout=15)
+    if resp.status_code == 304:
+        print(f"[RSS] {source} 未更新 (304)，沿用快取。")
+        metrics.incr("rss.not_modified")
+        return cached
+    resp.raise_for_status()
+    with metrics.span("rss.parse", source=source, bytes=len(resp.content)) as attrs:
+        try:
+            entries = feed_stream.parse_feed(resp.content, CUTOFF)
+            attrs["parser"] = "stream"
+        except feed_stream.ParseError as e:
+            print(f"[RSS] {source} XML 格式錯誤（{e}），改用 feedparser 解析。")
+            metrics.incr("rss.parse_fallback")
+            entries = parse_with_feedparser(resp.content)
+            attrs["parser"] = "feedparser"
+        attrs["entries"] = len(entries)
+    now = datetime.now(TZ_TPE).isoformat()
+    articles = [{
+        "source": source,
+        "title": e["title"],
+        "link": e["link"],
+        "published": e["published"] or now,
+        "summary": e["summary"],
+    } for e in entries]
+    return {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "articles": articles,
+    }
+
+
 def fetch_rss() -> list:
+    """並行抓取所有 RSS feed；未變更的 feed 只花一次 304，不重新解析。"""
+    cache = load_feed_cache()
+    with ThreadPoolExecutor(max_workers=FEED_WORKERS) as pool:
+        futures = {
+            url: pool.submit(fetch_feed, source, url, cache.get(url, {}))
+            for source, url in RSS_FEEDS.items()
+        }
     articles = []
+    new_cache = {}
     for source, url in RSS_FEEDS.items():
         try:
-            feed = feedparser.parse(url)
-            for entry in feed.entries:
-                if not is_within_24h(entry):
-                    continue
-                summary = getattr(entry, "summary", "") or ""
-                articles.append({
-                    "source": source,
-                    "title": entry.get("title", "").strip(),
-                    "link": entry.get("link", ""),
-                    "published": parse_published(entry),
-                    "summary": summary[:500],
-                })
+            record = futures[url].result()
         except Exception as e:
             print(f"[RSS] {source} 抓取失敗: {e}")
+            if url in cache:
+                new_cache[url] = cache[url]
+            continue
+        new_cache[url] = record
+        # 快取內容可能來自前一次執行，重新套用 24 小時截止時間
+        articles += [
+            a for a in record.get("articles", [])
+            if datetime.fromisoformat(a["published"]) >= CUTOFF
+        ]
+    save_feed_cache(new_cache)
     return articles
 
 
@@ -75,7 +156,7 @@ def fetch_cryptopanic() -> list:
             "public": "true",
             "kind": "news",
         }
-        resp = requests.get(CRYPTOPANIC_URL, params=params, timeout=15)
+        resp = SESSION.get(CRYPTOPANIC_URL, params=params, timeout=15)
         resp.raise_for_status()
         data = resp.json()
         for item in data.get("results", []):
@@ -98,25 +179,33 @@ def fetch_cryptopanic() -> list:
     return articles
 
 
-def main():
+def collect() -> dict:
+    """抓取、去重並排序當日新聞，回傳 _news.json 的內容。"""
     print(f"開始抓取新聞，日期: {TODAY}")
     articles = fetch_rss()
     articles += fetch_cryptopanic()
 
+    # 跨來源與跨日去重
+    before = len(articles)
+    articles = dedupe(articles, TODAY)
+    print(f"去重：{before} → {len(articles)} 篇")
+
     # 依發布時間排序（最新優先）
     articles.sort(key=lambda a: a["published"], reverse=True)
 
-    output = {
+    return {
         "date": TODAY,
         "count": len(articles),
         "articles": articles,
     }
 
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
 
-    print(f"共抓取 {len(articles)} 篇文章，儲存至 {OUTPUT_FILE}")
+def main():
+    output = collect()
+
+    json_output.write_json(OUTPUT_FILE, output, compact=False)
+
+    print(f"共抓取 {output['count']} 篇文章，儲存至 {OUTPUT_FILE}")
 
 
 if __name__ == "__main__":
@@ -1,32 +1,48 @@
 """
 fetch_signals.py
-抓取恐懼貪婪指數、Reddit 社群情緒分析、BTC 鏈上資料，輸出 {TODAY}_signals.json。
+抓取恐懼貪婪指數、Reddit 社群情緒分析（多個 subreddit 分頁，見 reddit.py）、BTC 鏈上資料，
+並以 sentiment 詞庫為當日新聞標題與摘要評分，輸出 {TODAY}_signals.json。
+情緒分數另依提及的幣種代號分別彙總。
+恐懼貪婪指數與情緒分數每日追加到本機訊號歷史（signal_store），輸出中附上 7 / 30 / 90 日的滾動統計（trends）。
 """
+import heapq
 import json
 import os
-import time
+import threading
 from datetime import datetime, timezone, timedelta
 
-import requests
+import coingecko
+import fetch_market
+import http_cassette
+import json_output
+import reddit
+import sentiment
+import signal_store
 
 TZ_TPE = timezone(timedelta(hours=8))
 TODAY = datetime.now(TZ_TPE).strftime("%Y-%m-%d")
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
 OUTPUT_FILE = os.path.join(DATA_DIR, f"{TODAY}_signals.json")
+NEWS_FILE = os.path.join(DATA_DIR, f"{TODAY}_news.json")
 
-REDDIT_USER_AGENT = "crypto-daily-digest/1.0 (automated news aggregator)"
+FEAR_GREED_URL = os.environ.get("FEAR_GREED_URL", "https://api.alternative.me/fng/")
+TOP_POSTS = 5  # 輸出中保留讚數最高的幾篇貼文
+FEAR_GREED_HISTORY = 7  # 輸出中保留的恐懼貪婪指數歷史天數
+FEAR_GREED_BACKFILL = 365  # 訊號歷史為空時向 Alternative.me 回補的天數
+SIGNAL_DB = signal_store.DB_FILE
 
-POSITIVE_WORDS = {"bullish", "moon", "pump", "surge", "rally", "gain", "high", "ath", "up", "buy"}
-NEGATIVE_WORDS = {"bearish", "crash", "dump", "drop", "fall", "low", "fud", "down", "sell", "fear"}
+SESSION = http_cassette.session()
 
 
-def fetch_fear_greed() -> dict:
-    """恐懼貪婪指數（Alternative.me）"""
+def watchlist_lexicon() -> sentiment.Lexicon:
+    """情緒詞庫，觀察清單中的幣種代號也納入幣種比對。"""
+    return sentiment.load_lexicon(symbols=fetch_market.load_watchlist().get("coins", {}).keys())
+
+
+def fetch_fear_greed(limit: int = FEAR_GREED_HISTORY) -> dict:
+    """恐懼貪婪指數（Alternative.me）；history 為最近 limit 天（新到舊）。"""
     try:
-        resp = requests.get(
-            "https://api.alternative.me/fng/?limit=7",
-            timeout=15,
-        )
+        resp = SESSION.get(FEAR_GREED_URL, params={"limit": limit}, timeout=15)
         resp.raise_for_status()
         raw = resp.json()
         entries = raw.get("data", [])
@@ -37,7 +53,8 @@ def fetch_fear_greed() -> dict:
             {
                 "value": int(e["value"]),
                 "classification": e["value_classification"],
-                "date": datetime.fromtimestamp(int(e["timestamp"]), tz=timezone.utc).strftime("%Y-%m-%d"),
+                # 與情緒分數相同以台北時間的報告日期為準
+                "date": datetime.fromtimestamp(int(e["timestamp"]), tz=TZ_TPE).strftime("%Y-%m-%d"),
             }
             for e in entries
         ]
@@ -52,95 +69,70 @@ def fetch_fear_greed() -> dict:
         return {}
 
 
-def fetch_reddit_sentiment() -> dict:
-    """Reddit r/CryptoCurrency 熱門文章情緒分析"""
-    try:
-        headers = {"User-Agent": REDDIT_USER_AGENT}
-        resp = requests.get(
-            "https://www.reddit.com/r/CryptoCurrency/hot.json?limit=25",
-            headers=headers,
-            timeout=15,
-        )
-        resp.raise_for_status()
-        raw = resp.json()
-        posts = raw.get("data", {}).get("children", [])
-
-        positive_count = 0
-        negative_count = 0
-        neutral_count = 0
-        top_posts = []
-
-        for post in posts:
-            post_data = post.get("data", {})
-            title = post_data.get("title", "")
-            score = post_data.get("score", 0)
-            title_lower = title.lower()
-            words = set(title_lower.split())
-            pos_hits = words & POSITIVE_WORDS
-            neg_hits = words & NEGATIVE_WORDS
-            if pos_hits and not neg_hits:
-                positive_count += 1
-            elif neg_hits and not pos_hits:
-                negative_count += 1
-            else:
-                neutral_count += 1
-
-            top_posts.append({"title": title, "score": score})
-
-        top_posts = sorted(top_posts, key=lambda x: x["score"], reverse=True)[:5]
-
-        total = positive_count + negative_count + neutral_count
-        if total == 0:
-            sentiment_score = 0.0
-        else:
-            sentiment_score = round((positive_count - negative_count) / total, 4)
-
-        if sentiment_score > 0.3:
-            label = "偏樂觀"
-        elif sentiment_score > 0.1:
-            label = "略樂觀"
-        elif sentiment_score < -0.3:
-            label = "偏悲觀"
-        elif sentiment_score < -0.1:
-            label = "略悲觀"
-        else:
-            label = "中立"
+def fetch_reddit_sentiment(lexicon: sentiment.Lexicon | None = None, subreddits: list[str] | None = None) -> dict:
+    """多個 subreddit 分頁貼文的情緒分析：依讚數加權，整體、各幣種與各 subreddit 分別彙總。
+
+    貼文逐篇串流評分，不保留原始 listing；同一篇貼文（跨頁重複）只計一次，只保留讚數前 5 名標題。
+    """
+    aggregate = sentiment.Aggregate(lexicon)
+    by_subreddit: dict[str, sentiment.Tally] = {}
+    seen: set[str] = set()
+    top_posts: list[tuple] = []  # (讚數, 序號, 貼文) 的 min-heap
+    lock = threading.Lock()
+
+    def handle(subreddit: str, post: dict) -> None:
+        title = post.get("title", "")
+        score = post.get("score", 0) or 0
+        with lock:
+            key = post.get("name") or post.get("id") or title
+            if key in seen:
+                return
+            seen.add(key)
+            default = reddit.SUBREDDIT_COINS.get(subreddit.lower())
+            result = aggregate.add(f"{title}. {post.get('selftext', '')}", sentiment.upvote_weight(score),
+                                   (default,) if default else ())
+            by_subreddit.setdefault(subreddit, sentiment.Tally()).add(result.compound,
+                                                                      sentiment.upvote_weight(score))
+            entry = (score, len(seen), {"title": title, "score": score, "subreddit": subreddit})
+            if len(top_posts) < TOP_POSTS:
+                heapq.heappush(top_posts, entry)
+            elif score > top_posts[0][0]:
+                heapq.heapreplace(top_posts, entry)
 
-        return {
-            "sentiment_score": sentiment_score,
-            "positive_count": positive_count,
-            "negative_count": negative_count,
-            "neutral_count": neutral_count,
-            "label": label,
-            "top_posts": top_posts,
-        }
+    try:
+        fetched = reddit.ingest(handle, subreddits)
     except Exception as e:
         print(f"警告：取得 Reddit 情緒資料失敗: {e}")
         return {}
+    if not seen:
+        print("警告：Reddit 沒有取得任何貼文")
+        return {}
+
+    return {
+        **aggregate.summary(),
+        "posts": len(seen),
+        "subreddits": {
+            sub: {**info, **({"sentiment_score": by_subreddit[sub].score} if sub in by_subreddit else {})}
+            for sub, info in fetched.items()
+        },
+        "top_posts": [p for _, _, p in sorted(top_posts, key=lambda x: (-x[0], x[1]))],
+    }
 
 
 def fetch_onchain() -> dict:
-    """BTC 鏈上資料（CoinGecko 免費 API）"""
+    """BTC 鏈上資料（CoinGecko 免費 API）
+
+    供給量與成交量取自觀察清單的 /coins/markets 回應（與 fetch_market 共用同一份快取），
+    不再另外下載完整的 /coins/bitcoin 文件；清單中沒有 bitcoin 時才單獨查詢。
+    """
     try:
-        resp_btc = requests.get(
-            "https://api.coingecko.com/api/v3/coins/bitcoin",
-            timeout=30,
-        )
-        resp_btc.raise_for_status()
-        btc = resp_btc.json()
-        market_data = btc.get("market_data", {})
-        circulating = market_data.get("circulating_supply")
-        max_supply = market_data.get("max_supply")
+        _, market_data = fetch_market.fetch_watchlist(fetch_market.load_watchlist())
+        btc = market_data.get("bitcoin") or coingecko.markets(["bitcoin"]).get("bitcoin", {})
+        circulating = btc.get("circulating_supply")
+        max_supply = btc.get("max_supply")
         supply_ratio = round(circulating / max_supply * 100, 2) if circulating and max_supply else None
 
-        time.sleep(12)
-
-        resp_global = requests.get(
-            "https://api.coingecko.com/api/v3/global",
-            timeout=30,
-        )
-        resp_global.raise_for_status()
-        global_data = resp_global.json().get("data", {})
+        global_data = coingecko.global_data()
 
         return {
             "btc_dominance": round(global_data.get("market_cap_percentage", {}).get("btc", 0), 2),
@@ -149,35 +141,77 @@ def fetch_onchain() -> dict:
             "btc_circulating_supply": circulating,
             "btc_max_supply": max_supply,
             "btc_supply_ratio": supply_ratio,
-            "btc_volume_24h": market_data.get("total_volume", {}).get("usd"),
+            "btc_volume_24h": btc.get("total_volume"),
         }
     except Exception as e:
         print(f"警告：取得鏈上資料失敗: {e}")
         return {}
 
 
-def main():
+def fetch_news_sentiment(news_data: dict | None, lexicon: sentiment.Lexicon | None = None) -> dict:
+    """當日新聞標題與摘要的整體與各幣種情緒；沒有新聞資料時回傳空 dict。"""
+    articles = (news_data or {}).get("articles", [])
+    if not articles:
+        return {}
+    return sentiment.score_articles(articles, lexicon)
+
+
+def record_history(signals: dict) -> dict:
+    """將當日訊號追加到本機訊號歷史，回傳各序列的滾動統計；恐懼貪婪指數的回補天數寫入後，輸出只保留最近 7 天。"""
+    fear_greed = signals.get("fear_greed") or {}
+    with signal_store.SignalStore(SIGNAL_DB) as store:
+        for series, points in signal_store.report_points(signals).items():
+            store.append(series, points)
+        trends = {series: store.stats(series) for series in signal_store.SERIES}
+    if fear_greed.get("history"):
+        fear_greed["history"] = fear_greed["history"][:FEAR_GREED_HISTORY]
+    return {series: stats for series, stats in trends.items() if stats}
+
+
+def fear_greed_limit() -> int:
+    """本次需要的恐懼貪婪指數天數：至少 7 天供輸出，另補足訊號歷史最後一點之後的缺口。"""
+    today = datetime.now(TZ_TPE).date()
+    with signal_store.SignalStore(SIGNAL_DB) as store:
+        missing = store.missing_days("fear_greed", today, FEAR_GREED_BACKFILL)
+    return max(FEAR_GREED_HISTORY, missing)
+
+
+def collect(news_data: dict | None = None) -> dict:
+    """抓取所有市場情緒訊號，回傳 _signals.json 的內容；提供 news_data 時一併為新聞評分。"""
     print(f"開始抓取市場情緒訊號，日期: {TODAY}")
+    lexicon = watchlist_lexicon()
 
     print("抓取恐懼貪婪指數 ...")
-    fear_greed = fetch_fear_greed()
+    fear_greed = fetch_fear_greed(fear_greed_limit())
 
     print("抓取 Reddit 社群情緒 ...")
-    reddit_sentiment = fetch_reddit_sentiment()
+    reddit_sentiment = fetch_reddit_sentiment(lexicon)
+
+    print("分析新聞情緒 ...")
+    news_sentiment = fetch_news_sentiment(news_data, lexicon)
 
     print("抓取 BTC 鏈上資料 ...")
     onchain = fetch_onchain()
 
-    output = {
+    signals = {
         "date": TODAY,
         "fear_greed": fear_greed,
         "reddit_sentiment": reddit_sentiment,
+        "news_sentiment": news_sentiment,
         "onchain": onchain,
     }
+    signals["trends"] = record_history(signals)
+    return signals
+
+
+def main():
+    news_data = None
+    if os.path.exists(NEWS_FILE):
+        with open(NEWS_FILE, "r", encoding="utf-8") as f:
+            news_data = json.load(f)
+    output = collect(news_data)
 
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    json_output.write_json(OUTPUT_FILE, output, compact=False)
     print(f"市場情緒訊號儲存至 {OUTPUT_FILE}")
 
 
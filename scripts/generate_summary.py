@@ -1,71 +1,114 @@
 """
 generate_summary.py
-讀取當日 _news.json 和 _market.json，使用 OpenAI GPT-4o-mini 產生繁體中文每日報告。
+讀取當日 _news.json（有翻譯 checkpoint 時改讀 _news_translated.json）和 _market.json，使用 OpenAI GPT-4o-mini 產生繁體中文每日報告。
+prompt、模型與參數都未變時沿用 summary_cache 中先前的摘要（例如重跑 workflow），--force 強制重新產生。
+
+用法：python scripts/generate_summary.py [--force]
 """
+import argparse
 import json
 import os
 from datetime import datetime, timezone, timedelta
 
 from openai import OpenAI
 
+import http_cassette
+import metrics
+import prompt_packer
+from llm_client import stream_text
+from prompt_packer import count_tokens, pack_lines
+from report_writer import print_stats, write_day
+from summary_cache import SummaryCache
+
 TZ_TPE = timezone(timedelta(hours=8))
 TODAY = datetime.now(TZ_TPE).strftime("%Y-%m-%d")
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
 NEWS_FILE = os.path.join(DATA_DIR, f"{TODAY}_news.json")
+TRANSLATED_FILE = os.path.join(DATA_DIR, f"{TODAY}_news_translated.json")    # run_pipeline 的翻譯 checkpoint
 MARKET_FILE = os.path.join(DATA_DIR, f"{TODAY}_market.json")
 SIGNALS_FILE = os.path.join(DATA_DIR, f"{TODAY}_signals.json")
 OUTPUT_FILE = os.path.join(DATA_DIR, f"{TODAY}.json")
 
+MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "你是一位專業的加密貨幣分析師，擅長產生繁體中文市場分析報告。"
+SUMMARY_PARAMS = {"max_tokens": 2000, "temperature": 0.7}
+# 整份 prompt 的 token 預算與市場段落可佔的比例
+PROMPT_TOKEN_BUDGET = int(os.environ.get("SUMMARY_PROMPT_TOKENS", "900"))
+MARKET_SHARE = 0.3
+# 未呼叫 OpenAI 或呼叫失敗時的預設文字：不快取，報告中也不記錄 summary_hash
+NO_API_KEY_SUMMARY = "今日摘要因未設定 OPENAI_API_KEY 而略過。"
+API_ERROR_SUMMARY = "今日摘要因 OpenAI API 錯誤而略過。請檢查 API key 額度與帳單設定。"
+FALLBACK_SUMMARIES = {NO_API_KEY_SUMMARY, API_ERROR_SUMMARY}
+
 
 def load_json(path: str) -> dict:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def build_prompt(news_data: dict, market_data: dict, signals_data: dict | None = None) -> str:
-    # 整理新聞摘要（最多取前 20 篇）
-    articles = news_data.get("articles", [])[:20]
-    news_text = "\n".join(
-        f"- [{a['source']}] {a.get('title_zh', a['title'])}" for a in articles
-    )
-
-    # 整理市場資料
-    coins = market_data.get("coins", [])
-    market_text = "\n".join(
+def format_coin(c: dict) -> str:
+    return (
         f"- {c['symbol']}: 價格=${c.get('current_price', 'N/A')}, "
         f"24h={c.get('price_change_24h', 'N/A')}%, "
         f"RSI={c.get('rsi', 'N/A')}, "
         f"訊號={c.get('signal', 'N/A')}"
-        for c in coins
-        if "error" not in c
     )
 
-    # 整理市場情緒指標
-    signals_block = ""
-    if signals_data:
-        fg = signals_data.get("fear_greed", {})
-        reddit = signals_data.get("reddit_sentiment", {})
-        onchain = signals_data.get("onchain", {})
-        parts = []
-        if fg:
-            parts.append(f"- 恐懼貪婪指數: {fg.get('value', 'N/A')}（{fg.get('classification', 'N/A')}）")
-        if reddit:
-            parts.append(
-                f"- Reddit 情緒評分: {reddit.get('sentiment_score', 'N/A')}（{reddit.get('label', 'N/A')}）"
-                f"，正面: {reddit.get('positive_count', 0)}，負面: {reddit.get('negative_count', 0)}"
-                f"，中立: {reddit.get('neutral_count', 0)}"
-            )
-        if onchain:
-            total_mc = onchain.get("total_market_cap_usd")
-            total_mc_str = f"${total_mc / 1e12:.2f}T" if total_mc else "N/A"
-            parts.append(f"- BTC 市佔率: {onchain.get('btc_dominance', 'N/A')}%")
-            parts.append(f"- 全市場總市值: {total_mc_str}")
-        if parts:
-            signals_block = "\n\n【市場情緒指標】\n" + "\n".join(parts)
-
-    return f"""你是一位專業的加密貨幣分析師，請根據以下今日資料產生一份繁體中文每日彙整報告。
-
-【今日新聞標題（共 {len(articles)} 篇）】
+
+TREND_NAMES = {"fear_greed": "恐懼貪婪指數", "reddit_sentiment": "Reddit 情緒", "news_sentiment": "新聞情緒"}
+
+
+def format_trend(series: str, stats: dict) -> str:
+    """訊號歷史的滾動統計，例如 30 日均值、z 分數、90 日百分位與目前狀態。"""
+    month = stats["windows"].get("30") or {}
+    quarter = stats["windows"].get("90") or {}
+    z = month.get("z")
+    return (f"- {TREND_NAMES.get(series, series)}趨勢: 30 日均值 {month.get('mean', 'N/A')}"
+            + (f"（今日 z 分數 {z:+.1f}）" if z is not None else "")
+            + f"，90 日百分位 {quarter.get('percentile', 'N/A')}%"
+            + f"，狀態 {stats.get('regime', 'N/A')}（自 {stats.get('regime_since', 'N/A')}）")
+
+
+def build_signals_block(signals_data: dict | None) -> str:
+    if not signals_data:
+        return ""
+    fg = signals_data.get("fear_greed", {})
+    reddit = signals_data.get("reddit_sentiment", {})
+    news_sentiment = signals_data.get("news_sentiment", {})
+    onchain = signals_data.get("onchain", {})
+    parts = []
+    if fg:
+        parts.append(f"- 恐懼貪婪指數: {fg.get('value', 'N/A')}（{fg.get('classification', 'N/A')}）")
+    if reddit:
+        parts.append(
+            f"- Reddit 情緒評分: {reddit.get('sentiment_score', 'N/A')}（{reddit.get('label', 'N/A')}）"
+            f"，正面: {reddit.get('positive_count', 0)}，負面: {reddit.get('negative_count', 0)}"
+            f"，中立: {reddit.get('neutral_count', 0)}"
+        )
+    if news_sentiment:
+        coins_text = "、".join(
+            f"{symbol} {c['sentiment_score']}" for symbol, c in list(news_sentiment.get("coins", {}).items())[:5]
+        )
+        parts.append(
+            f"- 新聞情緒評分: {news_sentiment.get('sentiment_score', 'N/A')}（{news_sentiment.get('label', 'N/A')}）"
+            + (f"，各幣: {coins_text}" if coins_text else "")
+        )
+    for series, stats in (signals_data.get("trends") or {}).items():
+        if stats.get("count", 0) > 1:
+            parts.append(format_trend(series, stats))
+    if onchain:
+        total_mc = onchain.get("total_market_cap_usd")
+        total_mc_str = f"${total_mc / 1e12:.2f}T" if total_mc else "N/A"
+        parts.append(f"- BTC 市佔率: {onchain.get('btc_dominance', 'N/A')}%")
+        parts.append(f"- 全市場總市值: {total_mc_str}")
+    if not parts:
+        return ""
+    return "\n\n【市場情緒指標】\n" + "\n".join(parts)
+
+
+PROMPT_TEMPLATE = """你是一位專業的加密貨幣分析師，請根據以下今日資料產生一份繁體中文每日彙整報告。
+
+【今日新聞（{story_count} 則事件，彙整自 {article_count} 篇報導，依重要性排序）】
 {news_text}
 
 【市場技術指標】
@@ -83,37 +126,140 @@ def build_prompt(news_data: dict, market_data: dict, signals_data: dict | None =
 請直接輸出報告內容，不要加入額外說明。"""
 
 
-def generate_summary(prompt: str) -> str:
+def build_prompt(news_data: dict, market_data: dict, signals_data: dict | None = None,
+                 budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """在 budget tokens 內組裝 prompt：固定文字與情緒指標全數保留，市場段落最多佔剩餘的 MARKET_SHARE，
+    其餘依重要性放入分群後的新聞事件。"""
+    articles = news_data.get("articles", [])
+    coins = [c for c in market_data.get("coins", []) if "error" not in c]
+    signals_block = build_signals_block(signals_data)
+
+    # 事件數與篇數以文章總數（上限）的位數計入固定文字
+    fixed = count_tokens(PROMPT_TEMPLATE.format(story_count=len(articles), article_count=len(articles),
+                                                news_text="", market_text="", signals_block=signals_block), MODEL)
+    remaining = max(budget - fixed, 0)
+
+    # 市場資料依觀察清單順序（市值）放入，未放入的幣種以一行註明，註明行也計入市場段落的預算
+    coin_lines = [format_coin(c) for c in coins]
+    market_budget = int(remaining * MARKET_SHARE)
+    listed, market_used = pack_lines(coin_lines, market_budget, MODEL)
+    if len(listed) < len(coin_lines):
+        note_cost = count_tokens(f"- （另有 {len(coin_lines)} 個幣種未列出）", MODEL) + 1
+        listed, market_used = pack_lines(coin_lines, max(market_budget - note_cost, 0), MODEL)
+    market_lines = [coin_lines[i] for i in listed]
+    if len(listed) < len(coin_lines) and market_used + note_cost <= remaining:
+        market_lines.append(f"- （另有 {len(coin_lines) - len(listed)} 個幣種未列出）")
+        market_used += count_tokens(market_lines[-1], MODEL) + 1
+
+    stories = prompt_packer.rank_stories(articles, [c["symbol"] for c in coins])
+    story_lines = [s.line() for s in stories]
+    chosen, _ = pack_lines(story_lines, remaining - market_used, MODEL)
+    covered = sum(len(stories[i].articles) for i in chosen)
+
+    prompt = PROMPT_TEMPLATE.format(
+        story_count=len(chosen),
+        article_count=covered,
+        news_text="\n".join(story_lines[i] for i in chosen),
+        market_text="\n".join(market_lines),
+        signals_block=signals_block,
+    )
+    tokens = count_tokens(prompt, MODEL)
+    print(f"Prompt {tokens} tokens（預算 {budget}）：新聞 {len(chosen)}/{len(stories)} 則事件、"
+          f"涵蓋 {covered}/{len(articles)} 篇，市場 {len(listed)}/{len(coins)} 個幣種")
+    metrics.incr("prompt.tokens", tokens)
+    metrics.incr("prompt.stories", len(chosen))
+    metrics.incr("prompt.articles_covered", covered)
+    return prompt
+
+
+def summary_messages(prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def summary_key(prompt: str) -> str:
+    """摘要的內容雜湊：prompt、模型與呼叫參數相同時必定相同，作為快取鍵並記錄在報告中。"""
+    return http_cassette.llm_key(MODEL, summary_messages(prompt), SUMMARY_PARAMS)
+
+
+def generate_summary(prompt: str, force: bool = False) -> str:
+    """產生摘要；相同輸入的摘要已在快取中時直接沿用，force=True 時一律重新呼叫 OpenAI。
+
+    只有成功的回覆會寫入快取，未設定 API key 或呼叫失敗時的預設文字不快取。
+    """
+    key = summary_key(prompt)
+    if not force:
+        with SummaryCache() as cache:
+            cached = cache.get(key)
+        if cached is not None:
+            print(f"摘要快取命中（{key[:12]}），沿用先前的摘要，略過 OpenAI 呼叫。")
+            metrics.incr("summary.cache_hit")
+            return cached
+
     api_key = os.environ.get("OPENAI_API_KEY", "")
     if not api_key:
         print("警告：未設定 OPENAI_API_KEY，跳過 AI 摘要產生。")
-        return "今日摘要因未設定 OPENAI_API_KEY 而略過。"
+        return NO_API_KEY_SUMMARY
     try:
         client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "你是一位專業的加密貨幣分析師，擅長產生繁體中文市場分析報告。"},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=2000,
-            temperature=0.7,
-        )
-        return response.choices[0].message.content.strip()
+        summary = stream_text(
+            client,
+            label="summary",
+            model=MODEL,
+            messages=summary_messages(prompt),
+            **SUMMARY_PARAMS,
+        ).strip()
     except Exception as e:
         print(f"警告：OpenAI API 呼叫失敗: {e}")
         print("將使用預設摘要文字。")
-        return "今日摘要因 OpenAI API 錯誤而略過。請檢查 API key 額度與帳單設定。"
+        return API_ERROR_SUMMARY
+    with SummaryCache() as cache:
+        cache.put(key, MODEL, summary)
+    return summary
+
+
+def build_report(news_data: dict, market_data: dict, signals_data: dict | None, force: bool = False) -> dict:
+    """由新聞、市場與訊號資料產生 AI 摘要，回傳每日報告內容。
+
+    summary_hash 為產生摘要的輸入雜湊，只在摘要為 OpenAI 的回覆（含快取）時記錄，預設文字為 None。
+    """
+    prompt = build_prompt(news_data, market_data, signals_data)
+    print("呼叫 OpenAI API ...")
+    summary = generate_summary(prompt, force=force)
+    print("摘要產生完成。")
+
+    return {
+        "date": TODAY,
+        "generated_at": datetime.now(TZ_TPE).isoformat(),
+        "summary": summary,
+        "summary_hash": None if summary in FALLBACK_SUMMARIES else summary_key(prompt),
+        "news": news_data.get("articles", []),
+        "market": market_data.get("coins", []),
+        "signals": signals_data if signals_data else {},
+    }
+
+
+def write_report(output: dict) -> None:
+    """以 headline / news 分檔、最小化並預先壓縮的格式寫出每日報告。"""
+    print_stats(write_day(output, DATA_DIR))
+    print(f"每日報告儲存至 {OUTPUT_FILE}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="產生每日 AI 摘要與報告")
+    parser.add_argument("--force", action="store_true", help="忽略摘要快取，重新呼叫 OpenAI")
+    args = parser.parse_args()
+
     print(f"開始產生每日摘要，日期: {TODAY}")
 
-    if not os.path.exists(NEWS_FILE):
-        print(f"找不到新聞檔案: {NEWS_FILE}，使用空資料。")
+    news_file = TRANSLATED_FILE if os.path.exists(TRANSLATED_FILE) else NEWS_FILE
+    if not os.path.exists(news_file):
+        print(f"找不到新聞檔案: {news_file}，使用空資料。")
         news_data = {"date": TODAY, "count": 0, "articles": []}
     else:
-        news_data = load_json(NEWS_FILE)
+        news_data = load_json(news_file)
 
     if not os.path.exists(MARKET_FILE):
         print(f"找不到市場檔案: {MARKET_FILE}，使用空資料。")
@@ -128,27 +274,10 @@ def main():
         print(f"找不到訊號檔案: {SIGNALS_FILE}，略過市場情緒指標。")
         signals_data = None
 
-    prompt = build_prompt(news_data, market_data, signals_data)
-    print("呼叫 OpenAI API ...")
-    summary = generate_summary(prompt)
-    print("摘要產生完成。")
-
-    output = {
-        "date": TODAY,
-        "generated_at": datetime.now(TZ_TPE).isoformat(),
-        "summary": summary,
-        "news": news_data.get("articles", []),
-        "market": market_data.get("coins", []),
-        "signals": signals_data if signals_data else {},
-    }
-
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
-    print(f"每日報告儲存至 {OUTPUT_FILE}")
+    write_report(build_report(news_data, market_data, signals_data, force=args.force))
 
     # 清除中間檔案
-    for path in (NEWS_FILE, MARKET_FILE, SIGNALS_FILE):
+    for path in (NEWS_FILE, TRANSLATED_FILE, MARKET_FILE, SIGNALS_FILE):
         if os.path.exists(path):
             os.remove(path)
             print(f"已刪除中間檔案: {path}")
@@ -0,0 +1,187 @@
+"""
+http_cassette.py
+所有對外 HTTP 請求共用的 session 與 cassette（錄製 / 回放）層：
+
+    HTTP_CASSETTE_MODE=off      直接連線（預設）
+    HTTP_CASSETTE_MODE=record   正常連線，並將每個回應寫入 HTTP_CASSETTE 檔案
+    HTTP_CASSETTE_MODE=replay   不連線，依序回放 cassette 中的回應；找不到紀錄時視為連線失敗
+
+requests 流量經由 CassetteAdapter；OpenAI SDK 不使用 requests，由 llm_client 以同一份
+cassette 在呼叫層錄製 / 回放完整回覆文字與 token 用量。各模式都會依主機統計請求數與傳輸量，
+並將每個請求記錄為 metrics span。
+"""
+import atexit
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import json_output
+import metrics
+
+MODE = os.environ.get("HTTP_CASSETTE_MODE", "off")
+CASSETTE_FILE = os.environ.get(
+    "HTTP_CASSETTE", os.path.join(os.path.dirname(__file__), "..", "data", "cassettes", "daily.json")
+)
+
+# 不寫入 cassette 的查詢參數（API 金鑰）；同時不參與比對，換金鑰後仍可回放
+SECRET_PARAMS = {"auth_token", "api_key", "key"}
+# 回應內容已解壓縮，這些標頭回放時不再適用
+DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+TRAFFIC: dict[str, dict] = {}
+_traffic_lock = threading.Lock()
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def count(host: str, sent: int, received: int) -> None:
+    with _traffic_lock:
+        entry = TRAFFIC.setdefault(host, {"requests": 0, "sent": 0, "received": 0})
+        entry["requests"] += 1
+        entry["sent"] += sent
+        entry["received"] += received
+
+
+def totals() -> dict:
+    """所有主機合計的請求數與傳輸位元組數。"""
+    with _traffic_lock:
+        return {k: sum(e[k] for e in TRAFFIC.values()) for k in ("requests", "sent", "received")}
+
+
+def redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(f"{method.upper()} {redact_url(url)}\n".encode("utf-8"))
+    digest.update(body or b"")
+    return digest.hexdigest()
+
+
+def llm_key(model: str, messages: list, params: dict) -> str:
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(("llm\n" + payload).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """以請求鍵對應回應序列；同一請求重複出現時依錄製順序回放，用盡後重複最後一筆。
+
+    recorded_at 為第一筆紀錄的錄製時間（UTC ISO 8601），回放依時間變化的請求時可據此固定時鐘。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cursor: dict[str, int] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.interactions = data.get("interactions", {})
+        self.recorded_at = data.get("recorded_at")
+
+    def play(self, key: str) -> dict | None:
+        with self.lock:
+            records = self.interactions.get(key)
+            if not records:
+                return None
+            i = self.cursor.get(key, 0)
+            self.cursor[key] = i + 1
+            return records[min(i, len(records) - 1)]
+
+    def record(self, key: str, entry: dict) -> None:
+        with self.lock:
+            self.recorded_at = self.recorded_at or datetime.now(timezone.utc).isoformat()
+            self.interactions.setdefault(key, []).append(entry)
+
+    def save(self) -> None:
+        with self.lock:
+            json_output.write_json(self.path, {"recorded_at": self.recorded_at, "interactions": self.interactions})
+
+
+def cassette() -> Cassette:
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_FILE)
+            if MODE == "record":
+                atexit.register(_cassette.save)
+        return _cassette
+
+
+def play(key: str) -> dict | None:
+    return cassette().play(key) if MODE == "replay" else None
+
+
+def record(key: str, entry: dict) -> None:
+    if MODE == "record":
+        cassette().record(key, entry)
+
+
+def build_response(request: requests.PreparedRequest, entry: dict) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = entry["status"]
+    resp.reason = entry.get("reason", "")
+    resp.headers = CaseInsensitiveDict(entry["headers"])
+    resp._content = base64.b64decode(entry["body"])
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.url = request.url
+    resp.request = request
+    return resp
+
+
+class CassetteAdapter(HTTPAdapter):
+    """依 MODE 直接連線、錄製或回放的 transport adapter，並統計各主機流量。"""
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url, request.body) if MODE != "off" else None
+        start = time.perf_counter()
+        if MODE == "replay":
+            entry = play(key)
+            if entry is None:
+                raise requests.ConnectionError(f"cassette 中沒有 {request.method} {redact_url(request.url)} 的紀錄")
+            resp = build_response(request, entry)
+        else:
+            resp = super().send(request, **kwargs)
+            if MODE == "record":
+                # 關閉時不組紀錄：省下每個回應內容的複製與 base64 編碼
+                record(key, {
+                    "request": f"{request.method} {redact_url(request.url)}",
+                    "status": resp.status_code,
+                    "reason": resp.reason,
+                    "headers": {k: v for k, v in resp.headers.items() if k.lower() not in DROP_HEADERS},
+                    "body": base64.b64encode(resp.content).decode("ascii"),
+                })
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        url = urlsplit(request.url)
+        count(url.netloc, len(body or b""), len(resp.content))
+        metrics.observe(f"http.{url.netloc}", time.perf_counter() - start, start,
+                        path=url.path, status=resp.status_code, bytes=len(resp.content))
+        return resp
+
+
+def session(pool_maxsize: int = 10, user_agent: str | None = None) -> requests.Session:
+    """建立經由 CassetteAdapter 的 requests.Session。"""
+    s = requests.Session()
+    if user_agent:
+        s.headers["User-Agent"] = user_agent
+    adapter = CassetteAdapter(pool_maxsize=pool_maxsize)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
@@ -0,0 +1,288 @@
+"""
+indicators.py
+多幣種技術指標引擎：輸入價格矩陣（幣種 × 天數），一次向量化計算所有幣的
+RSI（Wilder 平滑）、SMA、EMA、區間高低點與綜合訊號，以及 MACD、布林通道、
+實現波動率、ATR 式區間與最近 N 天的均線 / MACD 交叉事件。
+
+EMA 與 Wilder 平滑皆為線性遞迴濾波器，最終值可展開成固定權重向量與價格的內積，
+因此整個矩陣只需一次矩陣乘法，不必逐元素以 Python 迴圈遞推；需要多個時間點的路徑時
+（MACD 線與訊號線、交叉偵測）則沿時間軸遞推一次，每一步同時更新所有幣種。
+
+各指標以 @register 宣告輸出欄位與所需最少天數，compute_matrix 對每個批次建立一個
+Context，指標間共用的中間結果（漲跌、EMA 路徑、MACD 線）只計算一次，新增指標不會
+多一次完整掃描。
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+RSI_PERIOD = 14
+SMA_PERIODS = (7, 20)
+EMA_PERIODS = (12, 26)
+MACD_PERIODS = (12, 26, 9)     # 快線、慢線、訊號線
+BOLLINGER_PERIOD = 20
+BOLLINGER_STDDEV = 2.0
+VOLATILITY_DAYS = 30           # 實現波動率使用的報酬天數（年化，% 表示）
+ATR_PERIOD = 14
+CROSS_DAYS = 7                 # 偵測最近幾天內的交叉事件
+LOOKBACK_DAYS = 90             # 呼叫端建議提供的最長序列長度（MACD 等 EMA 類指標需較長暖機）
+
+
+def ema_weights(length: int, period: int) -> np.ndarray:
+    """以第一筆價格為種子、長度 length 的 EMA 最終值權重。"""
+    k = 2.0 / (period + 1)
+    decay = (1 - k) ** np.arange(length - 1, -1, -1, dtype=float)
+    weights = k * decay
+    weights[0] = decay[0]
+    return weights
+
+
+def wilder_weights(length: int, period: int) -> np.ndarray:
+    """長度 length 的漲跌序列經 Wilder 平滑（前 period 筆取平均為種子）後的最終值權重。"""
+    a = (period - 1) / period
+    weights = np.empty(length, dtype=float)
+    weights[:period] = a ** (length - period) / period
+    weights[period:] = a ** np.arange(length - period - 1, -1, -1, dtype=float) / period
+    return weights
+
+
+def rsi(matrix: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """每列的最新 RSI；天數不足 period + 1 時回傳全 NaN。"""
+    n_coins, n_days = matrix.shape
+    if n_days < period + 1:
+        return np.full(n_coins, np.nan)
+    deltas = np.diff(matrix, axis=1)
+    weights = wilder_weights(deltas.shape[1], period)
+    avg_gain = np.clip(deltas, 0, None) @ weights
+    avg_loss = np.clip(-deltas, 0, None) @ weights
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, values)
+
+
+def sma(matrix: np.ndarray, period: int) -> np.ndarray:
+    if matrix.shape[1] < period:
+        return np.full(matrix.shape[0], np.nan)
+    return matrix[:, -period:].mean(axis=1)
+
+
+def ema(matrix: np.ndarray, period: int) -> np.ndarray:
+    if matrix.shape[1] < period:
+        return np.full(matrix.shape[0], np.nan)
+    return matrix @ ema_weights(matrix.shape[1], period)
+
+
+def signals(rsi_values: np.ndarray, fast: np.ndarray, slow: np.ndarray) -> list[str]:
+    """綜合訊號：RSI 超買/超賣與均線多空排列（沿用原逐幣版 determine_signal 的規則）。"""
+    has_ma = ~(np.isnan(fast) | np.isnan(slow))
+    rsi_part = np.select([rsi_values >= 70, rsi_values <= 30], ["RSI超買", "RSI超賣"], "")
+    ma_part = np.select([has_ma & (fast > slow), has_ma & (fast < slow)], ["均線多頭", "均線空頭"], "")
+    result = []
+    for r, r_label, m_label in zip(rsi_values, rsi_part, ma_part):
+        if np.isnan(r):
+            result.append("觀望")
+            continue
+        labels = [s for s in (str(r_label), str(m_label)) if s]
+        result.append(" / ".join(labels) if labels else "中性")
+    return result
+
+
+def _rounded(values: np.ndarray, digits: int) -> list:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def ema_path(matrix: np.ndarray, period: int, steps: int) -> np.ndarray:
+    """每列最後 steps 個時間點的 EMA（以第一筆價格為種子），shape 為 (幣種數, steps)。
+
+    沿時間軸遞推一次，每一步對所有幣種同時更新，O(幣種數 × 天數)。
+    """
+    n_coins, length = matrix.shape
+    k = 2.0 / (period + 1)
+    start = length - steps
+    result = np.empty((n_coins, steps))
+    value = matrix[:, 0].astype(float)
+    if start == 0:
+        result[:, 0] = value
+    for t in range(1, length):
+        value = matrix[:, t] * k + value * (1 - k)
+        if t >= start:
+            result[:, t - start] = value
+    return result
+
+
+def sma_path(matrix: np.ndarray, period: int, steps: int) -> np.ndarray:
+    """每列最後 steps 個時間點的 SMA；天數不足的時間點為 NaN。"""
+    n_coins, length = matrix.shape
+    sums = np.concatenate([np.zeros((n_coins, 1)), np.cumsum(matrix, axis=1)], axis=1)
+    result = np.full((n_coins, steps), np.nan)
+    for j in range(steps):
+        end = length - steps + j + 1
+        if end >= period:
+            result[:, j] = (sums[:, end] - sums[:, end - period]) / period
+    return result
+
+
+def crossings(fast: np.ndarray, slow: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """fast 由下往上 / 由上往下穿越 slow 的位置，shape 為 (幣種數, steps - 1)。"""
+    diff = fast - slow
+    prev, cur = diff[:, :-1], diff[:, 1:]
+    return (prev <= 0) & (cur > 0), (prev >= 0) & (cur < 0)
+
+
+class Context:
+    """一個批次（等長價格矩陣）的共用中間結果，同一批次內各指標共用、只計算一次。"""
+
+    def __init__(self, matrix: np.ndarray, core_days: int | None = None):
+        self.matrix = matrix
+        # core 指標（high_30d、RSI、SMA、EMA）維持只看最近 core_days 天，與既有輸出一致
+        self.core = matrix[:, -core_days:] if core_days else matrix
+        self.length = matrix.shape[1]
+        self._cache: dict = {}
+
+    def memo(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    @property
+    def deltas(self) -> np.ndarray:
+        return self.memo("deltas", lambda: np.diff(self.matrix, axis=1))
+
+    def ema_path(self, period: int, steps: int) -> np.ndarray:
+        return self.memo(("ema_path", period, steps), lambda: ema_path(self.matrix, period, steps))
+
+    def macd_line(self) -> np.ndarray:
+        """自慢線 EMA 暖機完成起的 MACD 線路徑。"""
+        fast, slow, _ = MACD_PERIODS
+        steps = self.length - slow + 1
+        return self.memo("macd_line", lambda: self.ema_path(fast, steps) - self.ema_path(slow, steps))
+
+
+@dataclass(frozen=True)
+class Indicator:
+    name: str
+    fields: tuple
+    min_days: int
+    func: Callable[[Context], dict]
+
+
+REGISTRY: dict[str, Indicator] = {}
+
+
+def register(name: str, fields: tuple, min_days: int = 1):
+    """登記一個指標：func(ctx) 回傳 {欄位: 每列的值}；序列短於 min_days 時欄位為 None。"""
+    def decorator(func):
+        REGISTRY[name] = Indicator(name, fields, min_days, func)
+        return func
+    return decorator
+
+
+def fields() -> list[str]:
+    return [f for indicator in REGISTRY.values() for f in indicator.fields]
+
+
+@register("core", ("high_30d", "low_30d", "rsi", "sma7", "sma20", "ema12", "ema26", "signal"))
+def core(ctx: Context) -> dict:
+    matrix = ctx.core
+    smas = {p: sma(matrix, p) for p in SMA_PERIODS}
+    emas = {p: ema(matrix, p) for p in EMA_PERIODS}
+    columns = {
+        "high_30d": _rounded(matrix.max(axis=1), 6),
+        "low_30d": _rounded(matrix.min(axis=1), 6),
+        "rsi": _rounded(rsi(matrix), 2),
+        **{f"sma{p}": _rounded(v, 6) for p, v in smas.items()},
+        **{f"ema{p}": _rounded(v, 6) for p, v in emas.items()},
+    }
+    # 與原逐幣版相同，以四捨五入後的數值判斷
+    rounded = {k: np.array([np.nan if v is None else v for v in vals]) for k, vals in columns.items()}
+    columns["signal"] = signals(rounded["rsi"], rounded["sma7"], rounded["sma20"])
+    return columns
+
+
+@register("macd", ("macd", "macd_signal", "macd_hist"), min_days=MACD_PERIODS[1] + MACD_PERIODS[2] - 1)
+def macd(ctx: Context) -> dict:
+    line = ctx.macd_line()
+    signal_line = line @ ema_weights(line.shape[1], MACD_PERIODS[2])
+    return {
+        "macd": _rounded(line[:, -1], 6),
+        "macd_signal": _rounded(signal_line, 6),
+        "macd_hist": _rounded(line[:, -1] - signal_line, 6),
+    }
+
+
+@register("bollinger", ("bb_upper", "bb_middle", "bb_lower", "bb_width"), min_days=BOLLINGER_PERIOD)
+def bollinger(ctx: Context) -> dict:
+    window = ctx.matrix[:, -BOLLINGER_PERIOD:]
+    middle = window.mean(axis=1)
+    band = BOLLINGER_STDDEV * window.std(axis=1)
+    return {
+        "bb_upper": _rounded(middle + band, 6),
+        "bb_middle": _rounded(middle, 6),
+        "bb_lower": _rounded(middle - band, 6),
+        "bb_width": _rounded(2 * band / middle * 100, 2),  # 通道寬度佔中線的百分比
+    }
+
+
+@register("volatility", ("volatility_30d",), min_days=VOLATILITY_DAYS + 1)
+def volatility(ctx: Context) -> dict:
+    """最近 VOLATILITY_DAYS 日對數報酬的樣本標準差，年化（√365）後以百分比表示。"""
+    returns = np.diff(np.log(ctx.matrix[:, -(VOLATILITY_DAYS + 1):]), axis=1)
+    return {"volatility_30d": _rounded(returns.std(axis=1, ddof=1) * np.sqrt(365) * 100, 2)}
+
+
+@register("atr", ("atr14", "atr14_pct"), min_days=ATR_PERIOD + 1)
+def atr(ctx: Context) -> dict:
+    """只有收盤價，真實區間以相鄰收盤價的絕對變動近似，再以 Wilder 平滑。"""
+    ranges = np.abs(ctx.deltas)
+    value = ranges @ wilder_weights(ranges.shape[1], ATR_PERIOD)
+    return {"atr14": _rounded(value, 6), "atr14_pct": _rounded(value / ctx.matrix[:, -1] * 100, 2)}
+
+
+@register("crossovers", ("crossovers",), min_days=SMA_PERIODS[1] + CROSS_DAYS)
+def crossovers(ctx: Context) -> dict:
+    """最近 CROSS_DAYS 天內的 SMA7/SMA20 與 MACD/訊號線交叉，days_ago 0 為最新一個點。"""
+    steps = CROSS_DAYS + 1
+    pairs = [("golden_cross", "death_cross",
+              sma_path(ctx.matrix, SMA_PERIODS[0], steps), sma_path(ctx.matrix, SMA_PERIODS[1], steps))]
+    if ctx.length >= REGISTRY["macd"].min_days:
+        line = ctx.macd_line()
+        pairs.append(("macd_bullish", "macd_bearish", line[:, -steps:], ema_path(line, MACD_PERIODS[2], steps)))
+
+    events: list[list] = [[] for _ in range(ctx.matrix.shape[0])]
+    for up_name, down_name, fast, slow in pairs:
+        up, down = crossings(fast, slow)
+        for name, hits in ((up_name, up), (down_name, down)):
+            for row, col in zip(*np.nonzero(hits)):
+                events[row].append({"type": name, "days_ago": int(steps - 2 - col)})
+    return {"crossovers": [sorted(e, key=lambda x: (x["days_ago"], x["type"])) for e in events]}
+
+
+def compute_matrix(matrix: np.ndarray, core_days: int | None = None) -> list[dict]:
+    """計算等長價格矩陣中每一列的所有已登記指標，回傳與 fetch_market 輸出欄位相同的 dict 串列。
+
+    core_days 限制 core 指標只使用最近幾天；其餘指標使用完整序列。
+    """
+    ctx = Context(np.asarray(matrix, dtype=float), core_days)
+    n_coins = ctx.matrix.shape[0]
+    columns: dict = {}
+    for indicator in REGISTRY.values():
+        if ctx.length < indicator.min_days:
+            columns.update({f: [None] * n_coins for f in indicator.fields})
+        else:
+            columns.update(indicator.func(ctx))
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+
+def compute_all(series: list[list[float]], core_days: int | None = None) -> list[dict | None]:
+    """計算多條價格序列的指標；長度相同的序列合併成同一個矩陣批次計算，空序列回傳 None。"""
+    results: list[dict | None] = [None] * len(series)
+    groups: dict[int, list[int]] = {}
+    for i, prices in enumerate(series):
+        if len(prices):
+            groups.setdefault(len(prices), []).append(i)
+    for indexes in groups.values():
+        rows = compute_matrix(np.array([series[i] for i in indexes], dtype=float), core_days)
+        for i, row in zip(indexes, rows):
+            results[i] = row
+    return results
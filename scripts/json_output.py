@@ -0,0 +1,156 @@
+"""
+json_output.py
+所有輸出檔共用的寫入層：內容先寫到同目錄的暫存檔，flush + fsync 後以 os.replace 原子替換。
+寫到一半中斷時原檔維持完整，下一階段與 docs/app.js 不會讀到截斷的 JSON。
+
+- 頂層 dict 中的陣列（articles、news…）逐 CHUNK_ITEMS 個元素編碼後寫出，
+  不必先在記憶體中組出整份 JSON 字串，記憶體峰值與文章數無關
+- compact=True 輸出最小化 JSON；否則為 indent=2 的可讀格式（中間檔），兩者皆與 json.dumps 的排版一致
+- 安裝 orjson（選用套件）時以 orjson 編碼，否則使用標準 json
+- compress=True 時同一份輸出同時串流進 .gz 與 .br 壓縮器（本機未安裝 brotli 時只產生 .gz），檔案一起原子替換
+
+    with json_output.atomic_write(path) as f:
+        f.write(raw)
+    json_output.write_json(path, {"date": ..., "articles": [...]}, compact=False)
+"""
+import contextlib
+import json
+import os
+import threading
+import zlib
+from typing import Iterator
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用套件，未安裝時使用標準 json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 列於 requirements.txt；本機未安裝時只產生 .gz
+    brotli = None
+
+CHUNK_ITEMS = 500          # 陣列每次編碼並寫出的元素數
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def _fsync_dir(directory: str) -> None:
+    """讓 rename 本身也落盤；不支援開啟目錄的平台（Windows）略過。"""
+    with contextlib.suppress(OSError):
+        fd = os.open(directory or ".", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_write(path: str):
+    """以二進位模式寫入 path 的暫存檔；區塊正常結束時 fsync 並原子替換，發生例外時刪除暫存檔、原檔不變。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    f = open(tmp, "wb")
+    try:
+        yield f
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(tmp, path)
+    except BaseException:
+        f.close()
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+    _fsync_dir(directory)
+
+
+def dumps(data, compact: bool = True) -> bytes:
+    """編碼單一值；orjson 無法處理的值（超過 64-bit 的整數等）退回標準 json。"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | (0 if compact else orjson.OPT_INDENT_2))
+        except TypeError:
+            pass
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _indented(raw: bytes, depth: int) -> bytes:
+    """將 indent=2 編碼的值縮排到第 depth 層（第一行不縮排）。"""
+    return raw.replace(b"\n", b"\n" + b"  " * depth)
+
+
+def iter_json(data, compact: bool = True) -> Iterator[bytes]:
+    """依序產生 data 的 JSON 片段；頂層 dict 中的陣列每 CHUNK_ITEMS 個元素產生一段。"""
+    if not isinstance(data, dict) or not data:
+        yield dumps(data, compact)
+        return
+    if compact:
+        open_, sep, colon, close_ = b"{", b",", b":", b"}"
+        item_open, item_sep, item_close = b"[", b",", b"]"
+    else:
+        open_, sep, colon, close_ = b"{\n  ", b",\n  ", b": ", b"\n}"
+        item_open, item_sep, item_close = b"[\n    ", b",\n    ", b"\n  ]"
+    yield open_
+    for n, (key, value) in enumerate(data.items()):
+        prefix = (sep if n else b"") + dumps(str(key)) + colon
+        if not isinstance(value, list) or not value:
+            yield prefix + (dumps(value) if compact else _indented(dumps(value, False), 1))
+            continue
+        yield prefix + item_open
+        for start in range(0, len(value), CHUNK_ITEMS):
+            # 整段一次編碼後去掉外層括號，比逐元素呼叫編碼器快
+            encoded = dumps(value[start:start + CHUNK_ITEMS], compact)
+            encoded = encoded[1:-1] if compact else _indented(encoded[4:-2], 1)
+            yield (item_sep if start else b"") + encoded
+        yield item_close
+    yield close_
+
+
+class _Compressors:
+    """與原始輸出同步寫入 .gz / .br 的串流壓縮器。"""
+
+    def __init__(self, path: str, stack: contextlib.ExitStack):
+        self.targets = [("gz", stack.enter_context(atomic_write(path + ".gz")),
+                         zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31))]   # wbits=31：gzip 格式、mtime 0
+        if brotli is not None:
+            self.targets.append(("br", stack.enter_context(atomic_write(path + ".br")),
+                                 brotli.Compressor(quality=BROTLI_QUALITY)))
+        self.sizes = {kind: 0 for kind, _, _ in self.targets}
+
+    def write(self, raw: bytes) -> None:
+        for kind, f, compressor in self.targets:
+            out = compressor.compress(raw) if kind == "gz" else compressor.process(raw)
+            self.sizes[kind] += f.write(out)
+
+    def finish(self) -> None:
+        for kind, f, compressor in self.targets:
+            self.sizes[kind] += f.write(compressor.flush() if kind == "gz" else compressor.finish())
+
+
+def write_chunks(path: str, chunks, compress: bool = False) -> dict:
+    """將 bytes 片段原子寫出到 path（compress=True 時另寫 .gz / .br），回傳各檔案的大小。"""
+    with contextlib.ExitStack() as stack:
+        f = stack.enter_context(atomic_write(path))
+        compressors = _Compressors(path, stack) if compress else None
+        size = 0
+        for raw in chunks:
+            size += f.write(raw)
+            if compressors:
+                compressors.write(raw)
+        if compressors:
+            compressors.finish()
+    return {"json": size, **(compressors.sizes if compressors else {})}
+
+
+def write_bytes(path: str, raw: bytes, compress: bool = False) -> dict:
+    return write_chunks(path, [raw], compress)
+
+
+def write_json(path: str, data, compact: bool = True, compress: bool = False) -> dict:
+    """串流編碼 data 並原子寫出，回傳各檔案的大小。"""
+    return write_chunks(path, iter_json(data, compact), compress)
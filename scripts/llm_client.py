@@ -0,0 +1,233 @@
+"""
+llm_client.py
+translate_news 與 generate_summary 共用的 OpenAI 串流呼叫封裝：
+- 串流接收 completion，JSON 陣列元素一完成就解析並回呼，不必等整段回覆結束
+- 依 schema 驗證每個元素，格式錯誤的元素標記為 None，回覆不是 JSON 陣列時提早中止
+- 記錄每次呼叫的延遲、首 token 時間（TTFT）與 token 用量
+- 經由 http_cassette 錄製 / 回放完整回覆，離線 benchmark 不需連線 OpenAI
+"""
+import json
+import time
+from dataclasses import asdict, dataclass
+
+import http_cassette
+import metrics
+
+# 回覆開頭超過此長度仍找不到 '[' 時視為格式錯誤，提早中止串流
+MAX_PREAMBLE_CHARS = 40
+
+
+@dataclass
+class CallStats:
+    label: str
+    model: str
+    latency: float = 0.0
+    ttft: float | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    items: int = 0
+    invalid_items: int = 0
+
+
+CALL_LOG: list[CallStats] = []
+
+
+def log_stats(stats: CallStats) -> None:
+    CALL_LOG.append(stats)
+    metrics.observe(f"llm.{stats.label.split()[0]}", stats.latency, label=stats.label, ttft=stats.ttft,
+                    prompt_tokens=stats.prompt_tokens, completion_tokens=stats.completion_tokens,
+                    items=stats.items, invalid_items=stats.invalid_items)
+    metrics.incr("llm.prompt_tokens", stats.prompt_tokens or 0)
+    metrics.incr("llm.completion_tokens", stats.completion_tokens or 0)
+    ttft = f"{stats.ttft:.2f}s" if stats.ttft is not None else "N/A"
+    print(
+        f"[LLM] {stats.label}: 延遲 {stats.latency:.2f}s，首 token {ttft}，"
+        f"tokens {stats.prompt_tokens}+{stats.completion_tokens}"
+        + (f"，元素 {stats.items}（無效 {stats.invalid_items}）" if stats.items else "")
+    )
+
+
+def call_log() -> list[dict]:
+    return [asdict(s) for s in CALL_LOG]
+
+
+def validate_item(item, schema: dict) -> bool:
+    """schema 為 {欄位: 型別}；所有欄位都必須存在且型別正確，字串不可為空。"""
+    if not isinstance(item, dict):
+        return False
+    for key, expected in schema.items():
+        value = item.get(key)
+        if not isinstance(value, expected) or (expected is str and not value.strip()):
+            return False
+    return True
+
+
+class JSONArrayStreamParser:
+    """增量解析串流中的 JSON 陣列，每完成一個元素就回傳。
+
+    陣列前的文字（例如 ```json 圍欄）會被略過；陣列結束後的內容忽略。
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.decoder = json.JSONDecoder()
+
+    def feed(self, text: str) -> list:
+        self.buffer += text
+        items = []
+        if not self.started:
+            start = self.buffer.find("[")
+            if start < 0:
+                if len(self.buffer.strip().lstrip("`").removeprefix("json")) > MAX_PREAMBLE_CHARS:
+                    raise ValueError("回覆不是 JSON 陣列")
+                return items
+            self.started = True
+            self.pos = start + 1
+        while not self.finished:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n,":
+                self.pos += 1
+            if self.pos >= len(self.buffer):
+                break
+            if self.buffer[self.pos] == "]":
+                self.finished = True
+                break
+            try:
+                item, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                break  # 元素尚未完整，等待更多內容
+            items.append(item)
+            self.pos = end
+        return items
+
+    def close(self) -> None:
+        if not self.started:
+            raise ValueError("回覆不是 JSON 陣列")
+
+
+def _usage(stats: CallStats, chunk) -> None:
+    usage = getattr(chunk, "usage", None)
+    if usage:
+        stats.prompt_tokens = usage.prompt_tokens
+        stats.completion_tokens = usage.completion_tokens
+
+
+def _delta(chunk) -> str:
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def _replay(key: str, stats: CallStats) -> str:
+    """回放模式下取出錄製的回覆文字並套用當時的 token 用量。"""
+    entry = http_cassette.play(key)
+    if entry is None:
+        raise ConnectionError(f"cassette 中沒有 {stats.label} 呼叫的紀錄")
+    stats.prompt_tokens, stats.completion_tokens = entry["usage"]
+    return entry["text"]
+
+
+def _record(key: str, stats: CallStats, parts: list, messages: list) -> None:
+    """錄製完整回覆（包含中途中止的部分回覆），並計入 OpenAI 流量統計；連線失敗時不記錄。"""
+    if not parts and stats.completion_tokens is None:
+        return
+    text = "".join(parts)
+    http_cassette.record(key, {
+        "request": f"LLM {stats.label}",
+        "text": text,
+        "usage": [stats.prompt_tokens, stats.completion_tokens],
+    })
+    sent = len(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+    http_cassette.count("openai", sent, len(text.encode("utf-8")))
+
+
+async def _astream(client, key: str, stats: CallStats, model: str, messages: list, params: dict):
+    if http_cassette.MODE == "replay":
+        yield _replay(key, stats)
+        return
+    stream = await client.chat.completions.create(
+        model=model, messages=messages, stream=True,
+        stream_options={"include_usage": True}, **params,
+    )
+    async for chunk in stream:
+        _usage(stats, chunk)
+        text = _delta(chunk)
+        if text:
+            yield text
+
+
+def _stream(client, key: str, stats: CallStats, model: str, messages: list, params: dict):
+    if http_cassette.MODE == "replay":
+        yield _replay(key, stats)
+        return
+    stream = client.chat.completions.create(
+        model=model, messages=messages, stream=True,
+        stream_options={"include_usage": True}, **params,
+    )
+    for chunk in stream:
+        _usage(stats, chunk)
+        text = _delta(chunk)
+        if text:
+            yield text
+
+
+async def stream_json_array(client, *, label: str, model: str, messages: list, schema: dict,
+                            on_item=None, **params) -> list:
+    """以 AsyncOpenAI 串流呼叫並逐一解析 JSON 陣列元素，每個有效元素完成時以 on_item(位置, 元素) 回呼。
+
+    回傳元素串列，不符合 schema 的元素為 None；已收到元素後串流中斷時回傳已完成的部分，
+    尚未收到任何元素即失敗時拋出原本的例外。回覆不是 JSON 陣列時拋出 ValueError。
+    """
+    stats = CallStats(label=label, model=model)
+    key = http_cassette.llm_key(model, messages, params)
+    parser = JSONArrayStreamParser()
+    items = []
+    parts = []
+    start = time.perf_counter()
+    try:
+        async for text in _astream(client, key, stats, model, messages, params):
+            if stats.ttft is None:
+                stats.ttft = time.perf_counter() - start
+            parts.append(text)
+            for item in parser.feed(text):
+                valid = validate_item(item, schema)
+                items.append(item if valid else None)
+                stats.invalid_items += int(not valid)
+                if valid and on_item:
+                    on_item(len(items) - 1, item)
+        parser.close()
+    except ValueError:
+        raise
+    except Exception as e:
+        if not items:
+            raise
+        metrics.incr("llm.stream_interrupted")
+        print(f"警告：{label} 串流中斷（{e}），保留已完成的 {len(items)} 個元素")
+    finally:
+        stats.latency = time.perf_counter() - start
+        stats.items = len(items)
+        _record(key, stats, parts, messages)
+        log_stats(stats)
+    return items
+
+
+def stream_text(client, *, label: str, model: str, messages: list, on_delta=None, **params) -> str:
+    """以同步 OpenAI client 串流取得完整文字回覆，可透過 on_delta 即時處理每段內容。"""
+    stats = CallStats(label=label, model=model)
+    key = http_cassette.llm_key(model, messages, params)
+    parts = []
+    start = time.perf_counter()
+    try:
+        for text in _stream(client, key, stats, model, messages, params):
+            if stats.ttft is None:
+                stats.ttft = time.perf_counter() - start
+            parts.append(text)
+            if on_delta:
+                on_delta(text)
+    finally:
+        stats.latency = time.perf_counter() - start
+        _record(key, stats, parts, messages)
+        log_stats(stats)
+    return "".join(parts)
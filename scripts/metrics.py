@@ -0,0 +1,164 @@
+"""
+metrics.py
+輕量的執行期量測：計時 span、計數器與等待時間，供每日流程輸出 {date}_metrics.json（彙總）
+與 data/traces/{date}.json（每筆 span 明細與 profiling 結果，不提交）。
+
+    with metrics.span("http.api.coingecko.com", path="/coins/markets"):
+        ...
+    metrics.incr("coingecko.429")
+    metrics.slept("rate_limit", waited)
+
+span 依名稱彙總次數 / 總耗時 / 最大耗時，並保留每筆紀錄（相對開始時間、執行緒、屬性），
+名稱以 "sleep." 開頭者計入等待時間，其餘視為工作時間。
+
+選用的 profiling（以環境變數開啟）：
+    DIGEST_CPROFILE=1      以 cProfile 記錄整次執行，寫出 data/profiles/{date}.prof 並附上耗時前 N 的函式
+    DIGEST_TRACEMALLOC=1   以 tracemalloc 記錄記憶體峰值與配置量前 N 的程式位置
+"""
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import json_output
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "profiles")
+TRACE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "traces")
+CPROFILE = os.environ.get("DIGEST_CPROFILE", "") == "1"
+TRACEMALLOC = os.environ.get("DIGEST_TRACEMALLOC", "") == "1"
+PROFILE_TOP = 20
+
+_lock = threading.Lock()
+_started = time.perf_counter()
+COUNTERS: dict[str, float] = {}
+TIMERS: dict[str, dict] = {}
+SPANS: list[dict] = []
+PROFILES: dict = {}
+
+
+def reset() -> None:
+    global _started
+    with _lock:
+        _started = time.perf_counter()
+        COUNTERS.clear()
+        TIMERS.clear()
+        SPANS.clear()
+        PROFILES.clear()
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        COUNTERS[name] = COUNTERS.get(name, 0) + value
+
+
+def observe(name: str, seconds: float, start: float | None = None, **attrs) -> None:
+    """記錄一筆已完成的耗時；start 為 perf_counter 起點，未提供時以結束時間回推。"""
+    end = time.perf_counter()
+    if start is None:
+        start = end - seconds
+    with _lock:
+        timer = TIMERS.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        timer["count"] += 1
+        timer["total"] += seconds
+        timer["max"] = max(timer["max"], seconds)
+        SPANS.append({
+            "name": name,
+            "start": round(start - _started, 4),
+            "duration": round(seconds, 4),
+            "thread": threading.current_thread().name,
+            **attrs,
+        })
+
+
+def slept(reason: str, seconds: float) -> None:
+    """記錄為了限速或退避而等待的時間。"""
+    if seconds > 0:
+        observe(f"sleep.{reason}", seconds)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """計時區塊；as 取得的 dict 可在區塊內補上結束時才知道的屬性（例如寫出的位元組數）。"""
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, start, **attrs)
+
+
+def _top_functions(profiler: cProfile.Profile) -> list[dict]:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:PROFILE_TOP]
+    return [
+        {"function": f"{os.path.basename(file)}:{line}({func})", "calls": nc, "cumulative": round(ct, 4)}
+        for (file, line, func), (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+@contextlib.contextmanager
+def profiling(label: str):
+    """依環境變數啟用 cProfile / tracemalloc，結果併入 metrics 檔。"""
+    profiler = cProfile.Profile() if CPROFILE else None
+    if TRACEMALLOC:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{label}.prof")
+            profiler.dump_stats(path)
+            PROFILES["cprofile"] = {"file": os.path.relpath(path), "top": _top_functions(profiler)}
+        if TRACEMALLOC:
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP]
+            tracemalloc.stop()
+            PROFILES["tracemalloc"] = {
+                "current_mb": round(current / 1024 / 1024, 2),
+                "peak_mb": round(peak / 1024 / 1024, 2),
+                "top": [{"location": str(s.traceback[0]), "kb": round(s.size / 1024, 1), "count": s.count}
+                        for s in top],
+            }
+
+
+def snapshot(**extra) -> dict:
+    """彙總目前所有量測；sleep_seconds 為各執行緒等待時間總和，可能大於牆鐘時間。"""
+    with _lock:
+        wall = time.perf_counter() - _started
+        timers = {k: {**v, "total": round(v["total"], 4), "max": round(v["max"], 4)} for k, v in TIMERS.items()}
+        sleep = sum(v["total"] for k, v in TIMERS.items() if k.startswith("sleep."))
+        return {
+            "wall_seconds": round(wall, 3),
+            "sleep_seconds": round(sleep, 3),
+            "sleep_by_reason": {k[len("sleep."):]: v["total"] for k, v in timers.items() if k.startswith("sleep.")},
+            "counters": dict(COUNTERS),
+            "timers": dict(sorted(timers.items())),
+            "spans": sorted(SPANS, key=lambda s: s["start"]),
+            **({"profiles": dict(PROFILES)} if PROFILES else {}),
+            **extra,
+        }
+
+
+def write(path: str, trace_path: str | None = None, **extra) -> dict:
+    """path 只寫出彙總（各名稱的次數 / 耗時、計數器、等待時間）；每筆 span 與 profiling 結果
+    寫到 trace_path（未提供時不寫出）。回傳完整的 snapshot。"""
+    data = snapshot(**extra)
+    summary = {k: v for k, v in data.items() if k not in ("spans", "profiles")}
+    summary["span_count"] = len(data["spans"])
+    json_output.write_json(path, summary)
+    if trace_path:
+        json_output.write_json(trace_path, {"date": extra.get("date"), "spans": data["spans"],
+                                            **({"profiles": data["profiles"]} if "profiles" in data else {})})
+    print(f"[metrics] 牆鐘 {data['wall_seconds']:.1f}s，等待 {data['sleep_seconds']:.1f}s，"
+          f"{len(data['spans'])} 個 span，寫入 {path}" + (f"（span 明細 {trace_path}）" if trace_path else ""))
+    return data
@@ -0,0 +1,159 @@
+"""
+news_dedup.py
+跨來源新聞去重：正規化 URL、標題精確雜湊、SimHash 近似重複偵測（提及的幣種與數字須相同），
+並保留近幾日已出現文章的持久索引，避免同一則新聞跨日重複出現。
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import json_output
+
+INDEX_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "news_index.json")
+# 幣種名稱與代號和情緒詞庫共用同一份設定（names / tickers 兩段）
+COINS_FILE = os.environ.get(
+    "SENTIMENT_LEXICON", os.path.join(os.path.dirname(__file__), "..", "config", "sentiment_lexicon.json")
+)
+INDEX_DAYS = 3           # 索引保留天數
+SIMHASH_BITS = 64
+# 標題多一兩個字（"a"、"network"、"| CoinDesk"）時漢明距離約 6-7；只換一個詞的不同新聞
+# （Coinbase / Binance、approves / rejects）約 11 起，換幣種或數字的可能低到 8，另以 anchors 排除
+MAX_HAMMING = 7
+
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "source", "mc_cid", "mc_eid", "cmpid"}
+# 轉貼來源排在後面，重複時優先保留原始媒體的文章
+SOURCE_PRIORITY = {"CryptoPanic": 1}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+COIN_TOKEN_RE = re.compile(r"\$?[A-Za-z0-9]+(?:'[A-Za-z]+)?")   # 與 sentiment 的切詞相同（含 $代號、所有格）
+
+_coin_aliases: tuple[dict, frozenset] | None = None
+
+
+def coin_aliases() -> tuple[dict, frozenset]:
+    """設定檔中的幣種：({小寫名稱: 代號}, 代號集合)。名稱不分大小寫，代號需全大寫或加 $ 前綴。"""
+    global _coin_aliases
+    if _coin_aliases is None:
+        with open(COINS_FILE, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        names = {name.lower(): symbol.upper() for name, symbol in config.get("names", {}).items()}
+        _coin_aliases = names, frozenset(t.upper() for t in config.get("tickers", []))
+    return _coin_aliases
+
+
+def normalize_url(url: str) -> str:
+    """去除協定、www、追蹤參數、fragment 與結尾斜線，讓同一篇文章的不同連結對應到同一個鍵。"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def title_tokens(title: str) -> list[str]:
+    return WORD_RE.findall(title.lower())
+
+
+def title_hash(title: str) -> str:
+    return hashlib.blake2b(" ".join(title_tokens(title)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def anchors(title: str) -> str:
+    """標題中提及的幣種代號與數字，例如 "BTC|60k"；近似重複的兩篇必須完全相同。"""
+    names, tickers = coin_aliases()
+    coins = set()
+    for token in COIN_TOKEN_RE.findall(title.replace("’", "'").replace("-", " ")):
+        word = token.lower().removeprefix("$")
+        if word in names:
+            coins.add(names[word])
+        elif word.upper() in tickers and (token.startswith("$") or token.isupper()):
+            coins.add(word.upper())
+    coins = sorted(coins)
+    numbers = sorted({t for t in title_tokens(title) if any(c.isdigit() for c in t)})
+    return " ".join(coins) + "|" + " ".join(numbers)
+
+
+def simhash(title: str) -> int:
+    """以單字與相鄰雙字為特徵的 64-bit SimHash。"""
+    tokens = title_tokens(title)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+class DedupIndex:
+    """URL 鍵、標題雜湊集合與依 anchors 分組的 SimHash；每日文章僅數百篇，近似比對直接以 popcount 掃描即可。"""
+
+    def __init__(self):
+        self.urls: set[str] = set()
+        self.titles: set[str] = set()
+        self.simhashes: dict[str, list[int]] = {}
+
+    def add(self, url_key: str, t_hash: str, s_hash: int, anchor: str | None) -> None:
+        if url_key:
+            self.urls.add(url_key)
+        self.titles.add(t_hash)
+        # 舊索引紀錄沒有 anchors，只以 URL 與標題雜湊比對
+        if anchor is not None:
+            self.simhashes.setdefault(anchor, []).append(s_hash)
+
+    def contains(self, url_key: str, t_hash: str, s_hash: int, anchor: str) -> bool:
+        if url_key and url_key in self.urls:
+            return True
+        if t_hash in self.titles:
+            return True
+        return any((s_hash ^ other).bit_count() <= MAX_HAMMING for other in self.simhashes.get(anchor, ()))
+
+
+def load_index(path: str = INDEX_FILE) -> list[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_index(entries: list[dict], path: str = INDEX_FILE) -> None:
+    json_output.write_bytes(path, json_output.dumps(entries))
+
+
+def dedupe(articles: list, today: str, index_path: str = INDEX_FILE) -> list:
+    """移除同日跨來源重複，以及前幾日已收錄過的文章，並更新持久索引。
+
+    索引中只有日期早於 today 的紀錄會用於排除，同日重跑不會把自己的文章當成重複。
+    """
+    cutoff = (date.fromisoformat(today) - timedelta(days=INDEX_DAYS)).isoformat()
+    history = [e for e in load_index(index_path) if cutoff <= e["date"] < today]
+    seen = DedupIndex()
+    for e in history:
+        seen.add(e["url"], e["title"], int(e["simhash"], 16), e.get("anchors"))
+
+    ranked = sorted(
+        articles,
+        key=lambda a: (SOURCE_PRIORITY.get(a["source"], 0), -len(a.get("summary", ""))),
+    )
+    kept = []
+    new_entries = []
+    for article in ranked:
+        title = article["title"]
+        keys = (normalize_url(article.get("link", "")), title_hash(title), simhash(title), anchors(title))
+        if seen.contains(*keys):
+            continue
+        seen.add(*keys)
+        kept.append(article)
+        new_entries.append({"date": today, "url": keys[0], "title": keys[1], "simhash": f"{keys[2]:016x}",
+                            "anchors": keys[3]})
+
+    save_index(history + new_entries, index_path)
+    return kept
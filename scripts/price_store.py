@@ -0,0 +1,134 @@
+"""
+price_store.py
+本機持久化價格歷史（SQLite），以 (coin_id, date) 為鍵儲存每日 00:00 UTC 收盤價。
+fetch_market 每次只需抓取缺少的天數並追加，指標則由儲存的序列計算。
+"""
+import os
+import sqlite3
+from datetime import date, datetime, timezone, timedelta
+
+DAY_MS = 86_400_000
+HOUR_MS = 3_600_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    coin_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    price REAL NOT NULL,
+    PRIMARY KEY (coin_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS backfills (
+    coin_id TEXT PRIMARY KEY,
+    days INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def split_points(points: list) -> tuple[list, float | None]:
+    """將 market_chart 的 [timestamp_ms, price] 拆成 (每日收盤點, 最新即時價)。
+
+    對齊 00:00 UTC 的點視為已收盤的日 K；最後一個未對齊的點是當下即時價，不寫入儲存。
+    """
+    daily = []
+    live = None
+    for ts, price in points:
+        if int(ts) % DAY_MS == 0:
+            day = datetime.fromtimestamp(int(ts) / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+            daily.append((day, float(price)))
+        else:
+            live = float(price)
+    return daily, live
+
+
+def sparkline_daily(item: dict) -> list[tuple[str, float]]:
+    """由 /coins/markets 的 7 日小時 sparkline 取出各日 00:00 UTC 附近的價格作為日收盤價。
+
+    sparkline 不含時間戳記，以 last_updated 為最後一點往前每小時回推；
+    採用與 00:00 UTC 相距半小時以內的點。
+    """
+    prices = (item.get("sparkline_in_7d") or {}).get("price") or []
+    updated = item.get("last_updated")
+    if not prices or not updated:
+        return []
+    last_ms = int(datetime.fromisoformat(updated.replace("Z", "+00:00")).timestamp() * 1000)
+    first_ms = last_ms - (len(prices) - 1) * HOUR_MS
+    daily = []
+    for midnight in range(-(-first_ms // DAY_MS) * DAY_MS, last_ms + 1, DAY_MS):
+        offset = midnight - first_ms
+        i = round(offset / HOUR_MS)
+        if abs(offset - i * HOUR_MS) <= HOUR_MS // 2 and prices[i] is not None:
+            day = datetime.fromtimestamp(midnight / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+            daily.append((day, float(prices[i])))
+    return daily
+
+
+class PriceStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def last_date(self, coin_id: str) -> date | None:
+        row = self.conn.execute("SELECT MAX(date) FROM prices WHERE coin_id = ?", (coin_id,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def count(self, coin_id: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM prices WHERE coin_id = ?", (coin_id,)).fetchone()[0]
+
+    def mark_backfilled(self, coin_id: str, days: int) -> None:
+        """記錄已完成 days 天的完整回補；上市未滿 days 天的幣種之後不再因筆數不足重複回補。"""
+        self.conn.execute(
+            "INSERT INTO backfills (coin_id, days) VALUES (?, ?) "
+            "ON CONFLICT (coin_id) DO UPDATE SET days = MAX(days, excluded.days)",
+            (coin_id, days),
+        )
+
+    def backfilled_days(self, coin_id: str) -> int:
+        row = self.conn.execute("SELECT days FROM backfills WHERE coin_id = ?", (coin_id,)).fetchone()
+        return row[0] if row else 0
+
+    def missing_days(self, coin_id: str, today: date, backfill_days: int) -> int:
+        """需向 API 請求的天數：無資料、或只有 sparkline 幾天且未曾完整回補時回補 backfill_days 天，
+        否則只補最後一筆之後的缺口。"""
+        last = self.last_date(coin_id)
+        if last is None or (self.count(coin_id) < backfill_days and self.backfilled_days(coin_id) < backfill_days):
+            return backfill_days
+        return max(1, min(backfill_days, (today - last).days))
+
+    def append(self, coin_id: str, daily: list[tuple[str, float]], replace: bool = True) -> None:
+        """寫入日收盤價；replace=False 時不覆蓋已存在的日期（用於 sparkline 推估值）。"""
+        self.conn.executemany(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO prices (coin_id, date, price) VALUES (?, ?, ?)",
+            [(coin_id, day, price) for day, price in daily],
+        )
+
+    def series(self, coin_id: str, days: int) -> list[float]:
+        """最近 days 筆日收盤價（由舊到新）。"""
+        rows = self.conn.execute(
+            "SELECT price FROM prices WHERE coin_id = ? ORDER BY date DESC LIMIT ?",
+            (coin_id, days),
+        ).fetchall()
+        return [r[0] for r in reversed(rows)]
+
+    def series_before(self, coin_id: str, end: str, days: int) -> list[float]:
+        """end 之前（不含）的最近 days 筆日收盤價（由舊到新），供回溯重算使用。"""
+        rows = self.conn.execute(
+            "SELECT price FROM prices WHERE coin_id = ? AND date < ? ORDER BY date DESC LIMIT ?",
+            (coin_id, end, days),
+        ).fetchall()
+        return [r[0] for r in reversed(rows)]
+
+    def prune(self, today: date, keep_days: int) -> int:
+        cutoff = (today - timedelta(days=keep_days)).isoformat()
+        cur = self.conn.execute("DELETE FROM prices WHERE date < ?", (cutoff,))
+        return cur.rowcount
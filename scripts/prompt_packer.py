@@ -0,0 +1,169 @@
+"""
+prompt_packer.py
+每日摘要 prompt 的新聞與市場段落組裝：在固定 token 預算內涵蓋最多則不同的新聞事件。
+
+- 相關標題以內容字（去除停用詞）的 Jaccard 相似度分群，經倒排索引只與有共同字的群比對
+- 每群（一則事件）依報導來源數、是否提及觀察清單幣種、篇數與時效排序，
+  以原始媒體、已翻譯的文章為代表，並標註另有幾家來源報導
+- 依排序逐行放入預算，放不下的行略過、繼續嘗試較短的行
+
+token 數以 tiktoken（選用套件）依模型的實際編碼計算；未安裝或無法載入編碼檔（例如離線）時，
+以 CJK 每字 1 token、其他約每 4 字元 1 token 估計。
+"""
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken 為選用套件，未安裝時以字元數估計 token 數
+    tiktoken = None
+
+import sentiment
+from news_dedup import SOURCE_PRIORITY, title_tokens
+
+FALLBACK_ENCODING = "o200k_base"   # gpt-4o 系列的編碼
+
+CLUSTER_SIMILARITY = 0.3    # 內容字 Jaccard 相似度門檻
+MIN_SHARED_WORDS = 2        # 同群至少共有的內容字數
+SOURCE_WEIGHT = 2.0         # 每多一家來源報導
+COIN_WEIGHT = 1.5           # 提及觀察清單中的幣種
+SIZE_WEIGHT = 0.5           # 報導篇數（取 log2）
+RECENCY_HOURS = 24          # 時效加分在此時數內線性遞減至 0
+
+STOPWORDS = frozenset(
+    "a an the of to in on for and or but with from by at as is are was were be been being has have had "
+    "will would could should may might can its it this that these those than then into over after before "
+    "about amid against per via new says said report reports up down out off more most "
+    "what why how who when where which while just now here there today week year day first "
+    "crypto cryptocurrency happened".split()   # 幾乎每則標題都有的字
+)
+CJK_RE = re.compile(r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]")   # 中日韓文字與全形標點
+
+_encodings: dict = {}
+
+
+def _encoding(model: str):
+    """模型對應的 tiktoken 編碼；無法取得時回傳 None（結果會快取，不重複嘗試）。"""
+    if model not in _encodings:
+        encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+            except Exception as e:
+                print(f"[prompt] 無法載入 tiktoken 編碼，改以字元數估計 token（{type(e).__name__}）")
+        _encodings[model] = encoding
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    cjk = len(CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def content_words(title: str) -> frozenset:
+    """標題中的內容字：去除停用詞與單一字元，複數 -s 還原為單數。"""
+    words = set()
+    for word in title_tokens(title):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return frozenset(words)
+
+
+def cluster(articles: list[dict]) -> list[list[int]]:
+    """將相關標題分群，回傳每群的文章索引（依原順序，第一篇為種子）。
+
+    每篇只與跟種子標題有共同內容字的群比對，取相似度最高且達門檻者，否則自成一群。
+    """
+    clusters: list[list[int]] = []
+    seeds: list[frozenset] = []
+    postings: dict[str, list[int]] = {}
+    for i, a in enumerate(articles):
+        words = content_words(a.get("title", ""))
+        shared = Counter(c for w in words for c in postings.get(w, ()))
+        best, best_similarity = None, CLUSTER_SIMILARITY
+        for c, n in shared.items():
+            if n < MIN_SHARED_WORDS:
+                continue
+            similarity = n / (len(words) + len(seeds[c]) - n)
+            if similarity >= best_similarity:
+                best, best_similarity = c, similarity
+        if best is not None:
+            clusters[best].append(i)
+            continue
+        for w in words:
+            postings.setdefault(w, []).append(len(clusters))
+        clusters.append([i])
+        seeds.append(words)
+    return clusters
+
+
+@dataclass
+class Story:
+    articles: list[dict]    # 同一事件的報導，第一篇為代表
+    sources: list[str]      # 不重複的來源，依出現順序
+    coins: tuple[str, ...]  # 提及的觀察清單幣種
+    score: float
+
+    def line(self) -> str:
+        """代表文章的標題，前面標註來源與其他報導來源數，例如 [CoinDesk+2]。"""
+        lead = self.articles[0]
+        extra = f"+{len(self.sources) - 1}" if len(self.sources) > 1 else ""
+        return f"- [{self.sources[0]}{extra}] {lead.get('title_zh') or lead.get('title', '')}"
+
+
+def _hours_old(published: str, now: datetime) -> float:
+    try:
+        dt = datetime.fromisoformat(published.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return RECENCY_HOURS
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max((now - dt).total_seconds() / 3600, 0.0)
+
+
+def rank_stories(articles: list[dict], symbols=(), now: datetime | None = None) -> list[Story]:
+    """分群並依來源多樣性、幣種關聯度、篇數與時效排序。symbols 為觀察清單代號，空白時任何幣種皆計分。"""
+    now = now or datetime.now(timezone.utc)
+    watched = {s.upper() for s in symbols}
+    lexicon = sentiment.load_lexicon(symbols=watched) if watched else sentiment.default_lexicon()
+    stories = []
+    for members in cluster(articles):
+        group = [articles[i] for i in members]
+        # 原始媒體優先、已翻譯者優先，其餘依原順序（最新優先）
+        group.sort(key=lambda a: (SOURCE_PRIORITY.get(a.get("source"), 0), not a.get("title_zh")))
+        sources = list(dict.fromkeys(a.get("source", "") for a in group))
+        coins = {c for a in group for c in lexicon.score(a.get("title", "")).coins}
+        if watched:
+            coins &= watched
+        newest = min(_hours_old(a.get("published", ""), now) for a in group)
+        score = (SOURCE_WEIGHT * len(sources)
+                 + SIZE_WEIGHT * math.log2(len(group))
+                 + COIN_WEIGHT * bool(coins)
+                 + max(0.0, 1 - newest / RECENCY_HOURS))
+        stories.append(Story(group, sources, tuple(sorted(coins)), round(score, 4)))
+    # sort 為穩定排序，同分時保留原順序（較新優先）
+    stories.sort(key=lambda s: -s.score)
+    return stories
+
+
+def pack_lines(lines: list[str], budget: int, model: str = "gpt-4o-mini") -> tuple[list[int], int]:
+    """依序放入預算內的行（每行加計換行 1 token），回傳選入的索引與使用的 token 數。"""
+    chosen, used = [], 0
+    for i, line in enumerate(lines):
+        cost = count_tokens(line, model) + 1
+        if used + cost <= budget:
+            chosen.append(i)
+            used += cost
+    return chosen, used
@@ -0,0 +1,94 @@
+"""
+rate_limiter.py
+執行緒安全的 token bucket 限速器，供多執行緒抓取共用同一份 API 請求額度。
+遇到 429 時依 Retry-After 暫停整個 bucket，並以 AIMD 方式自動調整速率。
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import metrics
+
+
+class TokenBucket:
+    """每秒補充 rate 個 token、最多累積 capacity 個的 token bucket。
+
+    - acquire()：取得一個 token，額度不足時阻塞等待，回傳實際等待秒數。
+    - penalize()：收到 429 時呼叫，暫停所有請求並將速率減半（下限 min_rate）。
+    - reward()：請求成功時呼叫，速率逐步回升至原始設定。
+
+    clock / sleep 預設為 time.monotonic / time.sleep，測試時可換成手動推進的時鐘。
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: float | None = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._refill(now)
+                    # 容許浮點誤差：等待 (1 - tokens) / rate 秒後補回的量可能略小於 1
+                    if self._tokens >= 1 - 1e-9:
+                        self._tokens = max(0.0, self._tokens - 1)
+                        metrics.slept("rate_limit", waited)
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def penalize(self, delay: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + delay)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+    def reward(self) -> None:
+        with self._lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """解析 Retry-After header（秒數或 HTTP 日期，日期相對於 now），無法解析時回傳 None。"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (dt - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """指數退避加上 jitter：base/2 ~ min(cap, base * 2^attempt) 秒。"""
+    return random.uniform(base / 2, min(cap, base * (2 ** attempt)))
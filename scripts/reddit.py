@@ -0,0 +1,127 @@
+"""
+reddit.py
+Reddit 公開 listing（/r/{sub}/{listing}.json）的分頁抓取：
+
+- 每個 subreddit 依 after 游標逐頁讀取（每頁最多 PAGE_SIZE 篇，最多 MAX_PAGES 頁）
+- 不同 subreddit 以 thread pool 同時抓取，所有請求經由同一個 token bucket 限速；
+  429 依 Retry-After 或指數退避重試，回應的 X-Ratelimit-Remaining 用完時暫停至 X-Ratelimit-Reset
+- 每頁解析後立即逐篇交給呼叫端處理，原始 JSON 不保留，記憶體用量與頁數無關
+
+觀察的 subreddit 由環境變數 REDDIT_SUBREDDITS（逗號分隔）決定。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator
+
+import requests
+
+import http_cassette
+import metrics
+from rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+BASE_URL = os.environ.get("REDDIT_BASE", "https://www.reddit.com")
+USER_AGENT = "crypto-daily-digest/1.0 (automated news aggregator)"
+
+SUBREDDITS = [s.strip() for s in os.environ.get(
+    "REDDIT_SUBREDDITS", "CryptoCurrency,Bitcoin,ethereum,solana,CryptoMarkets"
+).split(",") if s.strip()]
+# 單幣種 subreddit 的貼文未提及任何幣種時，歸入該幣種
+SUBREDDIT_COINS = {"bitcoin": "BTC", "ethereum": "ETH", "ethtrader": "ETH", "solana": "SOL", "cardano": "ADA",
+                   "dogecoin": "DOGE", "ripple": "XRP", "xrp": "XRP", "bnbchainofficial": "BNB"}
+LISTING = os.environ.get("REDDIT_LISTING", "hot")
+PAGE_SIZE = 100       # Reddit listing 每頁上限
+MAX_PAGES = int(os.environ.get("REDDIT_MAX_PAGES", "5"))
+MAX_WORKERS = 4
+
+# 未登入的公開 JSON 端點每分鐘約可 10-100 次請求（依來源 IP 與 User-Agent 而定），保守設定
+RATE_PER_MINUTE = float(os.environ.get("REDDIT_RATE_PER_MINUTE", "30"))
+RATE_BURST = float(os.environ.get("REDDIT_RATE_BURST", "4"))
+RETRY_BASE_WAIT = 5
+RETRY_MAX_WAIT = 60
+
+LIMITER = TokenBucket(rate=RATE_PER_MINUTE / 60, capacity=RATE_BURST)
+SESSION = http_cassette.session(pool_maxsize=MAX_WORKERS, user_agent=USER_AGENT)
+STATS = {"requests": 0, "pages": 0, "posts": 0, "rate_limited": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(**values) -> None:
+    with _stats_lock:
+        for key, value in values.items():
+            STATS[key] += value
+
+
+def get_page(subreddit: str, after: str | None = None, max_retries: int = 4) -> dict:
+    """讀取一頁 listing，回傳 listing 的 data（children、after）。"""
+    params = {"limit": PAGE_SIZE, "raw_json": 1}
+    if after:
+        params["after"] = after
+    url = f"{BASE_URL}/r/{subreddit}/{LISTING}.json"
+    resp = None
+    for attempt in range(max_retries):
+        LIMITER.acquire()
+        _count(requests=1)
+        resp = SESSION.get(url, params=params, timeout=15)
+        if resp.status_code == 429:
+            wait = parse_retry_after(resp.headers.get("Retry-After"))
+            if wait is None:
+                wait = backoff_delay(attempt, RETRY_BASE_WAIT, RETRY_MAX_WAIT)
+            print(f"[Reddit] Rate limited (429)，等待 {wait:.1f} 秒後重試...")
+            _count(rate_limited=1)
+            metrics.incr("reddit.rate_limited")
+            LIMITER.penalize(wait)
+            continue
+        resp.raise_for_status()
+        remaining = resp.headers.get("X-Ratelimit-Remaining")
+        reset = resp.headers.get("X-Ratelimit-Reset")
+        if remaining is not None and reset is not None and float(remaining) < 1:
+            LIMITER.penalize(float(reset))
+        else:
+            LIMITER.reward()
+        return resp.json().get("data") or {}
+    resp.raise_for_status()
+    raise requests.HTTPError(f"Reddit {subreddit} 重試 {max_retries} 次仍被限速", response=resp)
+
+
+def iter_posts(subreddit: str, max_pages: int | None = None) -> Iterator[dict]:
+    """依 after 游標逐頁產生貼文的 data；沒有下一頁或達到 max_pages（預設 MAX_PAGES）時停止。"""
+    after = None
+    for _ in range(max_pages or MAX_PAGES):
+        page = get_page(subreddit, after)
+        children = page.get("children") or []
+        _count(pages=1, posts=len(children))
+        for child in children:
+            if child.get("kind", "t3") == "t3":
+                yield child.get("data") or {}
+        after = page.get("after")
+        if not after or not children:
+            break
+
+
+def ingest(handle: Callable[[str, dict], None], subreddits: list[str] | None = None,
+           max_pages: int | None = None) -> dict:
+    """同時抓取多個 subreddit，每篇貼文呼叫 handle(subreddit, post)（可能來自不同執行緒）。
+
+    回傳 {subreddit: {"posts": n}}；抓取失敗的 subreddit 另含 error，已處理的貼文仍保留。
+    """
+    subreddits = subreddits or SUBREDDITS
+
+    def run(subreddit: str) -> dict:
+        count = 0
+        with metrics.span("reddit.subreddit", subreddit=subreddit):
+            try:
+                for post in iter_posts(subreddit, max_pages):
+                    handle(subreddit, post)
+                    count += 1
+            except Exception as e:
+                print(f"[Reddit] r/{subreddit} 抓取失敗: {e}")
+                return {"posts": count, "error": str(e)}
+        return {"posts": count}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(subreddits)))) as pool:
+        futures = {pool.submit(run, sub): sub for sub in subreddits}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return {sub: results[sub] for sub in subreddits}
@@ -0,0 +1,112 @@
+"""
+report_writer.py
+每日報告輸出：將一天的報告拆成小的 headline 文件（摘要、市場、訊號）與獨立的新聞文件，
+以最小化 JSON 寫出，並產生預先壓縮的 .json.gz 與 .json.br。
+所有檔案經由 json_output 串流編碼、原子替換，寫到一半中斷時不會留下截斷的檔案。
+
+    docs/data/{date}.json        headline：summary / market / signals / news_file
+    docs/data/{date}.news.json   news：當日新聞列表
+
+用法（將既有的舊格式 archive 改寫為新格式）：
+    python scripts/report_writer.py --migrate [--dry-run]
+"""
+import argparse
+import json
+import os
+import re
+
+import json_output
+import metrics
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
+NEWS_SUFFIX = ".news.json"
+REPORT_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+
+def split_report(report: dict) -> tuple[dict, dict]:
+    """將完整報告拆成 (headline, news) 兩份文件。"""
+    date = report["date"]
+    news = report.get("news", [])
+    headline = {k: v for k, v in report.items() if k != "news"}
+    headline["news_count"] = len(news)
+    headline["news_file"] = f"{date}{NEWS_SUFFIX}"
+    return headline, {"date": date, "news": news}
+
+
+def write_compressed(path: str, data: dict) -> dict:
+    """以最小化 JSON 串流寫出 data 與壓縮版本（皆為原子替換），回傳各檔案大小。"""
+    with metrics.span("write", file=os.path.basename(path)) as attrs:
+        sizes = json_output.write_json(path, data, compress=True)
+        attrs["bytes"] = sizes["json"]
+    return sizes
+
+
+def write_day(report: dict, data_dir: str = DATA_DIR, legacy_size: bool = False) -> dict:
+    """寫出一天的 headline 與 news 文件，回傳大小統計。
+
+    legacy_size=True 時另計舊格式（indent=2 單一檔案）的大小作為對照；需要完整序列化一次，只在遷移時使用。
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    headline, news = split_report(report)
+    stats = {"date": report["date"]}
+    if legacy_size:
+        stats["legacy"] = len(json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8"))
+    stats["headline"] = write_compressed(os.path.join(data_dir, f"{report['date']}.json"), headline)
+    stats["news"] = write_compressed(os.path.join(data_dir, headline["news_file"]), news)
+    return stats
+
+
+def write_headline(report: dict, data_dir: str = DATA_DIR) -> dict:
+    """只改寫 headline 文件（新聞分檔維持不變），回傳大小統計。"""
+    headline, _ = split_report(report)
+    headline["news_count"] = report.get("news_count", headline["news_count"])
+    return write_compressed(os.path.join(data_dir, f"{report['date']}.json"), headline)
+
+
+def print_stats(stats: dict) -> None:
+    for part in ("headline", "news"):
+        sizes = stats[part]
+        extra = "".join(
+            f"，{kind} {sizes[kind]:,} bytes（{sizes['json'] / sizes[kind]:.1f}x）"
+            for kind in ("gz", "br") if kind in sizes
+        )
+        print(f"[{stats['date']}] {part}: {sizes['json']:,} bytes{extra}")
+    if "legacy" in stats:
+        total = stats["headline"]["json"] + stats["news"]["json"]
+        print(f"[{stats['date']}] 舊格式 {stats['legacy']:,} bytes → 最小化 {total:,} bytes"
+              f"（{stats['legacy'] / total:.2f}x），headline 僅 {stats['headline']['json']:,} bytes")
+
+
+def migrate(data_dir: str = DATA_DIR, dry_run: bool = False) -> int:
+    """將含 news 欄位的舊格式每日報告改寫為 headline + news 分檔格式。"""
+    migrated = 0
+    for filename in sorted(os.listdir(data_dir)):
+        if not REPORT_RE.match(filename):
+            continue
+        with open(os.path.join(data_dir, filename), "r", encoding="utf-8") as f:
+            report = json.load(f)
+        if "news" not in report:
+            continue
+        if dry_run:
+            print(f"[dry-run] 將改寫 {filename}")
+        else:
+            print_stats(write_day(report, data_dir, legacy_size=True))
+        migrated += 1
+    print(f"共{'需改寫' if dry_run else '改寫'} {migrated} 個檔案。")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日報告輸出工具")
+    parser.add_argument("--migrate", action="store_true", help="將既有 archive 改寫為新格式")
+    parser.add_argument("--dry-run", action="store_true", help="只列出會改寫的檔案")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+    if not args.migrate:
+        parser.print_help()
+        return
+    migrate(args.data_dir, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
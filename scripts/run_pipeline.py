@@ -0,0 +1,148 @@
+"""
+run_pipeline.py
+在單一程序內以 DAG 執行每日流程，各階段結果直接在記憶體中傳遞：
+
+    news ──┬─► translate ──┐
+           └─► signals ────┼──► summary
+    market ────────────────┘
+
+news 與 market 同時執行；signals 需要新聞標題做情緒評分，在 news 完成後與 translate 並行。translate 在新聞的
+深拷貝上加入譯文，不改動 signals 正在讀取、也會寫入 checkpoint 的 news 結果。中間檔（_news / _news_translated /
+_market / _signals.json）只在指定 --checkpoint 時寫出，各階段一檔、內容為該階段的回傳值，方便除錯或讓舊的個別腳本接手。
+
+每次執行都會寫出 docs/data/{date}_metrics.json：各階段、HTTP 請求、LLM 呼叫與檔案寫入的
+次數與耗時彙總，限速等待時間與工作時間的拆分，以及 CoinGecko 快取、Reddit 分頁與各主機流量統計。
+每筆 span 的明細寫到 data/traces/{date}.json（不提交，workflow 以 artifact 保存）；設定
+DIGEST_CPROFILE=1 / DIGEST_TRACEMALLOC=1 時的 profiling 結果也附在其中（見 metrics.py）。
+
+summary 階段的輸入未變時沿用摘要快取（見 generate_summary），--force 強制重新呼叫 OpenAI。
+
+用法：python scripts/run_pipeline.py [--checkpoint] [--force]
+"""
+import argparse
+import copy
+import functools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import build_index
+import coingecko
+import fetch_market
+import fetch_news
+import fetch_signals
+import generate_summary
+import http_cassette
+import json_output
+import metrics
+import reddit
+import translate_news
+
+
+def translate_stage(r: dict) -> dict | None:
+    # signals 同時讀取 news 的文章，譯文加在深拷貝上
+    return translate_news.translate_report(copy.deepcopy(r["news"])) if r["news"] else None
+
+
+def summary_stage(r: dict, force: bool = False) -> dict:
+    return generate_summary.build_report(
+        r["translate"] or {"date": generate_summary.TODAY, "count": 0, "articles": []},
+        r["market"] or {"date": generate_summary.TODAY, "coins": []},
+        r["signals"],
+        force=force,
+    )
+
+
+# 階段名稱: (相依階段, 執行函式)；執行函式接收 {階段名稱: 結果}
+STAGES = {
+    "news": ([], lambda r: fetch_news.collect()),
+    "translate": (["news"], translate_stage),
+    "market": ([], lambda r: fetch_market.collect()),
+    "signals": (["news"], lambda r: fetch_signals.collect(r["news"])),
+    "summary": (["translate", "market", "signals"], summary_stage),
+}
+
+METRICS_FILE = os.path.join(generate_summary.DATA_DIR, f"{generate_summary.TODAY}_metrics.json")
+TRACE_FILE = os.path.join(metrics.TRACE_DIR, f"{generate_summary.TODAY}.json")
+
+CHECKPOINTS = {
+    "news": fetch_news.OUTPUT_FILE,
+    "translate": translate_news.TRANSLATED_FILE,
+    "market": fetch_market.OUTPUT_FILE,
+    "signals": fetch_signals.OUTPUT_FILE,
+}
+
+
+def write_checkpoint(path: str, data: dict) -> None:
+    with metrics.span("write", file=os.path.basename(path)):
+        json_output.write_json(path, data, compact=False)
+    print(f"[pipeline] checkpoint 寫入 {path}")
+
+
+def run_stage(name: str, func, inputs: dict):
+    with metrics.span(f"stage.{name}"):
+        return func(inputs)
+
+
+def run_stages(stages: dict, checkpoint: bool = False, max_workers: int = 4) -> dict:
+    """依相依關係執行所有階段，前置階段完成即啟動；失敗的階段結果為 None。"""
+    results: dict = {}
+    timings: dict = {}
+    pending = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, (deps, func) in list(pending.items()):
+                if all(d in results for d in deps):
+                    del pending[name]
+                    inputs = {d: results[d] for d in deps}
+                    running[pool.submit(run_stage, name, func, inputs)] = (name, time.perf_counter())
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, started = running.pop(future)
+                timings[name] = time.perf_counter() - started
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"[pipeline] 階段 {name} 失敗: {e}")
+                    results[name] = None
+                    continue
+                print(f"[pipeline] 階段 {name} 完成（{timings[name]:.1f}s）")
+                if checkpoint and name in CHECKPOINTS and results[name] is not None:
+                    write_checkpoint(CHECKPOINTS[name], results[name])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="單一程序執行每日加密貨幣報告流程")
+    parser.add_argument("--checkpoint", action="store_true", help="寫出各階段中間檔")
+    parser.add_argument("--force", action="store_true", help="忽略摘要快取，重新呼叫 OpenAI 產生摘要")
+    args = parser.parse_args()
+
+    stages = dict(STAGES)
+    if args.force:
+        stages["summary"] = (STAGES["summary"][0], functools.partial(summary_stage, force=True))
+
+    start = time.perf_counter()
+    with metrics.profiling(generate_summary.TODAY):
+        results = run_stages(stages, checkpoint=args.checkpoint)
+        if results["summary"] is not None:
+            with metrics.span("stage.write"):
+                generate_summary.write_report(results["summary"])
+                build_index.update(results["summary"])
+    metrics.write(
+        METRICS_FILE,
+        TRACE_FILE,
+        date=generate_summary.TODAY,
+        failed_stages=[name for name, result in results.items() if result is None],
+        coingecko=dict(coingecko.STATS),
+        reddit=dict(reddit.STATS),
+        traffic=dict(http_cassette.TRAFFIC),
+    )
+    if results["summary"] is None:
+        raise SystemExit("每日報告產生失敗")
+    print(f"[pipeline] 全部完成，共 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+sentiment.py
+以加權詞庫為基礎的英文情緒分析，供 Reddit 貼文與新聞標題 / 摘要評分並依幣種彙總。
+
+詞庫（config/sentiment_lexicon.json，或環境變數 SENTIMENT_LEXICON 指定的檔案）包含：
+
+    terms          單字或片語的情緒權重（約 -3 ~ +3），單字自動展開 -s / -ed / -ing 等字尾
+    negators       否定詞，反轉其後 NEGATION_SCOPE 個詞內的情緒（遇到標點即結束）
+    intensifiers   程度副詞，放大或減弱下一個情緒詞
+    names          不分大小寫的幣種名稱（bitcoin、ether…）
+    tickers        只在全大寫或 $ 前綴時才視為幣種的代號（避免 LINK / OP / NEAR 誤判）
+
+每段文字以預先編譯的 TOKEN_RE 一次切出單字、$代號、emoji 與標點，所有特殊詞合併在一張
+雜湊表中一次查完，片語以首字索引做最長比對；compound 分數以 total / sqrt(total² + ALPHA)
+正規化到 [-1, 1]。
+"""
+import json
+import math
+import os
+import re
+from dataclasses import dataclass
+from itertools import compress
+
+LEXICON_FILE = os.environ.get(
+    "SENTIMENT_LEXICON", os.path.join(os.path.dirname(__file__), "..", "config", "sentiment_lexicon.json")
+)
+
+NEGATION_SCOPE = 3       # 否定詞影響其後幾個詞
+NEGATION_FACTOR = -0.74  # 被否定的情緒詞權重倍數（"not bad" 為弱正面）
+BUT_FACTOR = 0.5         # "but" 之前的情緒權重倍數，之後的內容較能代表結論
+EXCLAIM_BOOST = 0.1      # 每個驚嘆號（最多 3 個）放大的比例
+ALPHA = 15.0             # compound 正規化常數
+NEUTRAL_BAND = 0.05      # |compound| 小於此值視為中立
+
+TOKEN_RE = re.compile(
+    r"\$?[A-Za-z0-9]+(?:'[A-Za-z]+)?"        # 單字、$代號、10x、don't
+    r"|[\U0001F300-\U0001FAFF\u2600-\u27BF]"   # emoji
+    r"|[!?.;:,]"                               # 標點（子句邊界）
+)
+
+# 查詢表中的種類
+TERM, PHRASE, NEGATOR, BOOST, BUT, NAME, TICKER, PUNCT = range(8)
+
+
+@dataclass
+class Score:
+    compound: float          # -1 ~ 1
+    hits: int                # 命中的情緒詞數
+    coins: tuple[str, ...]   # 提及的幣種代號
+
+
+def inflections(word: str) -> list[str]:
+    """常見英文字尾變化：pump → pumps / pumped / pumping，drop → dropped / dropping。"""
+    forms = [word + "s", word + "es", word + "ed", word + "ing"]
+    if word.endswith("e"):
+        forms += [word + "d", word[:-1] + "ing"]
+    if word.endswith("y"):
+        forms += [word[:-1] + "ies", word[:-1] + "ied"]
+    vowels = "aeiou"
+    if len(word) >= 3 and word[-1] not in vowels + "wxy" and word[-2] in vowels and word[-3] not in vowels:
+        forms += [word + word[-1] + "ed", word + word[-1] + "ing"]
+    return forms
+
+
+def normalize(text: str) -> str:
+    return text.replace("’", "'").replace("-", " ")
+
+
+class Lexicon:
+    """已編譯的詞庫：情緒詞、片語首字、否定詞、程度副詞、幣種與標點合併成一張查詢表。
+
+    每段文字先以 TOKEN_RE 切詞，再以 map(table.get) 一次查完所有 token（皆在 C 層執行），
+    Python 迴圈只走過命中的 token；一般單字不會進入迴圈。
+    """
+
+    def __init__(self, config: dict, symbols=()):
+        words: dict[str, float] = {}
+        self.phrases: dict[tuple, float] = {}
+        for term, weight in config.get("terms", {}).items():
+            parts = tuple(TOKEN_RE.findall(normalize(term).lower()))
+            if len(parts) == 1:
+                words[parts[0]] = float(weight)
+            elif parts:
+                self.phrases[parts] = float(weight)
+        # 字尾變化不覆蓋明確列出的詞
+        for word, weight in list(words.items()):
+            if word.isalpha():
+                for form in inflections(word):
+                    words.setdefault(form, weight)
+        self.words = words
+
+        table: dict[str, tuple] = {p: (PUNCT, None) for p in "!?.;:,"}
+        tickers = {t.upper() for t in config.get("tickers", [])} | {s.upper() for s in symbols}
+        for ticker in tickers:
+            table[ticker.lower()] = (TICKER, ticker)
+            table["$" + ticker.lower()] = (NAME, ticker)
+        for name, symbol in config.get("names", {}).items():
+            table[name.lower()] = table["$" + name.lower()] = (NAME, symbol.upper())
+        for word, value in config.get("intensifiers", {}).items():
+            table[word] = (BOOST, float(value))
+        for word in config.get("negators", []):
+            table[word] = (NEGATOR, None)
+            if word.endswith("nt") and len(word) > 3:
+                table[word[:-2] + "n't"] = (NEGATOR, None)
+        table["but"] = (BUT, None)
+        for word, weight in words.items():
+            table[word] = (TERM, weight)
+        lengths: dict[str, set] = {}
+        for parts in self.phrases:
+            lengths.setdefault(parts[0], set()).add(len(parts))
+        for first, options in lengths.items():
+            # 片語首字本身若也是情緒詞、程度副詞或否定詞（bull run、huge win、not bad），
+            # 比對不到片語時退回原本的查詢結果
+            table[first] = (PHRASE, (sorted(options, reverse=True), table.get(first)))
+        self.table = table
+
+    def score(self, text: str) -> Score:
+        text = normalize(text)
+        words = TOKEN_RE.findall(text.lower())
+        tokens = None       # 原始大小寫的 token，遇到需判斷全大寫的代號時才切
+        entries = list(map(self.table.get, words))
+        total = 0.0
+        hits = 0
+        negated_at = -NEGATION_SCOPE - 1   # 最近一個否定詞的位置
+        boost = 1.0
+        exclaims = 0
+        skip_until = 0
+        coins = []
+        for i, (kind, value) in compress(enumerate(entries), entries):
+            if i < skip_until:
+                continue
+            if kind == PHRASE:
+                options, fallback = value
+                for length in options:
+                    if tuple(words[i:i + length]) in self.phrases:
+                        kind, value = TERM, self.phrases[tuple(words[i:i + length])]
+                        skip_until = i + length
+                        break
+                else:
+                    if fallback is None:
+                        continue
+                    kind, value = fallback
+            if kind == TERM:
+                if value:
+                    value *= boost
+                    if i - negated_at <= NEGATION_SCOPE:
+                        value *= NEGATION_FACTOR
+                    total += value
+                    hits += 1
+                    boost = 1.0
+            elif kind == PUNCT:
+                # 標點結束否定與程度副詞的作用範圍
+                exclaims += words[i] == "!"
+                negated_at, boost = -NEGATION_SCOPE - 1, 1.0
+            elif kind == NEGATOR:
+                negated_at = i
+            elif kind == BOOST:
+                boost = value
+            elif kind == NAME:
+                coins.append(value)
+            elif kind == TICKER:
+                if tokens is None:
+                    tokens = TOKEN_RE.findall(text)
+                # 少數非 ASCII 字母轉小寫後長度改變，切詞不一致時保守地不認定為代號
+                if len(tokens) == len(words) and tokens[i].isupper():
+                    coins.append(value)
+            elif kind == BUT:
+                total *= BUT_FACTOR
+                negated_at, boost = -NEGATION_SCOPE - 1, 1.0
+
+        if total and exclaims:
+            total *= 1 + EXCLAIM_BOOST * min(exclaims, 3)
+        compound = total / math.sqrt(total * total + ALPHA) if total else 0.0
+        return Score(round(compound, 4), hits, tuple(dict.fromkeys(coins)))
+
+
+def load_lexicon(path: str = LEXICON_FILE, symbols=()) -> Lexicon:
+    with open(path, "r", encoding="utf-8") as f:
+        return Lexicon(json.load(f), symbols)
+
+
+_default: Lexicon | None = None
+
+
+def default_lexicon() -> Lexicon:
+    global _default
+    if _default is None:
+        _default = load_lexicon()
+    return _default
+
+
+def label(score: float) -> str:
+    if score > 0.3:
+        return "偏樂觀"
+    if score > 0.1:
+        return "略樂觀"
+    if score < -0.3:
+        return "偏悲觀"
+    if score < -0.1:
+        return "略悲觀"
+    return "中立"
+
+
+def upvote_weight(upvotes: int | float | None) -> float:
+    """貼文的彙總權重：1 + ln(1 + 讚數)，負分貼文與一般貼文同權重。"""
+    return 1.0 + math.log1p(max(upvotes or 0, 0))
+
+
+class Tally:
+    """加權平均 compound 與正面 / 負面 / 中立計數。"""
+
+    __slots__ = ("weight", "total", "positive", "negative", "neutral")
+
+    def __init__(self):
+        self.weight = 0.0
+        self.total = 0.0
+        self.positive = self.negative = self.neutral = 0
+
+    def add(self, compound: float, weight: float) -> None:
+        self.weight += weight
+        self.total += compound * weight
+        if compound >= NEUTRAL_BAND:
+            self.positive += 1
+        elif compound <= -NEUTRAL_BAND:
+            self.negative += 1
+        else:
+            self.neutral += 1
+
+    @property
+    def count(self) -> int:
+        return self.positive + self.negative + self.neutral
+
+    @property
+    def score(self) -> float:
+        return round(self.total / self.weight, 4) if self.weight else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sentiment_score": self.score,
+            "positive_count": self.positive,
+            "negative_count": self.negative,
+            "neutral_count": self.neutral,
+            "label": label(self.score),
+        }
+
+
+class Aggregate:
+    """整體與各幣種的情緒彙總；每段文字的分數計入整體，並計入其提及的每個幣種。"""
+
+    def __init__(self, lexicon: Lexicon | None = None):
+        self.lexicon = lexicon or default_lexicon()
+        self.overall = Tally()
+        self.coins: dict[str, Tally] = {}
+
+    def add(self, text: str, weight: float = 1.0, default_coins: tuple = ()) -> Score:
+        """計入一段文字；文字未提及任何幣種時，計入 default_coins（例如單幣種 subreddit）。"""
+        result = self.lexicon.score(text)
+        self.overall.add(result.compound, weight)
+        for symbol in result.coins or default_coins:
+            tally = self.coins.get(symbol)
+            if tally is None:
+                tally = self.coins[symbol] = Tally()
+            tally.add(result.compound, weight)
+        return result
+
+    def summary(self, min_mentions: int = 1) -> dict:
+        """整體彙總加上 coins：提及次數至少 min_mentions 的幣種，依提及次數排序。"""
+        coins = sorted(self.coins.items(), key=lambda kv: (-kv[1].count, kv[0]))
+        return {
+            **self.overall.to_dict(),
+            "coins": {
+                symbol: {**tally.to_dict(), "mentions": tally.count}
+                for symbol, tally in coins if tally.count >= min_mentions
+            },
+        }
+
+
+def score_articles(articles: list[dict], lexicon: Lexicon | None = None) -> dict:
+    """新聞標題與摘要（英文原文）的整體與各幣種情緒。"""
+    aggregate = Aggregate(lexicon)
+    for a in articles:
+        aggregate.add(f"{a.get('title', '')}. {a.get('summary', '')}")
+    return {**aggregate.summary(), "analyzed": aggregate.overall.count}
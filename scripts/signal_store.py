@@ -0,0 +1,322 @@
+"""
+signal_store.py
+本機訊號歷史（SQLite）：恐懼貪婪指數與 Reddit / 新聞情緒分數每日一點，只追加、不改寫已存在的日期。
+每個序列另存滾動統計狀態，新增一點只需 O(1) 更新（離開視窗的點各只讀取一次）：
+
+- 7 / 30 / 90 日（日曆天）移動平均、標準差與 z 分數：視窗內的筆數、和與平方和
+- 視窗內百分位：固定刻度的直方圖，點進出視窗時增減一格
+- 狀態（regime）：7 日均線所在的區間，超出目前區間邊界 margin 以上才切換，切換紀錄另存
+
+query / window_stats 直接由點資料回傳任一區間，不必重讀每日報告。
+首次使用時可由 docs/data 中既有的每日報告匯入：
+
+用法：python scripts/signal_store.py [--seed] [--series fear_greed]
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import build_index
+
+DB_FILE = os.environ.get(
+    "SIGNAL_DB", os.path.join(os.path.dirname(__file__), "..", "data", "signal_history.sqlite3")
+)
+WINDOWS = (7, 30, 90)
+REGIME_WINDOW = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    series TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+    series TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS regimes (
+    series TEXT NOT NULL,
+    date TEXT NOT NULL,
+    regime TEXT NOT NULL,
+    PRIMARY KEY (series, date)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class SeriesSpec:
+    lo: float                   # 直方圖範圍與刻度（百分位的解析度）
+    hi: float
+    step: float
+    edges: tuple                # 狀態區間的分界，len(regimes) == len(edges) + 1
+    regimes: tuple
+    margin: float               # 均線需超出目前區間邊界多少才切換狀態
+
+    @property
+    def buckets(self) -> int:
+        return round((self.hi - self.lo) / self.step) + 1
+
+    def bucket(self, value: float) -> int:
+        return min(max(round((value - self.lo) / self.step), 0), self.buckets - 1)
+
+    def regime(self, value: float) -> int:
+        return bisect.bisect_right(self.edges, value)
+
+
+SENTIMENT_SPEC = SeriesSpec(-1.0, 1.0, 0.01, (-0.3, -0.1, 0.1, 0.3),
+                            ("偏悲觀", "略悲觀", "中立", "略樂觀", "偏樂觀"), 0.02)   # 與 sentiment.label 相同
+SERIES = {
+    # Alternative.me 的分級：0-24 極度恐懼、25-44 恐懼、45-55 中立、56-75 貪婪、76-100 極度貪婪
+    "fear_greed": SeriesSpec(0, 100, 1, (25, 45, 56, 76), ("極度恐懼", "恐懼", "中立", "貪婪", "極度貪婪"), 2),
+    "reddit_sentiment": SENTIMENT_SPEC,
+    "news_sentiment": SENTIMENT_SPEC,
+}
+
+
+def _shift(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def _empty_state(spec: SeriesSpec) -> dict:
+    return {
+        "count": 0, "last_date": None, "last": None,
+        "windows": {str(w): {"n": 0, "sum": 0.0, "sumsq": 0.0, "hist": [0] * spec.buckets} for w in WINDOWS},
+        "regime": None, "regime_since": None,
+    }
+
+
+def _describe(window: dict, value: float, spec: SeriesSpec) -> dict:
+    """由視窗狀態算出均值、標準差、最新值的 z 分數與百分位。"""
+    n = window["n"]
+    if not n:
+        return {"mean": None, "std": None, "z": None, "percentile": None, "count": 0}
+    mean = window["sum"] / n
+    std = math.sqrt(max(window["sumsq"] / n - mean * mean, 0.0))
+    b = spec.bucket(value)
+    hist = window["hist"]
+    rank = (sum(hist[:b]) + hist[b] / 2) / n * 100
+    return {
+        "mean": round(mean, 4),
+        "std": round(std, 4),
+        "z": round((value - mean) / std, 2) if std > 1e-9 else 0.0,
+        "percentile": round(rank, 1),
+        "count": n,
+    }
+
+
+class SignalStore:
+    def __init__(self, path: str = DB_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self._states: dict[str, dict] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def _state(self, series: str) -> dict:
+        if series not in self._states:
+            row = self.conn.execute("SELECT state FROM state WHERE series = ?", (series,)).fetchone()
+            state = json.loads(row[0]) if row else None
+            if state is None or set(state["windows"]) != {str(w) for w in WINDOWS}:
+                state = self._rebuild(series)
+            self._states[series] = state
+        return self._states[series]
+
+    def _rebuild(self, series: str) -> dict:
+        """視窗設定變更或狀態遺失時，由點資料依序重算狀態與狀態切換紀錄。"""
+        spec = SERIES[series]
+        state = _empty_state(spec)
+        self.conn.execute("DELETE FROM regimes WHERE series = ?", (series,))
+        rows = self.conn.execute(
+            "SELECT date, value FROM points WHERE series = ? ORDER BY date", (series,)
+        ).fetchall()
+        for day, value in rows:
+            self._advance(series, spec, state, day, value)
+        self._save(series, state)
+        return state
+
+    def _save(self, series: str, state: dict) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO state (series, state) VALUES (?, ?)",
+                          (series, json.dumps(state, separators=(",", ":"))))
+
+    def _advance(self, series: str, spec: SeriesSpec, state: dict, day: str, value: float) -> None:
+        """將新的一點併入滾動狀態；離開各視窗的點以日期區間查出（每點每個視窗只離開一次）。"""
+        for w, window in state["windows"].items():
+            start = _shift(day, 1 - int(w))
+            if state["last_date"] is not None:
+                leaving = self.conn.execute(
+                    "SELECT value FROM points WHERE series = ? AND date >= ? AND date < ?",
+                    (series, _shift(state["last_date"], 1 - int(w)), start),
+                ).fetchall()
+                for (old,) in leaving:
+                    window["n"] -= 1
+                    window["sum"] -= old
+                    window["sumsq"] -= old * old
+                    window["hist"][spec.bucket(old)] -= 1
+                if not window["n"]:
+                    window["sum"] = window["sumsq"] = 0.0   # 視窗清空時歸零，避免浮點誤差累積
+            window["n"] += 1
+            window["sum"] += value
+            window["sumsq"] += value * value
+            window["hist"][spec.bucket(value)] += 1
+        state["count"] += 1
+        state["last_date"], state["last"] = day, value
+
+        window = state["windows"][str(REGIME_WINDOW)]
+        ma = window["sum"] / window["n"]
+        current = state["regime"]
+        if current is not None:
+            i = spec.regimes.index(current)
+            low = spec.edges[i - 1] - spec.margin if i > 0 else -math.inf
+            high = spec.edges[i] + spec.margin if i < len(spec.edges) else math.inf
+            if low <= ma < high:
+                return
+        state["regime"], state["regime_since"] = spec.regimes[spec.regime(ma)], day
+        self.conn.execute("INSERT OR REPLACE INTO regimes (series, date, regime) VALUES (?, ?, ?)",
+                          (series, day, state["regime"]))
+
+    def append(self, series: str, points: list[tuple[str, float]]) -> int:
+        """依日期追加點；不晚於最後一點的日期略過（不改寫歷史），回傳實際寫入的點數。"""
+        spec = SERIES[series]
+        state = self._state(series)
+        added = 0
+        for day, value in sorted(points, key=lambda p: p[0]):
+            if value is None or (state["last_date"] is not None and day <= state["last_date"]):
+                continue
+            self.conn.execute("INSERT INTO points (series, date, value) VALUES (?, ?, ?)",
+                              (series, day, float(value)))
+            self._advance(series, spec, state, day, float(value))
+            added += 1
+        if added:
+            self._save(series, state)
+        return added
+
+    def last_date(self, series: str) -> date | None:
+        day = self._state(series)["last_date"]
+        return date.fromisoformat(day) if day else None
+
+    def missing_days(self, series: str, today: date, backfill_days: int) -> int:
+        """需向來源請求的天數：無資料時回補 backfill_days 天，否則只補最後一點之後的缺口。"""
+        last = self.last_date(series)
+        if last is None:
+            return backfill_days
+        return max(1, min(backfill_days, (today - last).days))
+
+    def stats(self, series: str) -> dict:
+        """最新一點的滾動統計（不查詢點資料）：各視窗均值、標準差、z 分數、百分位與目前狀態。"""
+        spec = SERIES[series]
+        state = self._state(series)
+        if not state["count"]:
+            return {}
+        return {
+            "date": state["last_date"],
+            "value": state["last"],
+            "count": state["count"],
+            "regime": state["regime"],
+            "regime_since": state["regime_since"],
+            "windows": {w: _describe(window, state["last"], spec) for w, window in state["windows"].items()},
+        }
+
+    def query(self, series: str, start: str | None = None, end: str | None = None) -> list[tuple[str, float]]:
+        """start 至 end（含）的點，由舊到新；省略時不限。"""
+        return self.conn.execute(
+            "SELECT date, value FROM points WHERE series = ? AND date >= ? AND date <= ? ORDER BY date",
+            (series, start or "", end or "9999-12-31"),
+        ).fetchall()
+
+    def window_stats(self, series: str, days: int, end: str | None = None) -> dict:
+        """截至 end（預設為最後一點）的 days 日視窗統計，供查詢任意長度的視窗。"""
+        end = end or self._state(series)["last_date"]
+        if end is None:
+            return {}
+        values = sorted(v for _, v in self.query(series, _shift(end, 1 - days), end))
+        if not values:
+            return {"count": 0}
+        mean = sum(values) / len(values)
+
+        def percentile(q: float) -> float:
+            k = (len(values) - 1) * q
+            f = math.floor(k)
+            return values[f] + (values[min(f + 1, len(values) - 1)] - values[f]) * (k - f)
+
+        return {
+            "count": len(values),
+            "mean": round(mean, 4),
+            "std": round(math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)), 4),
+            "min": values[0],
+            "max": values[-1],
+            "p10": round(percentile(0.1), 4),
+            "p50": round(percentile(0.5), 4),
+            "p90": round(percentile(0.9), 4),
+        }
+
+    def regime_changes(self, series: str, start: str | None = None) -> list[tuple[str, str]]:
+        return self.conn.execute(
+            "SELECT date, regime FROM regimes WHERE series = ? AND date >= ? ORDER BY date",
+            (series, start or ""),
+        ).fetchall()
+
+
+def report_points(report: dict) -> dict[str, list[tuple[str, float]]]:
+    """每日報告（或 _signals.json）中各序列的點；恐懼貪婪指數連同 7 日歷史一併取出。"""
+    signals = report.get("signals", report)
+    fear_greed = signals.get("fear_greed") or {}
+    points = {"fear_greed": [(h["date"], h["value"]) for h in fear_greed.get("history", [])]}
+    for series in ("reddit_sentiment", "news_sentiment"):
+        score = (signals.get(series) or {}).get("sentiment_score")
+        points[series] = [(report["date"], score)] if score is not None else []
+    return points
+
+
+def seed(store: SignalStore, data_dir: str) -> dict:
+    """由既有的每日報告匯入（只追加最後一點之後的日期），回傳各序列寫入的點數。"""
+    collected: dict[str, list] = {series: [] for series in SERIES}
+    for name in sorted(os.listdir(data_dir)):
+        m = build_index.REPORT_RE.match(name)
+        if not m:
+            continue
+        for series, points in report_points(build_index.load_report(data_dir, m.group(1))).items():
+            collected[series] += points
+    # 同一日期以較晚報告中的值為準
+    return {series: store.append(series, list(dict(points).items())) for series, points in collected.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="檢視本機訊號歷史與滾動統計")
+    parser.add_argument("--seed", action="store_true", help="由 docs/data 中既有的每日報告匯入")
+    parser.add_argument("--series", choices=sorted(SERIES), help="只顯示指定序列")
+    args = parser.parse_args()
+
+    with SignalStore(DB_FILE) as store:
+        if args.seed:
+            data_dir = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
+            for series, added in seed(store, data_dir).items():
+                print(f"[signals] {series} 匯入 {added} 點")
+        for series in [args.series] if args.series else SERIES:
+            stats = store.stats(series)
+            if not stats:
+                print(f"{series}: 無資料")
+                continue
+            print(f"{series}: {stats['date']} = {stats['value']}，共 {stats['count']} 點，"
+                  f"狀態 {stats['regime']}（自 {stats['regime_since']}）")
+            for w, s in stats["windows"].items():
+                print(f"  {w:>3} 日：均值 {s['mean']}，標準差 {s['std']}，z {s['z']}，百分位 {s['percentile']}%"
+                      f"（{s['count']} 點）")
+
+
+if __name__ == "__main__":
+    main()
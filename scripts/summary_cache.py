@@ -0,0 +1,65 @@
+"""
+summary_cache.py
+每日 AI 摘要的記憶化快取（SQLite）：鍵為 prompt、模型與呼叫參數的 SHA-256（http_cassette.llm_key），
+值為摘要全文。重跑 workflow 且輸入未變時直接沿用先前的摘要，不再呼叫 OpenAI。
+超過容量上限時依最後使用時間淘汰最舊的項目。
+"""
+import os
+import sqlite3
+import time
+
+CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "summary_cache.sqlite3")
+MAX_ENTRIES = 100   # 每日約 1-3 筆（含重跑），保留數週即可
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class SummaryCache:
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SCHEMA)
+        self.max_entries = max_entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.evict()
+        self.conn.commit()
+        self.conn.close()
+
+    def get(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, model: str, summary: str) -> None:
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO summaries (key, model, summary, created, last_used) VALUES (?, ?, ?, ?, ?)",
+            (key, model, summary, now, now),
+        )
+        self.conn.commit()
+
+    def evict(self) -> int:
+        """超過 max_entries 時刪除最久未使用的項目。"""
+        cur = self.conn.execute(
+            "DELETE FROM summaries WHERE key IN ("
+            "SELECT key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        return cur.rowcount
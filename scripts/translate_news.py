@@ -1,42 +1,209 @@
 """
 translate_news.py
-讀取當日 _news.json，使用 OpenAI API 批次翻譯標題成繁體中文並產生簡短摘要。
+讀取當日 _news.json，使用 OpenAI API 並行批次翻譯標題成繁體中文並產生簡短摘要。
 """
+import asyncio
 import json
 import os
 from datetime import datetime, timezone, timedelta
 
+import json_output
+import metrics
+from llm_client import stream_json_array
+from translation_cache import TranslationCache, cache_key
+
 TZ_TPE = timezone(timedelta(hours=8))
 TODAY = datetime.now(TZ_TPE).strftime("%Y-%m-%d")
 NEWS_FILE = os.path.join(os.path.dirname(__file__), "..", "docs", "data", f"{TODAY}_news.json")
+# run_pipeline --checkpoint 的翻譯結果另存一檔，不覆寫 news 階段的 _news.json
+TRANSLATED_FILE = os.path.join(os.path.dirname(__file__), "..", "docs", "data", f"{TODAY}_news_translated.json")
+
+MODEL = "gpt-4o-mini"
+PROMPT_VERSION = "v2"  # 修改翻譯 prompt 或模型時請遞增，使舊快取失效
+
+# 依估計 token 數切批次：輸入不超過 MAX_BATCH_TOKENS，且每批最多 MAX_BATCH_ITEMS 條
+# （每條輸出約 80-120 tokens，需落在 max_tokens=3000 之內）
+MAX_BATCH_TOKENS = 800
+MAX_BATCH_ITEMS = 20
+MAX_IN_FLIGHT = 4  # 同時進行中的 OpenAI 請求上限
+
+# index 為新聞列表中的編號（1 起算），依此對齊標題，漏掉或重複的項目不會讓後面的翻譯錯位
+TRANSLATION_SCHEMA = {"index": int, "title_zh": str, "summary_zh": str}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：英文約每 4 字元 1 token，加上編號與換行的額外成本。"""
+    return len(text) // 4 + 4
 
-BATCH_SIZE = 10
 
+def make_batches(titles: list[str]) -> list[list[int]]:
+    """依估計 token 數將標題索引切成批次。"""
+    batches = []
+    current: list[int] = []
+    used = 0
+    for i, title in enumerate(titles):
+        cost = estimate_tokens(title)
+        if current and (used + cost > MAX_BATCH_TOKENS or len(current) >= MAX_BATCH_ITEMS):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
 
-def translate_batch(client, titles: list[str]) -> list[dict]:
-    """翻譯一批新聞標題並產生摘要，回傳含 title_zh 和 summary_zh 的串列。"""
+
+async def translate_batch(client, titles: list[str], on_item=None) -> list:
+    """翻譯一批新聞標題並產生摘要，回傳與 titles 等長的 {title_zh, summary_zh} 串列。
+
+    每個元素依回覆中的 index 對齊標題；index 超出範圍或重複的元素捨棄，沒有對應翻譯的位置為 None。
+    on_item(位置, 翻譯) 在每條翻譯確認對齊時立即呼叫。
+    """
     numbered = "\n".join(f"{i + 1}. {t}" for i, t in enumerate(titles))
     prompt = (
         "請將以下新聞標題翻譯成繁體中文，並為每條新聞產生一句話簡短摘要（約20-40字）。\n\n"
-        "請以 JSON 陣列格式回覆，每個元素包含 \"title_zh\" 和 \"summary_zh\" 兩個欄位。\n"
+        "請以 JSON 陣列格式回覆，每個元素包含 \"index\"（新聞編號，整數）、\"title_zh\" 和 \"summary_zh\" 三個欄位。\n"
         "只回覆 JSON，不要加入其他文字。\n\n"
         f"新聞列表：\n{numbered}"
     )
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    results: list = [None] * len(titles)
+
+    def accept(_, item: dict) -> None:
+        i = item["index"] - 1
+        if not 0 <= i < len(titles) or results[i] is not None:
+            metrics.incr("translate.misaligned")
+            return
+        results[i] = {"title_zh": item["title_zh"], "summary_zh": item["summary_zh"]}
+        if on_item:
+            on_item(i, results[i])
+
+    await stream_json_array(
+        client,
+        label=f"translate x{len(titles)}",
+        model=MODEL,
         messages=[{"role": "user", "content": prompt}],
+        schema=TRANSLATION_SCHEMA,
+        on_item=accept,
         max_tokens=3000,
         temperature=0.3,
     )
-    raw = response.choices[0].message.content.strip()
-    # 移除可能的 markdown code block
-    if raw.startswith("```"):
-        parts = raw.split("```")
-        if len(parts) >= 2:
-            raw = parts[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-    return json.loads(raw.strip())
+    return results
+
+
+def _subset(on_item, positions: list[int]):
+    """將子批次的位置換回原批次的位置再回呼。"""
+    if on_item is None:
+        return None
+    return lambda i, item: on_item(positions[i], item)
+
+
+async def split_and_retry(client, titles: list[str], semaphore: asyncio.Semaphore, on_item=None) -> list:
+    metrics.incr("translate.split")
+    mid = len(titles) // 2
+    left, right = await asyncio.gather(
+        translate_with_split(client, titles[:mid], semaphore, on_item),
+        translate_with_split(client, titles[mid:], semaphore, _subset(on_item, list(range(mid, len(titles))))),
+    )
+    return left + right
+
+
+async def translate_with_split(client, titles: list[str], semaphore: asyncio.Semaphore, on_item=None) -> list:
+    """翻譯一批標題，回傳與 titles 等長的串列，無法翻譯的位置為 None。
+
+    回覆不是 JSON 陣列時對半切分重試；串流中途中斷、漏掉項目或部分元素不符 schema 時只重試缺少的項目。
+    """
+    try:
+        async with semaphore:
+            results = await translate_batch(client, titles, on_item)
+    except ValueError as e:
+        print(f"警告：翻譯回覆格式錯誤 ({len(titles)} 條): {e}")
+        results = None
+    except Exception as e:
+        print(f"警告：批次翻譯失敗 ({len(titles)} 條): {e}")
+        return [None] * len(titles)
+
+    if results is None:
+        if len(titles) == 1:
+            return [None]
+        return await split_and_retry(client, titles, semaphore, on_item)
+
+    failed = [i for i, item in enumerate(results) if item is None]
+    if failed and len(failed) < len(titles):
+        metrics.incr("translate.retry_missing", len(failed))
+        retried = await translate_with_split(client, [titles[i] for i in failed], semaphore, _subset(on_item, failed))
+        for i, item in zip(failed, retried):
+            results[i] = item
+    elif failed and len(titles) > 1:
+        return await split_and_retry(client, titles, semaphore, on_item)
+    return results
+
+
+async def translate_all(client, titles: list[str], on_item=None) -> list:
+    """並行翻譯所有標題，同時進行中的請求數不超過 MAX_IN_FLIGHT；on_item(標題位置, 翻譯) 於每條完成時呼叫。"""
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    batches = make_batches(titles)
+    print(f"共 {len(titles)} 條標題，分成 {len(batches)} 批並行翻譯（最多 {MAX_IN_FLIGHT} 個同時進行）...")
+    batch_results = await asyncio.gather(*(
+        translate_with_split(client, [titles[i] for i in batch], semaphore, _subset(on_item, batch))
+        for batch in batches
+    ))
+    results: list = [None] * len(titles)
+    for batch, items in zip(batches, batch_results):
+        for i, item in zip(batch, items):
+            results[i] = item
+    return results
+
+
+def translate_articles(articles: list) -> None:
+    """就地為文章加上 title_zh / summary_zh：先套用快取，未命中的再送 OpenAI 翻譯。
+
+    每條翻譯在確認對齊後立即寫入文章與快取，流程中途失敗時已完成的翻譯不會遺失。
+    """
+    with TranslationCache() as cache:
+        keys = [cache_key(a["title"], f"{PROMPT_VERSION}:{MODEL}") for a in articles]
+        cached = cache.get_many(keys)
+        print(f"翻譯快取：命中 {cache.hits}，未命中 {cache.misses}")
+        for article, key in zip(articles, keys):
+            if key in cached:
+                article.update(cached[key])
+        misses = [i for i, key in enumerate(keys) if key not in cached]
+
+        api_key = os.environ.get("OPENAI_API_KEY", "")
+        if misses and not api_key:
+            print("警告：未設定 OPENAI_API_KEY，未命中快取的標題保留英文。")
+            return
+        if not misses:
+            return
+
+        translated = 0
+
+        def store(i: int, item: dict) -> None:
+            nonlocal translated
+            article = articles[misses[i]]
+            article["title_zh"] = item["title_zh"]
+            article["summary_zh"] = item["summary_zh"]
+            cache.put_many({keys[misses[i]]: item})
+            translated += 1
+
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=api_key)
+        try:
+            asyncio.run(translate_all(client, [articles[i]["title"] for i in misses], on_item=store))
+        finally:
+            print(f"翻譯成功 {translated} / {len(misses)} 條")
+
+
+def translate_report(data: dict) -> dict:
+    """翻譯 _news.json 內容中的文章；流程發生錯誤時保留原始英文標題。"""
+    articles = data.get("articles", [])
+    if not articles:
+        print("新聞列表為空，跳過翻譯。")
+        return data
+    try:
+        translate_articles(articles)
+    except Exception as e:
+        print(f"警告：翻譯流程發生錯誤: {e}，保留原始英文標題。")
+    return data
 
 
 def main():
@@ -47,40 +214,13 @@ def main():
     with open(NEWS_FILE, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    articles = data.get("articles", [])
-    if not articles:
+    if not data.get("articles"):
         print("新聞列表為空，跳過翻譯。")
         return
 
-    api_key = os.environ.get("OPENAI_API_KEY", "")
-    if not api_key:
-        print("警告：未設定 OPENAI_API_KEY，跳過翻譯。")
-        return
-
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-
-        for i in range(0, len(articles), BATCH_SIZE):
-            batch = articles[i:i + BATCH_SIZE]
-            titles = [a["title"] for a in batch]
-            print(f"翻譯第 {i + 1}–{i + len(batch)} 篇...")
-            try:
-                results = translate_batch(client, titles)
-                for j, item in enumerate(results):
-                    if j < len(batch):
-                        articles[i + j]["title_zh"] = item.get("title_zh", "")
-                        articles[i + j]["summary_zh"] = item.get("summary_zh", "")
-            except Exception as e:
-                print(f"警告：批次翻譯失敗 (第 {i + 1} 批): {e}")
-
-        data["articles"] = articles
-        with open(NEWS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"翻譯完成，已覆寫 {NEWS_FILE}")
-
-    except Exception as e:
-        print(f"警告：翻譯流程發生錯誤: {e}，保留原始英文標題。")
+    translate_report(data)
+    json_output.write_json(NEWS_FILE, data, compact=False)
+    print(f"翻譯完成，已覆寫 {NEWS_FILE}")
 
 
 if __name__ == "__main__":
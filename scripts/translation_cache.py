@@ -0,0 +1,82 @@
+"""
+translation_cache.py
+以內容雜湊為鍵的翻譯快取（SQLite）：鍵為「正規化標題 + prompt 版本」的 SHA-256，
+值為 title_zh / summary_zh。超過容量上限時依最後使用時間淘汰最舊的項目。
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "translation_cache.sqlite3")
+MAX_ENTRIES = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    key TEXT PRIMARY KEY,
+    title_zh TEXT NOT NULL,
+    summary_zh TEXT NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def cache_key(title: str, version: str) -> str:
+    normalized = re.sub(r"\s+", " ", title).strip().lower()
+    return hashlib.sha256(f"{version}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SCHEMA)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.evict()
+        self.conn.commit()
+        self.conn.close()
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """批次查詢，回傳命中的 {key: {"title_zh", "summary_zh"}} 並更新使用時間與命中計數。"""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, title_zh, summary_zh FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            found.update({k: {"title_zh": t, "summary_zh": s} for k, t, s in rows})
+        now = time.time()
+        self.conn.executemany("UPDATE translations SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: dict[str, dict]) -> None:
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO translations (key, title_zh, summary_zh, last_used) VALUES (?, ?, ?, ?)",
+            [(k, v.get("title_zh", ""), v.get("summary_zh", ""), now) for k, v in items.items()],
+        )
+        self.conn.commit()
+
+    def evict(self) -> int:
+        """超過 max_entries 時刪除最久未使用的項目。"""
+        cur = self.conn.execute(
+            "DELETE FROM translations WHERE key IN ("
+            "SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        return cur.rowcount
@@ -0,0 +1,9 @@
+"""
+測試共用設定：與 benchmarks 相同，直接匯入 scripts/ 下的模組與 benchmarks/fake_servers。
+"""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
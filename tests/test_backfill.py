@@ -0,0 +1,56 @@
+"""
+backfill.rebuild_market 必須重現即時執行當下算出的 market 區段：即時執行在台北時間 06:00
+（UTC 前一日 22:00），價格庫中還沒有報告日期 00:00 UTC 的收盤價。
+"""
+import random
+from datetime import date, timedelta
+
+import backfill
+import fetch_market
+import indicators
+from price_store import PriceStore
+
+REPORT_DATE = date(2026, 5, 10)
+
+
+def closes(first: date, last: date, seed: int = 7) -> list[tuple[str, float]]:
+    rng = random.Random(seed)
+    price, rows = 30000.0, []
+    for i in range((last - first).days + 1):
+        price *= 1 + rng.gauss(0, 0.03)
+        rows.append(((first + timedelta(days=i)).isoformat(), round(price, 2)))
+    return rows
+
+
+def live_coin(store: PriceStore, coin_id: str, info: dict) -> dict:
+    """fetch_market.fetch_coins 的計算方式：價格庫最近 LOOKBACK_DAYS 筆日收盤價 + 即時價。"""
+    prices = store.series(coin_id, fetch_market.LOOKBACK_DAYS) + [info["current_price"]]
+    metrics = indicators.compute_all([prices], core_days=fetch_market.HISTORY_DAYS + 1)[0]
+    return fetch_market.build_coin("BTC", info, metrics)
+
+
+def test_rebuilt_day_matches_live_run(tmp_path):
+    history = closes(REPORT_DATE - timedelta(days=120), REPORT_DATE + timedelta(days=5))
+    before = [row for row in history if row[0] < REPORT_DATE.isoformat()]
+    after = history[len(before):]
+    info = {"id": "bitcoin", "current_price": before[-1][1] * 1.04,
+            "price_change_percentage_24h": 4.0, "total_volume": 3.2e10}
+
+    with PriceStore(str(tmp_path / "prices.sqlite3")) as store:
+        store.append("bitcoin", before)
+        live = live_coin(store, "bitcoin", info)
+        # 之後的執行繼續追加收盤價，包含報告日期當天與之後幾天
+        store.append("bitcoin", after)
+        assert store.last_date("bitcoin") > REPORT_DATE
+
+        market, rebuilt = backfill.rebuild_market({"date": REPORT_DATE.isoformat(), "market": [live]}, store)
+
+    assert rebuilt == 1
+    assert market == [live]
+
+
+def test_series_before_excludes_end_date(tmp_path):
+    with PriceStore(str(tmp_path / "prices.sqlite3")) as store:
+        store.append("bitcoin", [("2026-05-08", 1.0), ("2026-05-09", 2.0), ("2026-05-10", 3.0)])
+        assert store.series_before("bitcoin", "2026-05-10", 5) == [1.0, 2.0]
+        assert store.series_before("bitcoin", "2026-05-10", 1) == [2.0]
@@ -0,0 +1,52 @@
+"""
+build_index：增量更新與完整重建結果一致，且只寫入目前的 DATA_DIR。
+"""
+import os
+
+import build_index
+import json_output
+
+
+def report(day: str, price: float) -> dict:
+    return {
+        "date": day,
+        "summary": "摘要",
+        "news_count": 3,
+        "market": [{"symbol": "BTC", "current_price": price, "price_change_24h": 1.0, "rsi": 55.0, "signal": "中性"}],
+        "signals": {"fear_greed": {"value": 40}, "reddit_sentiment": {"sentiment_score": 0.1}},
+    }
+
+
+def test_update_writes_to_current_data_dir(tmp_path, monkeypatch):
+    """替換 DATA_DIR 後，索引與時間序列寫入新的目錄（不會寫到預設的 docs/data）。"""
+    monkeypatch.setattr(build_index, "DATA_DIR", str(tmp_path))
+    default_index = os.path.join(os.path.dirname(build_index.__file__), "..", "docs", "data", "index.json")
+    before = os.path.getmtime(default_index) if os.path.exists(default_index) else None
+
+    data = report("2030-01-02", 100.0)
+    json_output.write_json(str(tmp_path / "2030-01-02.json"), data)
+    build_index.update(data)
+
+    index, series = build_index.load_all(str(tmp_path))
+    assert [e["date"] for e in index["dates"]] == ["2030-01-02"]
+    assert series["columns"]["BTC.price"] == [100.0]
+    after = os.path.getmtime(default_index) if os.path.exists(default_index) else None
+    assert after == before
+
+
+def test_incremental_matches_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_index, "DATA_DIR", str(tmp_path))
+    days = ["2030-01-03", "2030-01-01", "2030-01-02"]
+    for i, day in enumerate(days):
+        data = report(day, 100.0 + i)
+        if i == 2:
+            data["market"].append({"symbol": "ETH", "current_price": 5.0, "rsi": 40.0})
+        json_output.write_json(str(tmp_path / f"{day}.json"), data)
+        build_index.update(data)
+
+    index, series = build_index.load_all(str(tmp_path))
+    rebuilt_index, rebuilt_series = build_index.rebuild(str(tmp_path))
+    assert index["dates"] == rebuilt_index["dates"]
+    assert series["dates"] == rebuilt_series["dates"] == sorted(days)
+    assert series["columns"] == rebuilt_series["columns"]
+    assert series["columns"]["ETH.price"] == [None, 5.0, None]
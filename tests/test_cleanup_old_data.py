@@ -0,0 +1,213 @@
+"""
+cleanup_old_data：在暫存目錄建立跨年份的 docs/data，確認過期檔案、月度封存內容、
+--dry-run 不改動任何檔案、--full-scan 與索引驅動的結果一致（另清除索引外的殘留檔），
+以及無法讀取的報告不封存也不刪除。
+"""
+import hashlib
+import os
+import shutil
+from datetime import date, timedelta
+
+import pytest
+
+import build_index
+import cleanup_old_data
+import json_output
+
+START = date(2024, 11, 20)
+DAYS = 500                      # 2024-11-20 .. 2026-04-03
+CUTOFF = "2025-10-01"
+
+
+def fear_greed(i: int) -> int:
+    return 20 + i % 60
+
+
+def btc_price(i: int) -> float:
+    return 50_000.0 + 100 * i
+
+
+def make_report(day: date, i: int) -> dict:
+    return {
+        "date": day.isoformat(),
+        "summary": f"{day.isoformat()} 今日重點：比特幣{'上漲' if i % 2 else '下跌'}。\n\n市場細節" + "。" * 500,
+        "news_count": 10 + i % 5,
+        "news_file": f"{day.isoformat()}.news.json",
+        "market": [
+            {"symbol": "BTC", "current_price": btc_price(i), "price_change_24h": 1.5, "rsi": 40 + i % 30,
+             "signal": "均線多頭" if i % 3 else "中性", "sma_7": 1.0},
+            {"symbol": "ETH", "current_price": 3_000.0 + i, "price_change_24h": -0.5, "rsi": None, "signal": "觀望"},
+            {"symbol": "DOGE", "error": "資料抓取失敗"},
+        ],
+        "signals": {
+            "fear_greed": {"value": fear_greed(i), "classification": "Neutral"},
+            "reddit_sentiment": {"sentiment_score": round((i % 21 - 10) / 10, 4), "posts": 300},
+            "onchain": {"btc_dominance": 50.0 + i % 7} if i % 10 else {},
+        },
+    }
+
+
+def build_tree(data_dir: str) -> dict[str, dict]:
+    """每日報告與新聞分檔，部分日期另有壓縮檔與執行量測；回傳 {日期: 報告}。"""
+    os.makedirs(data_dir)
+    reports = {}
+    for i in range(DAYS):
+        day = START + timedelta(days=i)
+        report = reports[day.isoformat()] = make_report(day, i)
+        json_output.write_json(os.path.join(data_dir, f"{day}.json"), report)
+        json_output.write_json(os.path.join(data_dir, f"{day}.news.json"), {"articles": []})
+        if i % 4 == 0:
+            json_output.write_json(os.path.join(data_dir, f"{day}_metrics.json"), {"stages": {}})
+            with open(os.path.join(data_dir, f"{day}.json.gz"), "wb") as f:
+                f.write(b"gz")
+    build_index.write(*build_index.rebuild(data_dir), data_dir)
+    # 不在索引中的殘留中間檔，只有 --full-scan 會清除
+    json_output.write_json(os.path.join(data_dir, "2024-10-02_market.json"), {"coins": []})
+    return reports
+
+
+def snapshot(data_dir: str) -> dict[str, str]:
+    result = {}
+    for root, _, files in os.walk(data_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                result[os.path.relpath(path, data_dir)] = hashlib.sha256(f.read()).hexdigest()
+    return result
+
+
+@pytest.fixture
+def tree(tmp_path):
+    data_dir = str(tmp_path / "data")
+    reports = build_tree(data_dir)
+    return data_dir, reports
+
+
+def expired_dates(reports: dict) -> list[str]:
+    return sorted(d for d in reports if d < CUTOFF)
+
+
+def test_expired_files_are_removed(tree):
+    data_dir, reports = tree
+    cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF)
+    remaining = set(os.listdir(data_dir))
+    for day in reports:
+        assert (f"{day}.json" in remaining) == (day >= CUTOFF)
+        assert (f"{day}.news.json" in remaining) == (day >= CUTOFF)
+    assert not any(n.startswith(d) for d in expired_dates(reports) for n in remaining)
+    # 索引外的殘留檔只有 --full-scan 會處理
+    assert "2024-10-02_market.json" in remaining
+
+    index, series = build_index.load_all(data_dir)
+    assert [e["date"] for e in index["dates"]] == sorted((d for d in reports if d >= CUTOFF), reverse=True)
+    assert series["dates"] == sorted(d for d in reports if d >= CUTOFF)
+    assert all(len(column) == len(series["dates"]) for column in series["columns"].values())
+
+
+def test_monthly_archive_is_downsampled(tree):
+    data_dir, reports = tree
+    cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF)
+    archive_dir = os.path.join(data_dir, cleanup_old_data.ARCHIVE_DIRNAME)
+    months = sorted({d[:7] for d in expired_dates(reports)})
+    assert sorted(os.listdir(archive_dir)) == [f"{m}.json" for m in months]
+    assert months[0] == "2024-11" and months[-1] == "2025-09"
+
+    archive = build_index.load(os.path.join(archive_dir, "2025-01.json"), {})
+    days = [d for d in reports if d.startswith("2025-01")]
+    indexes = [(date.fromisoformat(d) - START).days for d in days]
+    assert archive["month"] == "2025-01"
+    assert archive["dates"] == days
+    assert archive["news_count"] == sum(reports[d]["news_count"] for d in days)
+
+    fg = archive["signals"]["fear_greed"]
+    values = [fear_greed(i) for i in indexes]
+    assert fg["n"] == 31 and fg["min"] == min(values) and fg["max"] == max(values)
+    assert fg["mean"] == pytest.approx(sum(values) / len(values))
+    assert fg["first"] == ["2025-01-01", values[0]] and fg["last"] == ["2025-01-31", values[-1]]
+    # 每 10 天有一天沒有鏈上資料
+    assert archive["signals"]["btc_dominance"]["n"] == sum(1 for i in indexes if i % 10)
+
+    btc = archive["market"]["BTC"]
+    assert btc["price"]["first"] == ["2025-01-01", btc_price(indexes[0])]
+    assert btc["price"]["last"] == ["2025-01-31", btc_price(indexes[-1])]
+    assert sum(btc["signals"].values()) == 31
+    assert "rsi" not in archive["market"]["ETH"]          # 全為 None 的欄位不建立統計
+    assert "DOGE" not in archive["market"]
+
+    # 摘要每週（ISO 週）一則，取該週在當月最晚的一天，只留第一段
+    assert sorted(archive["headlines"]) == ["2025-W01", "2025-W02", "2025-W03", "2025-W04", "2025-W05"]
+    assert archive["headlines"]["2025-W02"]["date"] == "2025-01-12"
+    assert archive["headlines"]["2025-W05"]["date"] == "2025-01-31"
+    assert archive["headlines"]["2025-W02"]["summary"] == "2025-01-12 今日重點：比特幣上漲。"
+
+    # 封存檔遠小於原本的每日報告
+    archived = sum(os.path.getsize(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir))
+    original = sum(len(json_output.dumps(reports[d])) for d in expired_dates(reports))
+    assert archived * 10 < original
+
+
+def test_archive_does_not_double_count(tree):
+    data_dir, reports = tree
+    first = [d for d in reports if d.startswith("2025-03")]
+    cleanup_old_data.archive_days(data_dir, first[:10], dry_run=False)
+    cleanup_old_data.archive_days(data_dir, first, dry_run=False)
+    archive = build_index.load(os.path.join(data_dir, "archive", "2025-03.json"), {})
+    assert archive["dates"] == first
+    assert archive["signals"]["fear_greed"]["n"] == len(first)
+
+
+def test_dry_run_changes_nothing(tree):
+    data_dir, reports = tree
+    before = snapshot(data_dir)
+    deleted = cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF, dry_run=True, full_scan=True)
+    assert snapshot(data_dir) == before
+    assert deleted > 0
+
+
+def test_full_scan_matches_index_and_removes_strays(tree, tmp_path):
+    data_dir, reports = tree
+    other = str(tmp_path / "full")
+    shutil.copytree(data_dir, other)
+    by_index = cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF)
+    by_scan = cleanup_old_data.cleanup(other, cutoff=CUTOFF, full_scan=True)
+    assert by_scan == by_index + 1
+
+    indexed, scanned = snapshot(data_dir), snapshot(other)
+    assert set(indexed) - set(scanned) == {"2024-10-02_market.json"}
+    for name in ("index.json", "series.json"):
+        indexed.pop(name), scanned.pop(name)       # 內容相同但含 updated_at 時間戳
+    indexed.pop("2024-10-02_market.json")
+    assert indexed == scanned
+    assert build_index.load_all(data_dir)[1]["dates"] == build_index.load_all(other)[1]["dates"]
+
+
+def test_second_run_is_noop(tree):
+    data_dir, _ = tree
+    cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF)
+    before = snapshot(data_dir)
+    assert cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF) == 0
+    assert snapshot(data_dir) == before
+
+
+def test_unreadable_report_is_kept(tree, capsys):
+    data_dir, reports = tree
+    broken = "2025-02-14"
+    with open(os.path.join(data_dir, f"{broken}.json"), "w", encoding="utf-8") as f:
+        f.write('{"date": "2025-02-14", "summary": ')       # 寫到一半中斷的報告
+    cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF)
+    assert "無法讀取 2025-02-14" in capsys.readouterr().out
+
+    remaining = set(os.listdir(data_dir))
+    assert {f"{broken}.json", f"{broken}.news.json"} <= remaining
+    assert not any(n.startswith(d) for d in expired_dates(reports) if d != broken for n in remaining)
+    archive = build_index.load(os.path.join(data_dir, "archive", "2025-02.json"), {})
+    assert broken not in archive["dates"] and len(archive["dates"]) == 27
+    # 仍留在索引中，修復後下次執行再封存與刪除
+    index, _ = build_index.load_all(data_dir)
+    assert [e["date"] for e in index["dates"] if e["date"] < CUTOFF] == [broken]
+
+    json_output.write_json(os.path.join(data_dir, f"{broken}.json"), reports[broken])
+    assert cleanup_old_data.cleanup(data_dir, cutoff=CUTOFF) == 2
+    assert not any(n.startswith(broken) for n in os.listdir(data_dir))
+    archive = build_index.load(os.path.join(data_dir, "archive", "2025-02.json"), {})
+    assert len(archive["dates"]) == 28
@@ -0,0 +1,111 @@
+"""
+coingecko.get_json：同時請求相同端點只送出一次（request coalescing）、TTL 過期後重新抓取，
+以及失敗的回應不寫入快取、也不會留下讓之後的請求拿到同一個例外的 future。
+"""
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from fake_servers import FakeServer, JSONHandler
+
+import coingecko
+from rate_limiter import TokenBucket
+
+
+class Clock:
+    """取代 coingecko 模組中的 time，time() 回傳可手動推進的時間。"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+
+def make_handler(latency: float = 0.0, statuses: list | None = None):
+    """回傳 {"n": 第幾個請求}；statuses 依序指定前幾個請求的狀態碼，用完後為 200。"""
+    statuses = list(statuses or [])
+    lock = threading.Lock()
+    stats = {"requests": 0}
+
+    class Handler(JSONHandler):
+        def do_GET(self):
+            with lock:
+                stats["requests"] += 1
+                n = stats["requests"]
+                status = statuses.pop(0) if statuses else 200
+            time.sleep(latency)
+            if status != 200:
+                self.send_json({"error": "upstream failure"}, status)
+                return
+            self.send_json({"n": n, "path": self.path})
+
+    Handler.stats = stats
+    return Handler
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """將 coingecko 指向新的快取檔與不等待的限速器，回傳可設定 handler 的 serve()。"""
+    monkeypatch.setattr(coingecko, "CACHE_FILE", str(tmp_path / "coingecko_cache.sqlite3"))
+    monkeypatch.setattr(coingecko, "_cache_conn", None)
+    monkeypatch.setattr(coingecko, "LIMITER", TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(coingecko, "STATS", {"requests": 0, "cache_hits": 0, "coalesced": 0})
+    with contextlib.ExitStack() as stack:
+        def serve(handler):
+            server = stack.enter_context(FakeServer(handler))
+            monkeypatch.setattr(coingecko, "BASE_URL", server.url)
+            return handler
+
+        yield serve
+    if coingecko._cache_conn is not None:
+        coingecko._cache_conn.close()
+
+
+def test_concurrent_identical_requests_coalesce(client):
+    handler = client(make_handler(latency=0.3))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: coingecko.get_json("/global"), range(8)))
+    assert handler.stats["requests"] == 1
+    assert all(r == {"n": 1, "path": "/global"} for r in results)
+    assert coingecko.STATS["requests"] == 1
+    assert coingecko.STATS["coalesced"] + coingecko.STATS["cache_hits"] == 7
+    assert coingecko._inflight == {}
+
+    # 參數不同的請求不合併
+    coingecko.get_json("/global", {"x": "1"})
+    assert handler.stats["requests"] == 2
+
+
+def test_cached_until_ttl_expires(client, monkeypatch):
+    handler = client(make_handler())
+    clock = Clock()
+    monkeypatch.setattr(coingecko, "time", clock)
+
+    assert coingecko.get_json("/global", ttl=60)["n"] == 1
+    clock.now += 59
+    assert coingecko.get_json("/global", ttl=60)["n"] == 1
+    assert coingecko.STATS["cache_hits"] == 1
+    clock.now += 2
+    assert coingecko.get_json("/global", ttl=60)["n"] == 2
+    assert handler.stats["requests"] == 2
+    # 同一筆快取，TTL 較長的端點仍視為有效
+    assert coingecko.get_json("/global", ttl=3600)["n"] == 2
+
+
+def test_failures_are_not_cached_or_left_inflight(client):
+    handler = client(make_handler(latency=0.3, statuses=[500]))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(coingecko.get_json, "/global") for _ in range(4)]
+        errors = [f.exception() for f in futures]
+    # 等待中的請求拿到同一個失敗，但只送出一次
+    assert handler.stats["requests"] == 1
+    assert all(isinstance(e, requests.HTTPError) for e in errors)
+    assert coingecko._inflight == {}
+
+    assert coingecko.get_json("/global") == {"n": 2, "path": "/global"}
+    assert coingecko.get_json("/global") == {"n": 2, "path": "/global"}
+    assert handler.stats["requests"] == 2
@@ -0,0 +1,121 @@
+"""
+feed_stream：截止時間過濾、由新到舊時提早停止、未排序 feed 不遺漏文章，以及全文只在沒有摘要時處理。
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import feedparser
+import pytest
+from fake_servers import make_atom_feed, make_rss_feed
+
+import feed_stream
+import fetch_news
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+CUTOFF = NOW - timedelta(hours=23, minutes=30)
+
+
+def rss(items: list[str], tail: str = "</channel></rss>") -> bytes:
+    return ('<?xml version="1.0"?><rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+            "<channel><title>T</title>" + "".join(items) + tail).encode("utf-8")
+
+
+def item(hours: float | None, title: str = "", summary: str | None = "<p>Summary</p>",
+         content: str | None = None, content_first: bool = False) -> str:
+    title = title or f"story {hours}h"
+    parts = [f"<title>{title}</title>", f"<link>https://example.com/{hours}</link>"]
+    if hours is not None:
+        parts.append(f"<pubDate>{format_datetime(NOW - timedelta(hours=hours))}</pubDate>")
+    fields = []
+    if summary is not None:
+        fields.append(f"<description><![CDATA[{summary}]]></description>")
+    if content is not None:
+        fields.append(f"<content:encoded><![CDATA[{content}]]></content:encoded>")
+    parts += reversed(fields) if content_first else fields
+    return "<item>" + "".join(parts) + "</item>"
+
+
+def titles(raw: bytes) -> list[str]:
+    return [a["title"] for a in feed_stream.parse_feed(raw, CUTOFF)]
+
+
+def test_sorted_feed_stops_after_stale_limit():
+    """由新到舊：連續 STALE_LIMIT 篇過期後停止，後面（即使是格式錯誤的內容）不再讀取。"""
+    items = [item(h) for h in (1, 2, 30, 31, 32)]
+    raw = rss(items, tail=item(1, title="never read") + "<item><title>broken &nbsp;</title>")
+    assert titles(raw) == ["story 1h", "story 2h"]
+
+
+def test_unsorted_feed_keeps_late_in_window_items():
+    """順序不一致時讀完整份：排在多篇過期文章之後的新文章不會遺漏。"""
+    hours = [2, 40, 1, 30, 31, 32, 33, 3, 50, 4]
+    assert titles(rss([item(h) for h in hours])) == ["story 2h", "story 1h", "story 3h", "story 4h"]
+
+
+def test_pinned_old_item_disables_early_stop():
+    hours = [400, 1, 30, 31, 32, 2]
+    assert titles(rss([item(h) for h in hours])) == ["story 1h", "story 2h"]
+
+
+def test_undated_items_are_kept_without_published():
+    articles = feed_stream.parse_feed(rss([item(None, title="undated"), item(1)]), CUTOFF)
+    assert [a["published"] for a in articles] == [None, (NOW - timedelta(hours=1)).isoformat()]
+
+
+def test_summary_html_is_stripped_and_truncated():
+    summary = "<p>Bitcoin &amp; <b>ether</b></p><script>alert(1)</script>\n\n" + "word " * 200
+    article = feed_stream.parse_feed(rss([item(1, summary=summary)]), CUTOFF)[0]
+    assert article["summary"].startswith("Bitcoin & ether word")
+    assert len(article["summary"]) == feed_stream.SUMMARY_CHARS
+
+
+@pytest.mark.parametrize("content_first", [False, True])
+def test_content_only_used_without_summary(monkeypatch, content_first):
+    """有摘要時不處理全文（無論全文在前或在後），過期文章的欄位也不去除 HTML。"""
+    seen = []
+    strip = feed_stream.strip_html
+    monkeypatch.setattr(feed_stream, "strip_html", lambda text, limit=500: seen.append(text) or strip(text, limit))
+    raw = rss([
+        item(1, summary="<p>short</p>", content="<p>FULLTEXT</p>", content_first=content_first),
+        item(2, summary=None, content="<p>only content</p>"),
+        item(3, summary="", content="<p>empty summary</p>", content_first=content_first),
+        item(40, title="STALE", summary="<p>STALE summary</p>"),
+    ])
+    articles = feed_stream.parse_feed(raw, CUTOFF)
+    assert [a["summary"] for a in articles] == ["short", "only content", "empty summary"]
+    assert not any("FULLTEXT" in text or "STALE" in text for text in seen)
+
+
+def test_atom_fields():
+    raw = ('<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>A</title>'
+           '<entry><title type="html">Fed &lt;b&gt;holds&lt;/b&gt;</title>'
+           '<link rel="self" href="https://example.com/self"/>'
+           '<link rel="alternate" href="https://example.com/alt"/>'
+           f"<updated>{(NOW - timedelta(hours=2)).isoformat()}</updated>"
+           f"<published>{(NOW - timedelta(hours=5)).isoformat()}</published>"
+           '<content type="html">&lt;p&gt;Body&lt;/p&gt;</content></entry></feed>').encode("utf-8")
+    [article] = feed_stream.parse_feed(raw, CUTOFF)
+    assert article == {"title": "Fed holds", "link": "https://example.com/alt",
+                       "published": (NOW - timedelta(hours=5)).isoformat(), "summary": "Body"}
+
+
+@pytest.mark.parametrize("make", [make_rss_feed, make_atom_feed])
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_matches_feedparser(make, shuffle):
+    """與 feedparser 解析後過濾 24 小時的結果相同（標題、連結、時間與摘要前段）。"""
+    raw = make("src", 60, body_size=300, content_size=500, shuffle=shuffle)
+    expected = []
+    for entry in feedparser.parse(raw).entries:
+        published = fetch_news.parse_published(entry)
+        if datetime.fromisoformat(published) >= CUTOFF:
+            expected.append((entry.title, entry.link, published,
+                             feed_stream.strip_html(entry.summary)[:200]))
+    actual = [(a["title"], a["link"], a["published"], a["summary"][:200])
+              for a in feed_stream.parse_feed(raw, CUTOFF)]
+    assert len(actual) == 24
+    assert actual == expected
+
+
+def test_malformed_feed_raises_parse_error():
+    with pytest.raises(feed_stream.ParseError):
+        feed_stream.parse_feed(rss([item(1, title="Fed&nbsp;holds")]), CUTOFF)
@@ -0,0 +1,77 @@
+"""
+fetch_market：觀察清單設定的讀取與檢查、top_n 模式 symbol 重複時保留排名較前者，
+以及新幣超過 MAX_CHART_BACKFILL 個時依清單順序回補、其餘留待下次執行。
+"""
+import contextlib
+import io
+import json
+
+import pytest
+from test_price_store import chart
+
+import coingecko
+import fetch_market
+
+
+def write_config(tmp_path, config) -> str:
+    path = tmp_path / "watchlist.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+
+def test_load_watchlist(tmp_path):
+    assert fetch_market.load_watchlist(str(tmp_path / "missing.json")) == {"coins": fetch_market.COINS}
+    coins = {"coins": {"BTC": "bitcoin"}}
+    assert fetch_market.load_watchlist(write_config(tmp_path, coins)) == coins
+    assert fetch_market.load_watchlist(write_config(tmp_path, {"top_n": 3})) == {"top_n": 3}
+
+
+@pytest.mark.parametrize("config", [{}, {"coins": {}}, {"coins": None, "comment": "empty"}])
+def test_load_watchlist_rejects_empty_config(tmp_path, config):
+    with pytest.raises(ValueError, match="coins 或 top_n"):
+        fetch_market.load_watchlist(write_config(tmp_path, config))
+
+
+def test_top_n_keeps_higher_ranked_symbol(monkeypatch):
+    ranked = {
+        "bitcoin": {"id": "bitcoin", "symbol": "btc"},
+        "tether": {"id": "tether", "symbol": "usdt"},
+        "bitcoin-bep2": {"id": "bitcoin-bep2", "symbol": "BTC"},
+        "bridged-usdt": {"id": "bridged-usdt", "symbol": "usdt"},
+        "solana": {"id": "solana", "symbol": "sol"},
+    }
+    requested = []
+
+    def top_markets(n):
+        requested.append(n)
+        return ranked
+
+    monkeypatch.setattr(coingecko, "top_markets", top_markets)
+    coins, market_data = fetch_market.fetch_watchlist({"top_n": "5"})
+    assert requested == [5]
+    assert coins == {"BTC": "bitcoin", "USDT": "tether", "SOL": "solana"}
+    assert market_data is ranked
+
+
+def test_chart_backfill_deferred_beyond_limit(tmp_path, monkeypatch):
+    requests = []
+
+    def fetch_coin_chart(coin_id, days):
+        requests.append(coin_id)
+        return chart(days)
+
+    coin_ids = [f"coin-{i}" for i in range(5)]
+    monkeypatch.setattr(fetch_market, "PRICE_DB", str(tmp_path / "price_history.sqlite3"))
+    monkeypatch.setattr(fetch_market, "fetch_coin_chart", fetch_coin_chart)
+    monkeypatch.setattr(fetch_market, "MAX_CHART_BACKFILL", 2)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        histories = fetch_market.load_histories(coin_ids, {})
+        assert requests == ["coin-0", "coin-1"]
+        assert "3 個留待下次執行" in log.getvalue()
+        assert [len(h) for h in histories] == [fetch_market.LOOKBACK_DAYS] * 2 + [0] * 3
+
+        for expected in (["coin-2", "coin-3"], ["coin-4"], []):
+            requests.clear()
+            fetch_market.load_histories(coin_ids, {})
+            assert requests == expected
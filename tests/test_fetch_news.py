@@ -0,0 +1,74 @@
+"""
+fetch_news.fetch_rss：對本機假 RSS 伺服器確認條件式 GET——第二次抓取帶上 If-None-Match / If-Modified-Since，
+收到 304 後不重新解析，沿用快取文章並以當下的 CUTOFF 重新過濾。
+"""
+import contextlib
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from fake_servers import FakeServer, make_rss_feed, make_rss_handler
+
+import feed_stream
+import fetch_news
+
+N_FEEDS = 2
+N_ITEMS = 10    # 第 i 篇發布於 i 小時前
+
+
+@pytest.fixture
+def feeds(tmp_path, monkeypatch):
+    handler = make_rss_handler({f"/feed{i}.xml": make_rss_feed(f"feed{i}", N_ITEMS) for i in range(N_FEEDS)},
+                               latency=0)
+    with FakeServer(handler) as server:
+        monkeypatch.setattr(fetch_news, "RSS_FEEDS",
+                            {f"Feed{i}": f"{server.url}/feed{i}.xml" for i in range(N_FEEDS)})
+        monkeypatch.setattr(fetch_news, "FEED_CACHE_FILE", str(tmp_path / "feed_cache.json"))
+        monkeypatch.setattr(fetch_news, "CUTOFF", datetime.now(fetch_news.TZ_TPE) - timedelta(hours=24))
+        yield handler
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """記錄 feed_stream.parse_feed 的呼叫次數。"""
+    calls = []
+    parse_feed = feed_stream.parse_feed
+
+    def counted(raw, cutoff):
+        calls.append(len(raw))
+        return parse_feed(raw, cutoff)
+
+    monkeypatch.setattr(feed_stream, "parse_feed", counted)
+    return calls
+
+
+def fetch() -> list[dict]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fetch_news.fetch_rss()
+
+
+def test_second_fetch_sends_validators_and_skips_parsing(feeds, parses):
+    first = fetch()
+    assert len(first) == N_FEEDS * N_ITEMS
+    assert len(parses) == N_FEEDS
+    assert all(etag is None and since is None and status == 200 for _, etag, since, status in feeds.stats["log"])
+
+    second = fetch()
+    log = feeds.stats["log"][N_FEEDS:]
+    assert len(log) == N_FEEDS
+    assert all(etag and since and status == 304 for _, etag, since, status in log)
+    assert len(parses) == N_FEEDS
+    assert second == first
+
+
+def test_cached_articles_refiltered_by_cutoff(feeds, parses, monkeypatch):
+    first = fetch()
+    # 下次執行時截止時間為 5.5 小時前：304 沿用的快取中只剩第 0-5 篇
+    cutoff = datetime.now(fetch_news.TZ_TPE) - timedelta(hours=5, minutes=30)
+    monkeypatch.setattr(fetch_news, "CUTOFF", cutoff)
+
+    second = fetch()
+    assert feeds.stats["not_modified"] == N_FEEDS
+    assert len(parses) == N_FEEDS
+    assert second == [a for a in first if datetime.fromisoformat(a["published"]) >= cutoff]
+    assert sorted(int(a["title"].rsplit(" ", 1)[1]) for a in second) == sorted(list(range(6)) * N_FEEDS)
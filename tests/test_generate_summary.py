@@ -0,0 +1,97 @@
+"""
+generate_summary 的摘要快取：對本機假 OpenAI 伺服器確認未命中時呼叫並寫入快取、相同輸入重跑時不發出請求、
+force 時略過快取，以及未設定 API key 或呼叫失敗時的預設文字不快取、不記錄 summary_hash。
+"""
+import contextlib
+import functools
+import io
+
+import pytest
+from bench_summary_cache import sample_inputs
+from fake_servers import FakeServer, JSONHandler, make_openai_handler
+
+import generate_summary
+from summary_cache import SummaryCache
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "summary_cache.sqlite3")
+    monkeypatch.setattr(generate_summary, "SummaryCache", functools.partial(SummaryCache, path))
+    return path
+
+
+@pytest.fixture
+def openai(cache_file, monkeypatch):
+    handler = make_openai_handler(latency=0, per_item=0)
+    with FakeServer(handler) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{server.url}/v1")
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        yield handler
+
+
+def build(n_articles: int = 10, force: bool = False) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_summary.build_report(*sample_inputs(n_articles), force=force)
+
+
+def cached_keys(path: str) -> list[str]:
+    with SummaryCache(path) as cache:
+        return [key for (key,) in cache.conn.execute("SELECT key FROM summaries")]
+
+
+def test_miss_then_hit(openai, cache_file):
+    first = build()
+    assert openai.stats["requests"] == 1
+    assert first["summary"] == "今日摘要（假資料）"
+    assert cached_keys(cache_file) == [first["summary_hash"]]
+
+    rerun = build()
+    assert openai.stats["requests"] == 1
+    assert (rerun["summary"], rerun["summary_hash"]) == (first["summary"], first["summary_hash"])
+
+    changed = build(n_articles=11)
+    assert openai.stats["requests"] == 2
+    assert changed["summary_hash"] != first["summary_hash"]
+    assert sorted(cached_keys(cache_file)) == sorted([first["summary_hash"], changed["summary_hash"]])
+
+
+def test_force_skips_cache(openai, cache_file):
+    first = build()
+    forced = build(force=True)
+    assert openai.stats["requests"] == 2
+    assert forced["summary_hash"] == first["summary_hash"]
+    assert cached_keys(cache_file) == [first["summary_hash"]]
+
+
+def test_fallback_without_api_key_is_not_cached(cache_file, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    report = build()
+    assert report["summary"] == generate_summary.NO_API_KEY_SUMMARY
+    assert report["summary_hash"] is None
+    assert cached_keys(cache_file) == []
+
+
+def test_fallback_on_api_error_is_not_cached(cache_file, monkeypatch):
+    class FailingHandler(JSONHandler):
+        def do_POST(self):
+            self.send_json({"error": {"message": "invalid request", "type": "invalid_request_error"}}, 400)
+
+    with FakeServer(FailingHandler) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{server.url}/v1")
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        report = build()
+    assert report["summary"] == generate_summary.API_ERROR_SUMMARY
+    assert report["summary_hash"] is None
+    assert cached_keys(cache_file) == []
+
+
+def test_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "summary_cache.sqlite3")
+    with SummaryCache(path, max_entries=3) as cache:
+        for i in range(5):
+            cache.put(f"key{i}", generate_summary.MODEL, f"summary {i}")
+            cache.conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (i, f"key{i}"))
+        cache.get("key0")
+    with SummaryCache(path, max_entries=3) as cache:
+        assert [k for k in (f"key{i}" for i in range(5)) if cache.get(k) is not None] == ["key0", "key3", "key4"]
@@ -0,0 +1,53 @@
+"""
+http_cassette：關閉時不組錄製紀錄（不複製、不編碼回應內容），錄製後可依序回放相同的回應，
+回放找不到紀錄時視為連線失敗。
+"""
+import pytest
+import requests
+from fake_servers import FakeServer, JSONHandler
+
+import http_cassette
+
+
+class CountingHandler(JSONHandler):
+    requests = 0
+
+    def do_GET(self):
+        CountingHandler.requests += 1
+        self.send_json({"n": CountingHandler.requests, "path": self.path})
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cassette, "CASSETTE_FILE", str(tmp_path / "cassette.json"))
+    monkeypatch.setattr(http_cassette, "_cassette", None)
+    CountingHandler.requests = 0
+    with FakeServer(CountingHandler) as server:
+        yield server
+
+
+def test_off_mode_builds_no_records(server, monkeypatch):
+    monkeypatch.setattr(http_cassette, "MODE", "off")
+    monkeypatch.setattr(http_cassette.base64, "b64encode", None)    # 呼叫即失敗
+    monkeypatch.setattr(http_cassette, "request_key", None)
+    resp = http_cassette.session().get(f"{server.url}/a")
+    assert resp.json() == {"n": 1, "path": "/a"}
+    assert http_cassette._cassette is None
+
+
+def test_record_then_replay(server, monkeypatch):
+    monkeypatch.setattr(http_cassette, "MODE", "record")
+    session = http_cassette.session()
+    recorded = [session.get(f"{server.url}/a?key=secret").json() for _ in range(2)]
+    http_cassette.cassette().save()
+    assert http_cassette.cassette().recorded_at is not None
+
+    monkeypatch.setattr(http_cassette, "MODE", "replay")
+    monkeypatch.setattr(http_cassette, "_cassette", None)
+    session = http_cassette.session()
+    # 金鑰不參與比對；同一請求依錄製順序回放，用盡後重複最後一筆
+    replayed = [session.get(f"{server.url}/a?key=other").json() for _ in range(3)]
+    assert replayed == recorded + recorded[-1:]
+    assert CountingHandler.requests == 2
+    with pytest.raises(requests.ConnectionError):
+        session.get(f"{server.url}/b")
@@ -0,0 +1,138 @@
+"""
+indicators：向量化引擎的輸出與逐幣 Python 參考實作（benchmarks/bench_indicators）比對，
+以及每個已登記指標在可手算序列上的 golden value。
+"""
+import numpy as np
+import pytest
+from bench_indicators import PERCENT_FIELDS, legacy_ema_series, legacy_row, random_walk, reference_row
+
+import indicators
+
+CORE_FIELDS = indicators.REGISTRY["core"].fields
+
+
+@pytest.mark.parametrize("n_days, core_days", [(15, None), (20, None), (31, None), (91, 31), (365, 31)])
+def test_core_matches_legacy(n_days, core_days):
+    """core 欄位四捨五入後與原逐幣計算完全一致（含訊號字串）。"""
+    matrix = random_walk(200, n_days, seed=n_days)
+    actual = indicators.compute_matrix(matrix, core_days)
+    for prices, row in zip(matrix.tolist(), actual):
+        expected = legacy_row(prices[-core_days:] if core_days else prices)
+        assert {k: row[k] for k in CORE_FIELDS} == expected
+
+
+def test_core_short_series():
+    """天數不足時 RSI 為 None、訊號為觀望；不足 20 天時 SMA20 為 None。"""
+    row = indicators.compute_matrix(np.array([[1.0, 2.0, 3.0, 2.5, 2.0, 2.2, 2.4, 2.6]]))[0]
+    assert row["rsi"] is None and row["signal"] == "觀望"
+    assert row["sma7"] == pytest.approx(np.mean([2.0, 3.0, 2.5, 2.0, 2.2, 2.4, 2.6]))
+    assert row["sma20"] is None and row["ema12"] is None
+
+
+def test_rsi_without_losses_is_100():
+    row = indicators.compute_matrix(np.array([np.arange(1.0, 31.0)]))[0]
+    assert row["rsi"] == 100.0
+    assert row["signal"] == "RSI超買 / 均線多頭"
+
+
+def test_compute_all_groups_by_length():
+    walk = random_walk(3, 60, seed=7).tolist()
+    series = [walk[0], [], walk[1][:40], walk[2]]
+    results = indicators.compute_all(series, core_days=31)
+    assert results[1] is None
+    for prices, result in zip(series, results):
+        if prices:
+            assert result == indicators.compute_matrix(np.array([prices]), 31)[0]
+
+
+def _down_then_jump():
+    return [*np.linspace(200, 100, 40), 300.0, 300.0, 300.0]
+
+
+def _up_then_drop():
+    return [*np.linspace(100, 200, 40), 10.0, 10.0, 10.0]
+
+
+# 每個已登記指標的手算案例：(價格序列, 預期欄位值)
+GOLDEN = {
+    "core": [
+        ([5.0] * 31, {"high_30d": 5.0, "low_30d": 5.0, "rsi": 100.0, "sma7": 5.0, "sma20": 5.0,
+                      "ema12": 5.0, "ema26": 5.0, "signal": "RSI超買"}),
+        (list(np.arange(30.0, 0.0, -1.0)), {"rsi": 0.0, "sma7": 4.0, "sma20": 10.5, "signal": "RSI超賣 / 均線空頭"}),
+    ],
+    "macd": [
+        ([5.0] * 40, {"macd": 0.0, "macd_signal": 0.0, "macd_hist": 0.0}),
+    ],
+    "bollinger": [
+        ([5.0] * 20, {"bb_upper": 5.0, "bb_middle": 5.0, "bb_lower": 5.0, "bb_width": 0.0}),
+        # 10 / 11 交錯：均值 10.5、母體標準差 0.5
+        ([10.0, 11.0] * 10, {"bb_upper": 11.5, "bb_middle": 10.5, "bb_lower": 9.5, "bb_width": 19.05}),
+    ],
+    "volatility": [
+        # 每日固定報酬：波動率為 0
+        ([100 * 1.01 ** i for i in range(31)], {"volatility_30d": 0.0}),
+        # 對數報酬 ±ln(1.1) 交錯 30 次：樣本標準差 ln(1.1)·√(30/29)
+        ([100.0, 110.0] * 15 + [100.0], {"volatility_30d": round(np.log(1.1) * np.sqrt(30 / 29 * 365) * 100, 2)}),
+    ],
+    "atr": [
+        ([10.0, 11.0] * 15, {"atr14": 1.0, "atr14_pct": 9.09}),
+        ([5.0] * 15, {"atr14": 0.0, "atr14_pct": 0.0}),
+    ],
+    "crossovers": [
+        ([5.0] * 40, {"crossovers": []}),
+        (_down_then_jump(), {"crossovers": [{"type": "golden_cross", "days_ago": 2},
+                                            {"type": "macd_bullish", "days_ago": 2}]}),
+        (_up_then_drop(), {"crossovers": [{"type": "death_cross", "days_ago": 2},
+                                          {"type": "macd_bearish", "days_ago": 2}]}),
+    ],
+}
+
+
+def test_every_registered_indicator_has_golden_cases():
+    assert set(GOLDEN) == set(indicators.REGISTRY)
+
+
+@pytest.mark.parametrize("name, prices, expected",
+                         [(name, p, e) for name, cases in GOLDEN.items() for p, e in cases])
+def test_golden_values(name, prices, expected):
+    row = indicators.compute_matrix(np.array([prices]))[0]
+    assert set(expected) <= set(indicators.REGISTRY[name].fields)
+    for field, value in expected.items():
+        if isinstance(value, float):
+            assert row[field] == pytest.approx(value, abs=1e-9), field
+        else:
+            assert row[field] == value, field
+
+
+@pytest.mark.parametrize("name", [n for n in indicators.REGISTRY if n != "core"])
+@pytest.mark.parametrize("n_days", [34, 60, 91, 365])
+def test_matches_reference(name, n_days):
+    """MACD、布林通道、波動率、ATR 與交叉事件與逐日遞推的參考實作一致（數值至四捨五入精度）。"""
+    matrix = random_walk(100, n_days, seed=n_days)
+    for prices, row in zip(matrix.tolist(), indicators.compute_matrix(matrix)):
+        reference = reference_row(prices)
+        for field in indicators.REGISTRY[name].fields:
+            if field not in reference:
+                assert n_days < indicators.REGISTRY[name].min_days
+                continue
+            if field == "crossovers":
+                assert row[field] == reference[field]
+                continue
+            tolerance = 0.5 * 10 ** -(2 if field in PERCENT_FIELDS else 6) + 1e-9
+            assert row[field] == pytest.approx(reference[field], rel=1e-12, abs=tolerance), field
+
+
+@pytest.mark.parametrize("name", [n for n, i in indicators.REGISTRY.items() if i.min_days > 1])
+def test_short_series_gives_none(name):
+    indicator = indicators.REGISTRY[name]
+    row = indicators.compute_matrix(random_walk(2, indicator.min_days - 1))[0]
+    assert all(row[f] is None for f in indicator.fields)
+
+
+@pytest.mark.parametrize("period, steps", [(12, 1), (26, 10), (9, 60)])
+def test_ema_path_matches_recursion(period, steps):
+    matrix = random_walk(20, 60, seed=period)
+    path = indicators.ema_path(matrix, period, steps)
+    expected = [legacy_ema_series(prices, period)[-steps:] for prices in matrix.tolist()]
+    np.testing.assert_allclose(path, expected, rtol=1e-12)
+    np.testing.assert_allclose(path[:, -1], indicators.ema(matrix, period), rtol=1e-12)
@@ -0,0 +1,50 @@
+"""
+json_output：串流寫出的內容與 json.dumps 一致，預先壓縮的 .gz / .br 解壓後與原檔相同。
+"""
+import gzip
+import json
+
+import pytest
+
+import json_output
+
+DATA = {
+    "date": "2030-01-01",
+    "summary": "摘要 \"引號\" 與換行\n",
+    "articles": [{"title": f"標題 {i}", "score": i / 7} for i in range(1234)],
+    "empty": [],
+    "nested": {"a": [1, 2, {"b": None}]},
+}
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_matches_json_dumps(tmp_path, compact):
+    path = str(tmp_path / "out.json")
+    json_output.write_json(path, DATA, compact=compact)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert json.loads(text) == DATA
+    expected = json.dumps(DATA, ensure_ascii=False, separators=(",", ":")) if compact \
+        else json.dumps(DATA, ensure_ascii=False, indent=2)
+    assert text == expected
+
+
+def test_gzip_sidecar(tmp_path):
+    path = str(tmp_path / "out.json")
+    sizes = json_output.write_json(path, DATA, compress=True)
+    with open(path, "rb") as f:
+        raw = f.read()
+    with gzip.open(path + ".gz", "rb") as f:
+        assert f.read() == raw
+    assert sizes["json"] == len(raw) and sizes["gz"] < len(raw)
+
+
+def test_brotli_sidecar(tmp_path):
+    brotli = pytest.importorskip("brotli")
+    path = str(tmp_path / "out.json")
+    sizes = json_output.write_json(path, DATA, compress=True)
+    with open(path, "rb") as f:
+        raw = f.read()
+    with open(path + ".br", "rb") as f:
+        assert brotli.decompress(f.read()) == raw
+    assert sizes["br"] < len(raw)
@@ -0,0 +1,120 @@
+"""
+llm_client：JSON 陣列串流解析（任意切段、跳脫字元、截斷）與串流中斷時保留已完成的元素。
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+
+ITEMS = [
+    {"title_zh": "比特幣突破 \"10 萬\" 美元", "summary_zh": "路徑 C:\\data\\btc，含 ] 與 , 字元"},
+    {"title_zh": "以太坊 ETF 資金流入", "summary_zh": "單引號 ' 與大括號 { } 不影響解析"},
+    {"title_zh": "Solana 網路升級", "summary_zh": "換行\n與 unicode \u2603"},
+]
+REPLY = "```json\n" + json.dumps(ITEMS, ensure_ascii=False, indent=1) + "\n```"
+SCHEMA = {"title_zh": str, "summary_zh": str}
+
+
+def feed_chunks(text: str, size: int) -> list:
+    parser = llm_client.JSONArrayStreamParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    parser.close()
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, len(REPLY)])
+def test_split_chunks(size):
+    """任意位置切段（包含跳脫字元與多位元組字元中間）的結果與整段解析相同。"""
+    assert feed_chunks(REPLY, size) == ITEMS
+
+
+def test_escaped_quotes_and_brackets_inside_strings():
+    items = feed_chunks('[{"title_zh": "他說 \\"]\\" 不是結尾", "summary_zh": "a,b"}]', 5)
+    assert items == [{"title_zh": '他說 "]" 不是結尾', "summary_zh": "a,b"}]
+
+
+def test_truncated_stream_returns_completed_items():
+    """回覆在第三個元素中間截斷：前兩個元素已完成，截斷的部分不回傳。"""
+    cut = REPLY.index('"Solana')
+    parser = llm_client.JSONArrayStreamParser()
+    items = []
+    for i in range(0, cut, 4):
+        items.extend(parser.feed(REPLY[i:min(i + 4, cut)]))
+    parser.close()
+    assert items == ITEMS[:2]
+    assert not parser.finished
+
+
+def test_items_after_array_end_are_ignored():
+    assert feed_chunks('[{"a": 1}] trailing [{"b": 2}]', 3) == [{"a": 1}]
+
+
+def test_long_preamble_aborts_early():
+    parser = llm_client.JSONArrayStreamParser()
+    with pytest.raises(ValueError):
+        parser.feed("抱歉，我無法完成這個請求，因為內容不完整。" * 3)
+
+
+def test_reply_without_array_fails_on_close():
+    parser = llm_client.JSONArrayStreamParser()
+    assert parser.feed("ok") == []
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+class FakeStream:
+    """依序產生 chat.completions 串流 chunk，送完 pieces 後可拋出例外模擬連線中斷。"""
+
+    def __init__(self, pieces: list[str], error: Exception | None = None):
+        self.pieces = pieces
+        self.error = error
+
+    async def __aiter__(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+        if self.error:
+            raise self.error
+
+
+def fake_client(stream: FakeStream):
+    async def create(**kwargs):
+        return stream
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def run_stream(pieces, error=None, on_item=None):
+    client = fake_client(FakeStream(pieces, error))
+    return asyncio.run(llm_client.stream_json_array(
+        client, label="test", model="m", messages=[], schema=SCHEMA, on_item=on_item))
+
+
+def test_stream_calls_on_item_for_valid_items():
+    text = json.dumps([ITEMS[0], {"title_zh": ""}, ITEMS[1]], ensure_ascii=False)
+    seen = []
+    items = run_stream([text[i:i + 10] for i in range(0, len(text), 10)],
+                       on_item=lambda i, item: seen.append((i, item)))
+    assert items == [ITEMS[0], None, ITEMS[1]]
+    assert seen == [(0, ITEMS[0]), (2, ITEMS[1])]
+
+
+def test_stream_interrupted_returns_partial():
+    cut = REPLY.index('"Solana')
+    seen = []
+    items = run_stream([REPLY[:cut]], ConnectionError("peer closed"), on_item=lambda i, item: seen.append(i))
+    assert items == ITEMS[:2]
+    assert seen == [0, 1]
+
+
+def test_stream_failing_before_any_item_raises():
+    with pytest.raises(ConnectionError):
+        run_stream(['[{"title_zh": "未完'], ConnectionError("peer closed"))
+
+
+def test_stream_not_array_raises_value_error():
+    with pytest.raises(ValueError):
+        run_stream(["I'm sorry, but I can't help with translating these headlines today."])
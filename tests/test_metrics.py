@@ -0,0 +1,90 @@
+"""
+metrics：巢狀 span 的時間區間包含關係、例外時記錄錯誤、計數器與等待時間的彙總，
+以及 write 只把彙總寫到報告目錄、每筆 span 寫到另外的明細檔。
+"""
+import json
+import threading
+import time
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def by_name(spans: list[dict]) -> dict[str, dict]:
+    return {s["name"]: s for s in spans}
+
+
+def test_nested_spans_are_contained():
+    with metrics.span("stage.outer", kind="stage"):
+        time.sleep(0.01)
+        with metrics.span("inner", path="/a") as attrs:
+            time.sleep(0.01)
+            attrs["bytes"] = 10
+        with pytest.raises(RuntimeError):
+            with metrics.span("failing"):
+                raise RuntimeError("boom")
+
+    spans = by_name(metrics.snapshot()["spans"])
+    outer, inner, failing = spans["stage.outer"], spans["inner"], spans["failing"]
+    for child in (inner, failing):
+        assert outer["start"] <= child["start"]
+        assert child["start"] + child["duration"] <= outer["start"] + outer["duration"] + 1e-3
+        assert child["thread"] == outer["thread"]
+    assert inner["start"] + inner["duration"] <= failing["start"] + 1e-3
+    assert inner["duration"] >= 0.01 and outer["duration"] >= inner["duration"] + 0.01
+    assert (inner["path"], inner["bytes"], outer["kind"]) == ("/a", 10, "stage")
+    assert failing["error"] == "RuntimeError" and "error" not in inner
+
+
+def test_counters_timers_and_sleep_across_threads():
+    def work():
+        for _ in range(100):
+            metrics.incr("requests")
+            metrics.incr("bytes", 2.5)
+            metrics.observe("http", 0.01)
+        metrics.slept("rate_limit", 0.5)
+        metrics.slept("rate_limit", 0)     # 未等待不記錄
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    data = metrics.snapshot(date="2026-03-01")
+    assert data["counters"] == {"requests": 800, "bytes": 2000.0}
+    assert data["timers"]["http"]["count"] == 800
+    assert data["timers"]["http"]["total"] == pytest.approx(8.0)
+    assert data["timers"]["sleep.rate_limit"]["count"] == 8
+    assert data["sleep_seconds"] == pytest.approx(4.0)
+    assert data["sleep_by_reason"] == {"rate_limit": pytest.approx(4.0)}
+    assert len(data["spans"]) == 808 and data["date"] == "2026-03-01"
+    assert [s["start"] for s in data["spans"]] == sorted(s["start"] for s in data["spans"])
+
+
+def test_write_keeps_spans_out_of_summary(tmp_path, capsys):
+    with metrics.span("stage.news"):
+        metrics.incr("news.articles", 3)
+    summary_path, trace_path = tmp_path / "docs" / "metrics.json", tmp_path / "traces" / "day.json"
+    metrics.write(str(summary_path), str(trace_path), date="2026-03-01")
+
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    assert "spans" not in summary
+    assert summary["span_count"] == 1
+    assert summary["timers"]["stage.news"]["count"] == 1
+    assert summary["counters"] == {"news.articles": 3}
+    trace = json.loads(trace_path.read_text(encoding="utf-8"))
+    assert trace["date"] == "2026-03-01"
+    assert [s["name"] for s in trace["spans"]] == ["stage.news"]
+
+    metrics.write(str(tmp_path / "only_summary.json"))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["docs", "only_summary.json", "traces"]
+    assert "寫入" in capsys.readouterr().out
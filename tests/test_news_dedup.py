@@ -0,0 +1,94 @@
+"""
+news_dedup：已知的重複與不同新聞組合、由共用設定認出的幣種 anchors，以及跨日索引。
+"""
+import pytest
+
+import news_dedup
+import sentiment
+
+DUPLICATES = [
+    # 同一篇文章的不同連結
+    (("CoinDesk", "Bitcoin ETF sees record inflows", "https://www.coindesk.com/markets/btc-etf/?utm_source=x"),
+     ("CryptoPanic", "Bitcoin ETF Sees Record Inflows!", "https://coindesk.com/markets/btc-etf")),
+    # 大小寫與標點不同
+    (("CoinDesk", "SEC delays decision on Solana ETF", "https://a.example/1"),
+     ("Decrypt", "SEC Delays Decision on Solana ETF.", "https://b.example/2")),
+    # 多一兩個字
+    (("CoinDesk", "SEC approves spot Ether ETFs in landmark decision", "https://a.example/3"),
+     ("TheBlock", "SEC approves spot Ether ETFs in a landmark decision", "https://b.example/4")),
+    (("CoinDesk", "Tether mints another $1B USDT on Tron", "https://a.example/5"),
+     ("Decrypt", "Tether mints another $1B USDT on Tron network", "https://b.example/6")),
+    (("CoinDesk", "Bitcoin slips below $60K as ETF outflows mount", "https://a.example/7"),
+     ("CryptoPanic", "Bitcoin slips below $60K as ETF outflows mount | CoinDesk", "https://b.example/8")),
+]
+
+DISTINCT = [
+    ("Bitcoin hits new all-time high", "Ethereum hits new all-time high"),
+    ("Will Solana reach $200?", "Will Solana reach $500?"),
+    ("Solana price prediction: can SOL reach $200?", "Solana price prediction: can SOL reach $500?"),
+    ("Bitcoin hits new all-time high", "Bitcoin hits new all-time low"),
+    ("SEC approves spot Ether ETFs in landmark decision", "SEC rejects spot Ether ETFs in landmark decision"),
+    ("Coinbase lists new token", "Binance lists new token"),
+    ("Tether mints another $1B USDT on Tron", "Tether burns another $1B USDT on Tron"),
+]
+
+
+def article(source: str, title: str, link: str) -> dict:
+    return {"source": source, "title": title, "link": link, "published": "2026-05-10T00:00:00+00:00",
+            "summary": ""}
+
+
+@pytest.mark.parametrize("first, second", DUPLICATES)
+def test_duplicates_collapse(tmp_path, first, second):
+    kept = news_dedup.dedupe([article(*first), article(*second)], "2026-05-10", str(tmp_path / "index.json"))
+    assert len(kept) == 1
+    # 轉貼來源（CryptoPanic）排在後面，保留原始媒體
+    assert kept[0]["source"] != "CryptoPanic"
+
+
+@pytest.mark.parametrize("first, second", DISTINCT)
+def test_distinct_stories_kept(tmp_path, first, second):
+    articles = [article("CoinDesk", first, "https://a.example/1"), article("Decrypt", second, "https://b.example/2")]
+    assert len(news_dedup.dedupe(articles, "2026-05-10", str(tmp_path / "index.json"))) == 2
+
+
+def test_index_drops_repeat_but_not_related_story_next_day(tmp_path):
+    path = str(tmp_path / "index.json")
+    news_dedup.dedupe([article("CoinDesk", "Bitcoin hits new all-time high", "https://a.example/1")], "2026-05-10", path)
+    kept = news_dedup.dedupe([
+        article("Decrypt", "Bitcoin hits new all-time high!", "https://b.example/2"),
+        article("Decrypt", "Ethereum hits new all-time high", "https://b.example/3"),
+    ], "2026-05-11", path)
+    assert [a["title"] for a in kept] == ["Ethereum hits new all-time high"]
+
+
+def test_same_day_rerun_keeps_own_articles(tmp_path):
+    path = str(tmp_path / "index.json")
+    articles = [article("CoinDesk", "Bitcoin hits new all-time high", "https://a.example/1")]
+    news_dedup.dedupe(articles, "2026-05-10", path)
+    assert len(news_dedup.dedupe(articles, "2026-05-10", path)) == 1
+
+
+def test_legacy_index_entries_without_anchors(tmp_path):
+    """舊索引紀錄沒有 anchors：只以 URL / 標題雜湊比對，不以 SimHash 誤刪。"""
+    title = "SEC approves spot Ether ETFs in landmark decision"
+    path = str(tmp_path / "index.json")
+    news_dedup.save_index([{"date": "2026-05-09", "url": "a.example/1", "title": news_dedup.title_hash(title),
+                            "simhash": f"{news_dedup.simhash(title):016x}"}], path)
+    kept = news_dedup.dedupe([
+        article("Decrypt", title, "https://b.example/2"),
+        article("Decrypt", "SEC approves spot Ether ETFs in a landmark decision", "https://b.example/3"),
+    ], "2026-05-10", path)
+    assert [a["link"] for a in kept] == ["https://b.example/3"]
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("Bitcoin rally lifts ETH and $sol above $200", "BTC ETH SOL|200"),
+    ("Link wallet to Near protocol app", "|"),                  # 小寫代號不是幣種
+    ("LINK, OP and NEAR lead altcoin gains", "LINK NEAR OP|"),
+    ("XRP-based ETF filing lists btc and Ether", "BTC ETH XRP|"),
+])
+def test_anchors_from_shared_coin_config(title, expected):
+    assert news_dedup.anchors(title) == expected
+    # 與情緒分析認出的幣種一致（同一份 names / tickers 設定）
+    assert expected.split("|")[0] == " ".join(sorted(sentiment.default_lexicon().score(title).coins))
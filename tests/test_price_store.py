@@ -0,0 +1,116 @@
+"""
+price_store：sparkline_daily 由小時 sparkline 取出各日 00:00 UTC 收盤價（含尚未收盤的當天）、missing_days 的回補判斷（含上市未滿回補天數的新幣）、append(replace=False) 不覆蓋既有日期、
+prune 的保留範圍，以及 fetch_market.load_histories 不會對已完整回補的新幣每次重新請求 market_chart。
+"""
+import contextlib
+import io
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import fetch_market
+from price_store import DAY_MS, PriceStore, sparkline_daily
+
+TODAY = date(2026, 3, 1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with PriceStore(str(tmp_path / "price_history.sqlite3")) as store:
+        yield store
+
+
+def closes(end: date, n: int, price: float = 100.0) -> list[tuple[str, float]]:
+    return [((end - timedelta(days=i)).isoformat(), price + i) for i in range(n)][::-1]
+
+
+def test_sparkline_daily_buckets_midnights():
+    # 168 個小時點，最後一點為 3/1 15:20 UTC：第一點 2/22 16:20，與各日 00:00 相差 20 分鐘
+    item = {"sparkline_in_7d": {"price": [float(i) for i in range(168)]},
+            "last_updated": "2026-03-01T15:20:00.000Z"}
+    assert sparkline_daily(item) == [
+        ("2026-02-23", 8.0), ("2026-02-24", 32.0), ("2026-02-25", 56.0), ("2026-02-26", 80.0),
+        ("2026-02-27", 104.0), ("2026-02-28", 128.0), ("2026-03-01", 152.0),
+    ]
+    # 進行中的當天只有 00:00 的點；最後一點在 00:00 之前時尚未產生當天的點，缺值的 00:00 也略過
+    item["last_updated"] = "2026-02-28T23:20:00Z"
+    item["sparkline_in_7d"]["price"][120] = None
+    assert sparkline_daily(item) == [("2026-02-23", 24.0), ("2026-02-24", 48.0), ("2026-02-25", 72.0),
+                                     ("2026-02-26", 96.0), ("2026-02-28", 144.0)]
+    assert sparkline_daily({"sparkline_in_7d": {"price": [1.0]}}) == []
+    assert sparkline_daily({"last_updated": "2026-03-01T00:00:00Z"}) == []
+
+
+def test_missing_days_backfills_empty_and_short_history(store):
+    assert store.missing_days("bitcoin", TODAY, 90) == 90
+    # 只有 sparkline 的 7 天：未曾完整回補，仍需回補 90 天
+    store.append("bitcoin", closes(TODAY - timedelta(days=1), 7), replace=False)
+    assert store.missing_days("bitcoin", TODAY, 90) == 90
+
+
+def test_missing_days_uses_gap_after_full_history(store):
+    store.append("bitcoin", closes(TODAY - timedelta(days=3), 90))
+    assert store.missing_days("bitcoin", TODAY, 90) == 3
+    assert store.missing_days("bitcoin", TODAY - timedelta(days=3), 90) == 1
+    assert store.missing_days("bitcoin", TODAY + timedelta(days=400), 90) == 90
+
+
+def test_missing_days_after_backfill_of_young_coin(store):
+    # 上市 20 天的幣種：完整回補只拿得到 20 筆，記錄後只補缺口
+    store.append("young", closes(TODAY - timedelta(days=1), 20))
+    assert store.missing_days("young", TODAY, 90) == 90
+    store.mark_backfilled("young", 90)
+    assert store.missing_days("young", TODAY, 90) == 1
+    assert store.missing_days("young", TODAY + timedelta(days=5), 90) == 6
+    # 回補天數加長時需要再回補一次；較短的標記不覆蓋較長的
+    assert store.missing_days("young", TODAY, 200) == 200
+    store.mark_backfilled("young", 30)
+    assert store.backfilled_days("young") == 90
+
+
+def test_append_replace_false_keeps_existing(store):
+    store.append("bitcoin", [("2026-02-27", 100.0), ("2026-02-28", 101.0)])
+    store.append("bitcoin", [("2026-02-28", 999.0), ("2026-03-01", 102.0)], replace=False)
+    assert store.series("bitcoin", 10) == [100.0, 101.0, 102.0]
+    store.append("bitcoin", [("2026-02-28", 111.0)])
+    assert store.series("bitcoin", 10) == [100.0, 111.0, 102.0]
+    assert store.series("bitcoin", 2) == [111.0, 102.0]
+    assert store.series_before("bitcoin", "2026-03-01", 5) == [100.0, 111.0]
+
+
+def test_prune_keeps_recent_days(store):
+    store.append("bitcoin", closes(TODAY, 10))
+    store.append("ethereum", closes(TODAY, 3))
+    assert store.prune(TODAY, 5) == 10 - 6
+    assert store.count("bitcoin") == 6
+    assert store.count("ethereum") == 3
+    assert store.prune(TODAY, 5) == 0
+
+
+def chart(n_days: int) -> list:
+    """最近 n_days 個 00:00 UTC 日收盤點加上一個即時價。"""
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    last = int(midnight.timestamp() * 1000)
+    points = [[last - i * DAY_MS, 100.0 + i] for i in range(n_days)][::-1]
+    return points + [[last + 3_600_000, 150.0]]
+
+
+def test_load_histories_does_not_refetch_young_coin(tmp_path, monkeypatch):
+    requests = []
+    listed = {"bitcoin": fetch_market.LOOKBACK_DAYS + 10, "young": 20, "broken": 0}
+
+    def fetch_coin_chart(coin_id, days):
+        requests.append((coin_id, days))
+        return chart(min(days, listed[coin_id])) if listed[coin_id] else []
+
+    monkeypatch.setattr(fetch_market, "PRICE_DB", str(tmp_path / "price_history.sqlite3"))
+    monkeypatch.setattr(fetch_market, "fetch_coin_chart", fetch_coin_chart)
+    with contextlib.redirect_stdout(io.StringIO()):
+        fetch_market.load_histories(list(listed), {})
+        assert sorted(requests) == sorted((coin_id, fetch_market.LOOKBACK_DAYS) for coin_id in listed)
+
+        requests.clear()
+        histories = fetch_market.load_histories(list(listed), {})
+    # 抓取失敗的幣種下次仍完整回補；已回補的新幣只有 20 天歷史，但不再請求
+    assert requests == [("broken", fetch_market.LOOKBACK_DAYS)]
+    assert [len(h) for h in histories] == [fetch_market.LOOKBACK_DAYS, 20, 0]
@@ -0,0 +1,106 @@
+"""
+prompt_packer：措辭不同的同一事件標題併為一群、組裝後的 prompt 不超過 token 預算
+（tiktoken 編碼與字元數估計兩種計數方式），以及相同輸入的排序與 prompt 完全相同。
+"""
+import contextlib
+import io
+from datetime import datetime, timezone
+
+import pytest
+import tiktoken
+from bench_prompt import synthetic_day, synthetic_market
+
+import generate_summary
+import prompt_packer
+from prompt_packer import cluster, count_tokens, rank_stories
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def article(source: str, title: str, hours_ago: float = 1, **extra) -> dict:
+    published = datetime.fromtimestamp(NOW.timestamp() - hours_ago * 3600, tz=timezone.utc).isoformat()
+    return {"source": source, "title": title, "published": published, **extra}
+
+
+def byte_encoding() -> "tiktoken.Encoding":
+    """每個位元組一個 token 的 tiktoken 編碼，不需下載編碼檔。"""
+    return tiktoken.Encoding(
+        name="bytes", pat_str=r".", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={},
+    )
+
+
+@pytest.fixture(params=["tiktoken", "chars"])
+def counter(request, monkeypatch):
+    encoding = byte_encoding() if request.param == "tiktoken" else None
+    monkeypatch.setattr(prompt_packer, "_encodings", {generate_summary.MODEL: encoding})
+    return request.param
+
+
+def test_near_duplicate_headlines_cluster():
+    articles = [
+        article("CoinDesk", "BlackRock Bitcoin ETF Sees Record $1.2B Inflows", 1),
+        article("Decrypt", "Ethereum developers set date for Pectra upgrade", 2),
+        article("CoinTelegraph", "Record inflows hit BlackRock's bitcoin ETF", 3),
+        article("CryptoPanic", "BlackRock bitcoin ETF inflows reach record", 0.5),
+        article("TheBlock", "Solana validators vote on fee burn change", 4),
+        article("TheBlock", "Ethereum devs set Pectra upgrade date", 5),
+    ]
+    assert cluster(articles) == [[0, 2, 3], [1, 5], [4]]
+
+    stories = rank_stories(articles, ["BTC", "ETH", "SOL"], now=NOW)
+    top = stories[0]
+    assert [a["source"] for a in top.articles] == ["CoinDesk", "CoinTelegraph", "CryptoPanic"]
+    assert top.coins == ("BTC",)
+    assert top.line() == "- [CoinDesk+2] BlackRock Bitcoin ETF Sees Record $1.2B Inflows"
+    assert [len(s.articles) for s in stories] == [3, 2, 1]
+
+
+def test_translated_original_media_leads_story():
+    articles = [
+        article("CryptoPanic", "Bitcoin ETF inflows reach record high", 0.5, title_zh="比特幣 ETF 流入創新高（轉載）"),
+        article("CoinDesk", "Bitcoin ETF inflows hit record high", 1),
+        article("TheBlock", "Record high inflows for bitcoin ETF", 2, title_zh="比特幣 ETF 資金流入創紀錄"),
+    ]
+    (story,) = rank_stories(articles, now=NOW)
+    assert story.line() == "- [TheBlock+2] 比特幣 ETF 資金流入創紀錄"
+
+
+def fixed_tokens(signals: dict) -> int:
+    """不含新聞與市場段落的固定文字 token 數。"""
+    return count_tokens(generate_summary.PROMPT_TEMPLATE.format(
+        story_count=0, article_count=0, news_text="", market_text="",
+        signals_block=generate_summary.build_signals_block(signals)), generate_summary.MODEL)
+
+
+@pytest.mark.parametrize("extra", [0, 5, 40, 150, 600, 3000])
+def test_prompt_never_exceeds_budget(counter, extra):
+    articles, _ = synthetic_day(150, seed=7)
+    signals = {"fear_greed": {"value": 40, "classification": "Fear"}}
+    budget = fixed_tokens(signals) + extra
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n_coins in (5, 250):
+            prompt = generate_summary.build_prompt({"articles": articles}, synthetic_market(n_coins), signals,
+                                                   budget=budget)
+            assert count_tokens(prompt, generate_summary.MODEL) <= budget, (counter, n_coins)
+            if extra >= 600:
+                assert "- [" in prompt
+
+
+def test_count_tokens_fallback(monkeypatch):
+    monkeypatch.setattr(prompt_packer, "_encodings", {"gpt-4o-mini": None})
+    assert count_tokens("比特幣 ETF") == 3 + 1
+    assert count_tokens("a" * 9) == 3
+    monkeypatch.setattr(prompt_packer, "_encodings", {"gpt-4o-mini": byte_encoding()})
+    assert count_tokens("比特幣 ETF") == len("比特幣 ETF".encode("utf-8"))
+
+
+def test_ranking_and_prompt_are_deterministic(counter):
+    articles, _ = synthetic_day(80, seed=11)
+    market = synthetic_market(5)
+    first = rank_stories(articles, ["BTC", "ETH"], now=NOW)
+    again = rank_stories([dict(a) for a in articles], ["BTC", "ETH"], now=NOW)
+    assert [s.line() for s in first] == [s.line() for s in again]
+    assert [s.score for s in first] == sorted((s.score for s in first), reverse=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        prompts = {generate_summary.build_prompt({"articles": articles}, market, None, budget=800) for _ in range(3)}
+    assert len(prompts) == 1
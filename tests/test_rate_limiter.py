@@ -0,0 +1,147 @@
+"""
+rate_limiter：以手動推進的時鐘確認 token bucket 的等待時間、penalize 的暫停與 AIMD 速率調整、
+Retry-After（秒數與 HTTP 日期）解析與退避上限，以及 coingecko.request_with_retry 遇到 429 的重試。
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+from fake_servers import FakeServer, JSONHandler
+
+import coingecko
+import rate_limiter
+from rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+
+class FakeClock:
+    """monotonic() 回傳目前時間，sleep() 直接推進時間並記錄每次的秒數。"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RecordingBucket(TokenBucket):
+    def __init__(self, clock: FakeClock, **kwargs):
+        super().__init__(clock=clock.monotonic, sleep=clock.sleep, **kwargs)
+        self.penalties: list[float] = []
+
+    def penalize(self, delay: float) -> None:
+        self.penalties.append(delay)
+        super().penalize(delay)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_acquire_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock.monotonic, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    clock.now += 10     # 閒置期間最多累積 capacity 個 token
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_penalize_pauses_and_halves_rate(clock):
+    bucket = TokenBucket(rate=1, capacity=5, min_rate=0.2, clock=clock.monotonic, sleep=clock.sleep)
+    bucket.penalize(5)
+    assert bucket.rate == 0.5
+    # 暫停 5 秒後 token 歸零，再以減半後的速率等 2 秒
+    assert bucket.acquire() == pytest.approx(7)
+    bucket.penalize(1)
+    bucket.penalize(1)
+    assert bucket.rate == 0.2      # 不低於 min_rate
+    bucket.penalize(3)
+    bucket.penalize(1)             # 暫停時間取較晚者
+    assert bucket.acquire() == pytest.approx(3 + 5)
+
+
+def test_reward_restores_rate_additively(clock):
+    bucket = TokenBucket(rate=1, capacity=5, clock=clock.monotonic, sleep=clock.sleep)
+    bucket.penalize(0)
+    bucket.penalize(0)
+    assert bucket.rate == 0.25
+    rates = []
+    for _ in range(10):
+        bucket.reward()
+        rates.append(bucket.rate)
+    assert rates[:3] == pytest.approx([0.35, 0.45, 0.55])
+    assert rates[-1] == 1 and max(rates) == 1
+
+
+def test_default_min_rate_is_an_eighth(clock):
+    bucket = TokenBucket(rate=8, capacity=1, clock=clock.monotonic, sleep=clock.sleep)
+    for _ in range(10):
+        bucket.penalize(0)
+    assert bucket.rate == 1
+
+
+def test_parse_retry_after():
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(" 3 ") == 3
+    assert parse_retry_after(format_datetime(now + timedelta(seconds=90), usegmt=True), now=now) == 90
+    assert parse_retry_after("Sun, 01 Mar 2026 12:00:30 GMT", now=now) == 30
+    assert parse_retry_after(format_datetime(now - timedelta(minutes=5), usegmt=True), now=now) == 0
+    for value in (None, "", "soon", "-5", "1.5e3"):
+        assert parse_retry_after(value) is None
+
+
+def test_backoff_delay_is_capped(monkeypatch):
+    for attempt in range(8):
+        for _ in range(50):
+            assert 7.5 <= backoff_delay(attempt, 15, 60) <= min(60, 15 * 2 ** attempt)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    assert [backoff_delay(a, 15, 60) for a in range(5)] == [15, 30, 60, 60, 60]
+
+
+def serve_statuses(statuses: list, headers: dict | None = None):
+    lock = threading.Lock()
+
+    class Handler(JSONHandler):
+        def do_GET(self):
+            with lock:
+                status = statuses.pop(0) if statuses else 200
+            if status == 429:
+                self.send_json({"error": "Too Many Requests"}, 429, headers)
+            else:
+                self.send_json({"ok": True})
+
+    return FakeServer(Handler)
+
+
+@pytest.fixture
+def limiter(clock, monkeypatch):
+    bucket = RecordingBucket(clock, rate=10, capacity=10)
+    monkeypatch.setattr(coingecko, "LIMITER", bucket)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    return bucket
+
+
+def test_request_with_retry_honours_retry_after(limiter, clock):
+    with serve_statuses([429, 429], {"Retry-After": "7"}) as server:
+        resp = coingecko.request_with_retry(f"{server.url}/global", {})
+    assert resp.json() == {"ok": True}
+    assert limiter.penalties == [7, 7]
+    # 每次 429 暫停 7 秒，速率減半後再等一個 token
+    assert sum(clock.sleeps) == pytest.approx(7 + 1 / 5 + 7 + 1 / 2.5)
+    assert limiter.rate == pytest.approx(2.5 + 1)      # 成功一次後回升 base_rate / 10
+
+
+def test_request_with_retry_backs_off_without_header(limiter):
+    with serve_statuses([429] * 4) as server:
+        with pytest.raises(requests.HTTPError):
+            coingecko.request_with_retry(f"{server.url}/global", {}, max_retries=4)
+    assert limiter.penalties == [15, 30, 60, 60]
@@ -0,0 +1,134 @@
+"""
+reddit：對本機假 Reddit listing 伺服器確認 after 游標分頁、每個 subreddit 的請求上限，
+以及 X-Ratelimit-Remaining 用完與 429 時的暫停、退避與重試。
+"""
+import contextlib
+import io
+import threading
+
+import pytest
+from fake_servers import FakeServer, make_reddit_handler
+
+import reddit
+from rate_limiter import TokenBucket
+
+
+class RecordingLimiter(TokenBucket):
+    """記錄 penalize 的暫停秒數但不真的暫停，測試不必等待 Retry-After / X-Ratelimit-Reset。"""
+
+    def __init__(self):
+        super().__init__(rate=1000, capacity=1000)
+        self.penalties: list[float] = []
+        self.rewards = 0
+
+    def penalize(self, delay: float) -> None:
+        self.penalties.append(delay)
+        super().penalize(0)
+
+    def reward(self) -> None:
+        self.rewards += 1
+        super().reward()
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(reddit, "LIMITER", limiter)
+    monkeypatch.setattr(reddit, "PAGE_SIZE", 100)
+    monkeypatch.setattr(reddit, "MAX_PAGES", 5)
+    return limiter
+
+
+@contextlib.contextmanager
+def serve(monkeypatch, **kwargs):
+    handler = make_reddit_handler(latency=0, **kwargs)
+    with FakeServer(handler) as server:
+        monkeypatch.setattr(reddit, "BASE_URL", server.url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield handler
+
+
+def collect(subreddits, max_pages=None) -> tuple[dict, dict]:
+    posts: dict[str, list] = {}
+    lock = threading.Lock()
+
+    def handle(subreddit, post):
+        with lock:
+            posts.setdefault(subreddit, []).append(post["id"])
+
+    return reddit.ingest(handle, subreddits, max_pages), posts
+
+
+def test_after_pagination(monkeypatch, limiter):
+    with serve(monkeypatch, posts_per_sub=250) as handler:
+        result, posts = collect(["Bitcoin", "solana"])
+    assert result == {"Bitcoin": {"posts": 250}, "solana": {"posts": 250}}
+    for sub in ("Bitcoin", "solana"):
+        assert posts[sub] == [f"{sub}_{i}" for i in range(250)]
+        # 第一頁不帶 after，之後帶上一頁最後一篇的 fullname；最後一頁 after 為 null 時停止
+        assert [a for s, a, _ in handler.stats["log"] if s == sub] == [None, f"t3_{sub}_99", f"t3_{sub}_199"]
+    assert limiter.penalties == [] and limiter.rewards == 6
+
+
+def test_empty_listing_stops(monkeypatch, limiter):
+    with serve(monkeypatch, posts_per_sub=0) as handler:
+        result, posts = collect(["Bitcoin"])
+    assert result == {"Bitcoin": {"posts": 0}} and posts == {}
+    assert handler.stats["requests"] == 1
+
+
+@pytest.mark.parametrize("max_pages", [1, 3])
+def test_request_cap(monkeypatch, limiter, max_pages):
+    with serve(monkeypatch, posts_per_sub=1000) as handler:
+        result, _ = collect(["Bitcoin", "ethereum", "solana"], max_pages)
+    assert all(r == {"posts": max_pages * 100} for r in result.values())
+    assert handler.stats["requests"] == 3 * max_pages
+
+
+def test_default_page_cap(monkeypatch, limiter):
+    monkeypatch.setattr(reddit, "MAX_PAGES", 2)
+    with serve(monkeypatch, posts_per_sub=1000) as handler:
+        result, _ = collect(["Bitcoin"])
+    assert result == {"Bitcoin": {"posts": 200}}
+    assert handler.stats["requests"] == 2
+
+
+def test_pauses_when_ratelimit_remaining_is_zero(monkeypatch, limiter):
+    """每分鐘 2 次：第二個回應 X-Ratelimit-Remaining 為 0，依 X-Ratelimit-Reset 暫停所有請求。"""
+    with serve(monkeypatch, posts_per_sub=200, rate_per_minute=2) as handler:
+        result, _ = collect(["Bitcoin"])
+    assert result == {"Bitcoin": {"posts": 200}}
+    assert handler.stats["rate_limited"] == 0
+    assert len(limiter.penalties) == 1 and 55 <= limiter.penalties[0] <= 60
+    assert limiter.rewards == 1
+
+
+def test_retries_429_with_retry_after(monkeypatch, limiter):
+    with serve(monkeypatch, posts_per_sub=250, reject=(2,), retry_after="7") as handler:
+        result, posts = collect(["Bitcoin"])
+    assert result == {"Bitcoin": {"posts": 250}}
+    assert posts["Bitcoin"] == [f"Bitcoin_{i}" for i in range(250)]
+    # 被拒的第二頁以同一個 after 重試
+    assert handler.stats["log"] == [("Bitcoin", None, 200), ("Bitcoin", "t3_Bitcoin_99", 429),
+                                    ("Bitcoin", "t3_Bitcoin_99", 200), ("Bitcoin", "t3_Bitcoin_199", 200)]
+    assert limiter.penalties == [7.0]
+
+
+def test_429_without_retry_after_uses_exponential_backoff(monkeypatch, limiter):
+    with serve(monkeypatch, posts_per_sub=50, reject=(1, 2, 3), retry_after=None):
+        result, _ = collect(["Bitcoin"])
+    assert result == {"Bitcoin": {"posts": 50}}
+    base, cap = reddit.RETRY_BASE_WAIT, reddit.RETRY_MAX_WAIT
+    assert len(limiter.penalties) == 3
+    for attempt, delay in enumerate(limiter.penalties):
+        assert base / 2 <= delay <= min(cap, base * 2 ** attempt)
+
+
+def test_gives_up_after_max_retries_without_affecting_other_subreddits(monkeypatch, limiter):
+    monkeypatch.setattr(reddit, "MAX_WORKERS", 1)       # 依序抓取，前 4 個請求都屬於第一個 subreddit
+    with serve(monkeypatch, posts_per_sub=150, reject=(1, 2, 3, 4)) as handler:
+        result, posts = collect(["Bitcoin", "solana"])
+    assert "error" in result["Bitcoin"] and result["Bitcoin"]["posts"] == 0
+    assert result["solana"] == {"posts": 150}
+    assert [s for s, _, status in handler.stats["log"] if status == 429] == ["Bitcoin"] * 4
+    assert limiter.penalties == [3.0] * 4
@@ -0,0 +1,80 @@
+"""
+report_writer --migrate：以 docs/data 中已提交的舊格式報告遷移，headline 加上 news 分檔可還原原始報告，
+build_index 與 signal_store 讀到的資料與遷移前相同，重複執行不再改寫。
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+import build_index
+import report_writer
+import signal_store
+
+ARCHIVE = os.path.join(os.path.dirname(__file__), "..", "docs", "data")
+
+
+def legacy_dates(n: int = 5) -> list[str]:
+    dates = []
+    for name in sorted(os.listdir(ARCHIVE)):
+        if report_writer.REPORT_RE.match(name):
+            with open(os.path.join(ARCHIVE, name), "r", encoding="utf-8") as f:
+                if "news" in json.load(f):
+                    dates.append(name[:-len(".json")])
+    return dates[-n:]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    dates = legacy_dates()
+    if not dates:
+        pytest.skip("docs/data 中沒有舊格式報告")
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for date in dates:
+        shutil.copy(os.path.join(ARCHIVE, f"{date}.json"), data_dir / f"{date}.json")
+    return str(data_dir), dates
+
+
+def load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def readers(data_dir: str, db_path: str) -> tuple:
+    """build_index 完整重建的索引與時間序列，以及 signal_store 由報告匯入後的統計。"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        index, series = build_index.rebuild(data_dir)
+    with signal_store.SignalStore(db_path) as store:
+        signal_store.seed(store, data_dir)
+        stats = {name: store.stats(name) for name in signal_store.SERIES}
+    return index, series, stats
+
+
+def test_migrate_round_trip(archive, tmp_path):
+    data_dir, dates = archive
+    originals = {date: load(os.path.join(data_dir, f"{date}.json")) for date in dates}
+    before = readers(data_dir, str(tmp_path / "before.sqlite3"))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert report_writer.migrate(data_dir, dry_run=True) == len(dates)
+        assert load(os.path.join(data_dir, f"{dates[0]}.json")) == originals[dates[0]]
+        assert report_writer.migrate(data_dir) == len(dates)
+
+    for date, original in originals.items():
+        headline = load(os.path.join(data_dir, f"{date}.json"))
+        assert "news" not in headline
+        assert headline["news_count"] == len(original["news"])
+        news = load(os.path.join(data_dir, headline["news_file"]))
+        restored = {k: v for k, v in headline.items() if k not in ("news_count", "news_file")}
+        assert {**restored, "news": news["news"]} == original
+        with gzip.open(os.path.join(data_dir, f"{date}.json.gz"), "rt", encoding="utf-8") as f:
+            assert json.load(f) == headline
+
+    assert readers(data_dir, str(tmp_path / "after.sqlite3")) == before
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert report_writer.migrate(data_dir) == 0
@@ -0,0 +1,212 @@
+"""
+以 tests/fixtures/pipeline_cassette.json 回放完整的 run_pipeline：不連線，確認各階段依 DAG 相依關係執行、
+所有階段成功，並寫出每日報告、新聞分檔、索引與 metrics；另確認 translate 不改動 signals 讀取的新聞，
+--checkpoint 各階段寫入不同檔案。
+
+cassette 由假伺服器錄製（固定埠號，與 bench_pipeline 相同）；依時間變化的請求參數與截止時間
+以 cassette 的錄製時間固定。重新錄製：
+
+    python benchmarks/bench_pipeline.py --runs 1 --feeds 2 --items 8 --reddit-posts 20 \\
+        --latency 0 --llm-latency 0 --record tests/fixtures/pipeline_cassette.json
+"""
+import functools
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import build_index
+import coingecko
+import fetch_market
+import fetch_news
+import fetch_signals
+import generate_summary
+import http_cassette
+import news_dedup
+import prompt_packer
+import reddit
+import run_pipeline
+import translate_news
+from bench_pipeline import upstream_urls
+from rate_limiter import TokenBucket
+from summary_cache import SummaryCache
+from translation_cache import TranslationCache
+
+CASSETTE = os.path.join(os.path.dirname(__file__), "fixtures", "pipeline_cassette.json")
+PORT_BASE = 18700
+N_FEEDS = 2
+
+
+def frozen_datetime(now: datetime) -> type:
+    """now() 固定為 now 的 datetime。"""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now.astimezone(tz) if tz else now.replace(tzinfo=None)
+
+    return FrozenDatetime
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """所有上游指向 cassette 回放、狀態檔與輸出寫入 tmp_path、時鐘固定在錄製時間，回傳報告日期。"""
+    with open(CASSETTE, "r", encoding="utf-8") as f:
+        recorded_at = datetime.fromisoformat(json.load(f)["recorded_at"])
+    monkeypatch.setattr(http_cassette, "MODE", "replay")
+    monkeypatch.setattr(http_cassette, "CASSETTE_FILE", CASSETTE)
+    monkeypatch.setattr(http_cassette, "_cassette", None)
+
+    now = frozen_datetime(recorded_at)
+    for module in (fetch_news, fetch_market, fetch_signals, generate_summary, prompt_packer, build_index):
+        monkeypatch.setattr(module, "datetime", now)
+    today = recorded_at.astimezone(fetch_news.TZ_TPE).strftime("%Y-%m-%d")
+    for module in (fetch_news, fetch_market, fetch_signals, generate_summary, translate_news):
+        monkeypatch.setattr(module, "TODAY", today)
+    monkeypatch.setattr(fetch_news, "CUTOFF", recorded_at.astimezone(fetch_news.TZ_TPE) - timedelta(hours=24))
+
+    urls = upstream_urls(PORT_BASE)
+    monkeypatch.setattr(coingecko, "BASE_URL", urls["coingecko"])
+    monkeypatch.setattr(coingecko, "CACHE_FILE", str(tmp_path / "coingecko_cache.sqlite3"))
+    monkeypatch.setattr(coingecko, "_cache_conn", None)
+    monkeypatch.setattr(coingecko, "LIMITER", TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(fetch_market, "PRICE_DB", str(tmp_path / "price_history.sqlite3"))
+
+    monkeypatch.setattr(fetch_news, "RSS_FEEDS", {f"Feed{i}": f"{urls['rss']}/feed{i}.xml" for i in range(N_FEEDS)})
+    monkeypatch.setattr(fetch_news, "FEED_CACHE_FILE", str(tmp_path / "feed_cache.json"))
+    monkeypatch.setattr(fetch_news, "CRYPTOPANIC_URL", f"{urls['cryptopanic']}/api/v1/posts/")
+    monkeypatch.setattr(fetch_news, "CRYPTOPANIC_API_KEY", "bench")
+    monkeypatch.setattr(fetch_news, "dedupe",
+                        functools.partial(news_dedup.dedupe, index_path=str(tmp_path / "news_index.json")))
+    monkeypatch.setattr(translate_news, "TranslationCache",
+                        functools.partial(TranslationCache, str(tmp_path / "translation_cache.sqlite3")))
+    monkeypatch.setattr(generate_summary, "SummaryCache",
+                        functools.partial(SummaryCache, str(tmp_path / "summary_cache.sqlite3")))
+
+    monkeypatch.setattr(fetch_signals, "SIGNAL_DB", str(tmp_path / "signal_history.sqlite3"))
+    monkeypatch.setattr(fetch_signals, "FEAR_GREED_URL", f"{urls['fear_greed']}/fng/")
+    monkeypatch.setattr(reddit, "BASE_URL", urls["reddit"])
+    monkeypatch.setattr(reddit, "LIMITER", TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{urls['openai']}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "bench")
+
+    data_dir = str(tmp_path / "docs")
+    monkeypatch.setattr(generate_summary, "DATA_DIR", data_dir)
+    monkeypatch.setattr(generate_summary, "OUTPUT_FILE", os.path.join(data_dir, f"{today}.json"))
+    monkeypatch.setattr(build_index, "DATA_DIR", data_dir)
+    monkeypatch.setattr(run_pipeline, "METRICS_FILE", os.path.join(data_dir, f"{today}_metrics.json"))
+    monkeypatch.setattr(run_pipeline, "TRACE_FILE", str(tmp_path / "traces" / f"{today}.json"))
+    monkeypatch.setattr(sys, "argv", ["run_pipeline.py"])
+    return today
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """記錄各階段開始與結束的順序：[("start" | "end", 階段名稱), ...]。"""
+    log, lock = [], threading.Lock()
+    run_stage = run_pipeline.run_stage
+
+    def logged(name, func, inputs):
+        with lock:
+            log.append(("start", name))
+        try:
+            return run_stage(name, func, inputs)
+        finally:
+            with lock:
+                log.append(("end", name))
+
+    monkeypatch.setattr(run_pipeline, "run_stage", logged)
+    return log
+
+
+def test_stages_follow_dag_dependencies(replay, events):
+    run_pipeline.main()
+
+    assert sorted(name for kind, name in events if kind == "end") == sorted(run_pipeline.STAGES)
+    for name, (deps, _) in run_pipeline.STAGES.items():
+        started = events.index(("start", name))
+        for dep in deps:
+            assert events.index(("end", dep)) < started, f"{name} 在 {dep} 完成前開始"
+    # summary 間接依賴 news，須等四個上游階段全部完成
+    started = events.index(("start", "summary"))
+    assert all(events.index(("end", name)) < started for name in ("news", "translate", "market", "signals"))
+    assert events[-1] == ("end", "summary")
+
+
+def test_outputs_written_from_replayed_responses(replay):
+    today = replay
+    run_pipeline.main()
+
+    data_dir = generate_summary.DATA_DIR
+    for name in (f"{today}.json", f"{today}.json.gz", f"{today}.news.json", "index.json", "series.json",
+                 f"{today}_metrics.json"):
+        assert os.path.exists(os.path.join(data_dir, name)), name
+    assert not any(name.startswith(f"{today}_") and name != f"{today}_metrics.json" for name in os.listdir(data_dir))
+
+    with open(os.path.join(data_dir, f"{today}.json"), "r", encoding="utf-8") as f:
+        headline = json.load(f)
+    with open(os.path.join(data_dir, headline["news_file"]), "r", encoding="utf-8") as f:
+        news = json.load(f)["news"]
+    assert headline["date"] == today
+    assert headline["summary"] == "今日摘要（假資料）"
+    assert headline["news_count"] == len(news) > 0
+    assert all(a["title_zh"] == f"譯：{a['title']}" for a in news)
+    assert [c["symbol"] for c in headline["market"]] == list(fetch_market.load_watchlist()["coins"])
+    assert all("error" not in c and c["current_price"] is not None for c in headline["market"])
+    assert headline["signals"]["fear_greed"]["value"] is not None
+    assert headline["signals"]["reddit_sentiment"]["posts"] > 0
+
+    with open(os.path.join(data_dir, "index.json"), "r", encoding="utf-8") as f:
+        assert today in json.dumps(json.load(f), ensure_ascii=False)
+    with open(os.path.join(data_dir, f"{today}_metrics.json"), "r", encoding="utf-8") as f:
+        report_metrics = json.load(f)
+    assert report_metrics["failed_stages"] == []
+    assert report_metrics["traffic"]
+    # docs/ 只放彙總，每筆 span 寫到 data/traces/
+    stage_timers = {f"stage.{name}" for name in run_pipeline.STAGES}
+    assert "spans" not in report_metrics
+    assert stage_timers <= set(report_metrics["timers"])
+    with open(run_pipeline.TRACE_FILE, "r", encoding="utf-8") as f:
+        spans = json.load(f)["spans"]
+    assert len(spans) == report_metrics["span_count"] > len(stage_timers)
+
+
+def test_translate_does_not_mutate_shared_news(tmp_path, monkeypatch):
+    articles = [{"title": f"headline {i}"} for i in range(3)]
+    translated = threading.Event()
+    seen_by_signals = []
+
+    def translate_report(data):
+        for a in data["articles"]:
+            a["title_zh"] = f"譯：{a['title']}"
+        translated.set()
+        return data
+
+    def collect_signals(news):
+        # translate 完成後才讀取新聞，確認 signals 拿到的文章沒有被改動
+        translated.wait(5)
+        seen_by_signals.extend(dict(a) for a in news["articles"])
+        return {"date": "2026-01-01"}
+
+    monkeypatch.setattr(fetch_news, "collect", lambda: {"date": "2026-01-01", "articles": articles})
+    monkeypatch.setattr(translate_news, "translate_report", translate_report)
+    monkeypatch.setattr(fetch_market, "collect", lambda: {"date": "2026-01-01", "coins": []})
+    monkeypatch.setattr(fetch_signals, "collect", collect_signals)
+    monkeypatch.setattr(generate_summary, "build_report", lambda news, market, signals, force=False: news)
+    # 各階段寫入不同的 checkpoint 檔
+    assert len({os.path.abspath(p) for p in run_pipeline.CHECKPOINTS.values()}) == len(run_pipeline.CHECKPOINTS)
+    paths = {name: str(tmp_path / f"{name}.json") for name in run_pipeline.CHECKPOINTS}
+    monkeypatch.setattr(run_pipeline, "CHECKPOINTS", paths)
+
+    results = run_pipeline.run_stages(run_pipeline.STAGES, checkpoint=True)
+
+    assert seen_by_signals == [{"title": f"headline {i}"} for i in range(3)]
+    assert all("title_zh" not in a for a in results["news"]["articles"])
+    assert all(a["title_zh"] == f"譯：{a['title']}" for a in results["summary"]["articles"])
+    for name, path in paths.items():
+        with open(path, "r", encoding="utf-8") as f:
+            assert json.load(f) == results[name], name
+
@@ -0,0 +1,56 @@
+"""
+sentiment：以固定案例（tests/fixtures/sentiment_cases.json）確認詞庫評分，以及片語首字與程度副詞、否定詞重疊時的行為。
+"""
+import json
+import os
+
+import pytest
+
+import sentiment
+
+CASES_FILE = os.path.join(os.path.dirname(__file__), "fixtures", "sentiment_cases.json")
+with open(CASES_FILE, encoding="utf-8") as f:
+    CASES = json.load(f)
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return sentiment.default_lexicon()
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c["text"] for c in CASES])
+def test_fixture_scores(lexicon, case):
+    result = lexicon.score(case["text"])
+    assert result.compound == pytest.approx(case["compound"], abs=1e-4)
+    assert result.hits == case["hits"]
+    assert sorted(result.coins) == case["coins"]
+
+
+@pytest.mark.parametrize("booster", ["huge", "record", "massive", "very"])
+def test_intensifier_amplifies_term(lexicon, booster):
+    """程度副詞（含同時是片語首字的 huge、record）放大其後的情緒詞。"""
+    assert lexicon.score(f"{booster} rally").compound > lexicon.score("rally").compound
+    assert lexicon.score(f"{booster} crash").compound < lexicon.score("crash").compound
+
+
+def test_phrase_still_matches_after_fallback(lexicon):
+    """片語首字保留原本的查詢結果後，完整片語仍以片語權重計分。"""
+    assert lexicon.score("huge win").compound != lexicon.score("huge").compound
+    assert lexicon.score("record high").hits == 1
+    assert lexicon.score("bull run").compound > 0
+
+
+@pytest.mark.parametrize("text", ["rally", "bullish", "huge rally", "going to the moon"])
+def test_negation_flips_sign(lexicon, text):
+    assert lexicon.score(f"not {text}").compound < 0 < lexicon.score(text).compound
+
+
+def test_ticker_needs_symbol_prefix_for_common_words(lexicon):
+    assert lexicon.score("link is going up").coins == ()
+    assert lexicon.score("$LINK pumps").coins == ("LINK",)
+
+
+def test_neutral_text(lexicon):
+    result = lexicon.score("The committee meets on Tuesday")
+    assert result.compound == 0.0 and result.hits == 0
+    assert sentiment.label(result.compound) == "中立"
@@ -0,0 +1,153 @@
+"""
+signal_store：增量滾動統計與 window_stats 對照點資料暴力重算（含點離開視窗與長時間中斷）、
+狀態切換的緩衝區、append 不改寫已存在的日期，以及由每日報告匯入與 _rebuild 重算狀態。
+"""
+import contextlib
+import io
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from bench_signal_store import brute_force, matches, synthetic_days, write_reports
+from fake_servers import FakeServer, JSONHandler
+
+import fetch_signals
+import signal_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    with signal_store.SignalStore(str(tmp_path / "signal_history.sqlite3")) as store:
+        yield store
+
+
+def days_from(start: str, values: list) -> list[tuple[str, float]]:
+    first = date.fromisoformat(start)
+    return [((first + timedelta(days=i)).isoformat(), v) for i, v in enumerate(values)]
+
+
+def test_rolling_windows_match_brute_force(store):
+    days = synthetic_days(400)
+    for i, (day, fear_greed, score) in enumerate(days):
+        store.append("fear_greed", [(day, fear_greed)])
+        store.append("reddit_sentiment", [(day, score)])
+        if i % 20 == 0 or i == len(days) - 1:
+            for series in ("fear_greed", "reddit_sentiment"):
+                assert matches(store.stats(series), brute_force(store, series, day)), (series, day)
+
+
+def test_points_leave_windows_after_gap(store):
+    store.append("fear_greed", days_from("2026-01-01", [10] * 100))
+    # 中斷 60 天：7 / 30 日視窗只剩新的一點，90 日視窗仍含舊點的尾段
+    store.append("fear_greed", [("2026-06-09", 90)])
+    stats = store.stats("fear_greed")
+    assert stats["windows"]["7"]["count"] == stats["windows"]["30"]["count"] == 1
+    assert stats["windows"]["7"]["mean"] == 90 and stats["windows"]["7"]["std"] == 0
+    assert stats["windows"]["90"]["count"] == len(store.query("fear_greed", "2026-03-12", "2026-06-09"))
+    assert matches(stats, brute_force(store, "fear_greed", "2026-06-09"))
+
+    # 中斷超過最長視窗：所有視窗只剩新的一點，和與平方和歸零重算
+    store.append("fear_greed", [("2026-12-01", 30)])
+    stats = store.stats("fear_greed")
+    for window in stats["windows"].values():
+        assert (window["count"], window["mean"], window["std"], window["percentile"]) == (1, 30, 0, 50)
+
+
+def test_window_stats_match_numpy(store):
+    days = synthetic_days(300, seed=3)
+    store.append("reddit_sentiment", [(day, score) for day, _, score in days])
+    end = days[-1][0]
+    for w in (7, 45, 120, 1000):
+        start = (date.fromisoformat(end) - timedelta(days=w - 1)).isoformat()
+        values = np.array([score for day, _, score in days if start <= day <= end])
+        stats = store.window_stats("reddit_sentiment", w)
+        assert stats["count"] == len(values)
+        assert stats["mean"] == pytest.approx(values.mean(), abs=1e-4)
+        assert stats["std"] == pytest.approx(values.std(), abs=1e-4)
+        assert (stats["min"], stats["max"]) == (values.min(), values.max())
+        for q in (10, 50, 90):
+            assert stats[f"p{q}"] == pytest.approx(np.percentile(values, q), abs=1e-4)
+
+    # 指定 end 時只看 end 之前的視窗，之後的點不影響
+    end = days[150][0]
+    start = (date.fromisoformat(end) - timedelta(days=29)).isoformat()
+    values = np.array([score for day, _, score in days if start <= day <= end])
+    stats = store.window_stats("reddit_sentiment", 30, end=end)
+    assert stats["count"] == len(values) and stats["max"] == values.max()
+    assert store.window_stats("news_sentiment", 30) == {}
+
+
+def test_regime_hysteresis(store):
+    # 中立區間為 45-55（邊界 56），緩衝 2：7 日均線到 57 仍維持中立，58 以上才切換為貪婪
+    store.append("fear_greed", days_from("2026-01-01", [50] * 10))
+    assert store.stats("fear_greed")["regime"] == "中立"
+    store.append("fear_greed", days_from("2026-01-11", [57] * 20))
+    assert store.stats("fear_greed")["regime"] == "中立"
+    assert store.regime_changes("fear_greed") == [("2026-01-01", "中立")]
+
+    store.append("fear_greed", days_from("2026-01-31", [60] * 10))
+    stats = store.stats("fear_greed")
+    assert stats["regime"] == "貪婪"
+    # 均線由 57 往 60 移動，第 3 天超過 58
+    assert stats["regime_since"] == "2026-02-02"
+
+    # 回落到 54-55 仍在貪婪區間下緣的緩衝內
+    store.append("fear_greed", days_from("2026-02-10", [54.5] * 20))
+    assert store.stats("fear_greed")["regime"] == "貪婪"
+    store.append("fear_greed", days_from("2026-03-02", [50] * 10))
+    assert [regime for _, regime in store.regime_changes("fear_greed")] == ["中立", "貪婪", "中立"]
+
+
+def test_append_ignores_dates_not_after_last(store):
+    assert store.append("fear_greed", [("2026-01-10", 40), ("2026-01-09", 30)]) == 2
+    assert store.append("fear_greed", [("2026-01-05", 1), ("2026-01-10", 99), ("2026-01-11", 50)]) == 1
+    assert store.append("fear_greed", [("2026-01-12", None)]) == 0
+    assert store.query("fear_greed") == [("2026-01-09", 30), ("2026-01-10", 40), ("2026-01-11", 50)]
+    assert store.last_date("fear_greed") == date(2026, 1, 11)
+    stats = store.stats("fear_greed")
+    assert stats["count"] == 3 and stats["windows"]["7"]["mean"] == 40
+
+
+def test_seed_from_reports_and_rebuild(tmp_path, store):
+    data_dir = str(tmp_path / "docs")
+    days = synthetic_days(200, seed=5)
+    write_reports(data_dir, days)
+
+    added = signal_store.seed(store, data_dir)
+    assert added["fear_greed"] == added["reddit_sentiment"] == added["news_sentiment"] == len(days)
+    assert signal_store.seed(store, data_dir) == {series: 0 for series in signal_store.SERIES}
+
+    with signal_store.SignalStore(str(tmp_path / "direct.sqlite3")) as direct:
+        for day, fear_greed, score in days:
+            direct.append("fear_greed", [(day, fear_greed)])
+            direct.append("reddit_sentiment", [(day, score)])
+        expected = {series: direct.stats(series) for series in ("fear_greed", "reddit_sentiment")}
+        expected_changes = direct.regime_changes("fear_greed")
+    for series, stats in expected.items():
+        assert store.stats(series) == stats
+    assert store.regime_changes("fear_greed") == expected_changes
+
+    # 狀態遺失（或視窗設定變更）時由點資料重算，結果與增量更新相同
+    store.conn.execute("DELETE FROM state")
+    store.conn.execute("DELETE FROM regimes")
+    store._states.clear()
+    for series, stats in expected.items():
+        assert store.stats(series) == stats
+    assert store.regime_changes("fear_greed") == expected_changes
+
+
+def test_fear_greed_dated_in_report_timezone(monkeypatch):
+    # 2026-03-01 16:30 UTC 為台北時間 3/2 00:30，與當天的情緒分數同屬 3/2 的報告
+    timestamp = 1772382600
+
+    class Handler(JSONHandler):
+        def do_GET(self):
+            self.send_json({"data": [{"value": "40", "value_classification": "Fear", "timestamp": str(timestamp)}]})
+
+    with FakeServer(Handler) as server, contextlib.redirect_stdout(io.StringIO()):
+        monkeypatch.setattr(fetch_signals, "FEAR_GREED_URL", f"{server.url}/fng/")
+        fear_greed = fetch_signals.fetch_fear_greed(1)
+    assert fear_greed["history"] == [{"value": 40, "classification": "Fear", "date": "2026-03-02"}]
+    points = signal_store.report_points({"date": "2026-03-02", "fear_greed": fear_greed,
+                                         "reddit_sentiment": {"sentiment_score": 0.1}})
+    assert points["fear_greed"][0][0] == points["reddit_sentiment"][0][0]
@@ -0,0 +1,130 @@
+"""
+translate_news：回覆依 index 對齊標題、漏掉項目與串流中斷時只重試缺少的部分，以及快取只寫入確認對齊的翻譯。
+"""
+import asyncio
+import contextlib
+import functools
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from fake_servers import FakeServer, make_openai_handler
+from openai import AsyncOpenAI
+
+import translate_news
+from translation_cache import TranslationCache, cache_key
+
+TITLES = [f"Headline number {i} about bitcoin and regulators" for i in range(45)]
+
+
+def expected(title: str) -> dict:
+    return {"title_zh": f"譯：{title}", "summary_zh": f"摘要：{title}"}
+
+
+def translate(handler, titles=TITLES, on_item=None) -> list:
+    with FakeServer(handler) as server:
+        client = AsyncOpenAI(api_key="test", base_url=f"{server.url}/v1", max_retries=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(translate_news.translate_all(client, titles, on_item=on_item))
+
+
+def test_translate_all():
+    handler = make_openai_handler(latency=0, per_item=0)
+    seen = {}
+    results = translate(handler, on_item=lambda i, item: seen.setdefault(i, item))
+    assert results == [expected(t) for t in TITLES]
+    assert seen == dict(enumerate(results))
+    assert handler.stats["requests"] == len(translate_news.make_batches(TITLES))
+
+
+def test_skipped_item_does_not_shift_later_titles():
+    """每個回覆都漏掉中間一條：其餘翻譯仍對應正確標題，漏掉的項目重試補齊。"""
+    handler = make_openai_handler(latency=0, per_item=0, skip_every=1)
+    results = translate(handler)
+    assert handler.stats["skipped"] > 0
+    assert results == [expected(t) for t in TITLES]
+
+
+def test_interrupted_stream_retries_unfinished_part():
+    handler = make_openai_handler(latency=0, per_item=0, cut_every=2)
+    results = translate(handler)
+    assert handler.stats["cut"] > 0
+    assert results == [expected(t) for t in TITLES]
+
+
+def test_malformed_reply_is_split_and_retried():
+    handler = make_openai_handler(latency=0, per_item=0, malformed_every=3)
+    results = translate(handler)
+    assert handler.stats["malformed"] > 0
+    assert results == [expected(t) for t in TITLES]
+
+
+def reply_client(items: list):
+    """每次請求都回覆同一個 JSON 陣列的假 client。"""
+    text = json.dumps(items, ensure_ascii=False)
+
+    class Stream:
+        async def __aiter__(self):
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    async def create(**kwargs):
+        return Stream()
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_batch_drops_out_of_range_and_duplicate_index():
+    items = [
+        {"index": 1, "title_zh": "一", "summary_zh": "s1"},
+        {"index": 1, "title_zh": "重複", "summary_zh": "dup"},
+        {"index": 9, "title_zh": "超出", "summary_zh": "oob"},
+        {"index": 3, "title_zh": "三", "summary_zh": "s3"},
+        {"title_zh": "沒有編號", "summary_zh": "none"},
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(translate_news.translate_batch(reply_client(items), ["a", "b", "c"]))
+    assert results == [{"title_zh": "一", "summary_zh": "s1"}, None, {"title_zh": "三", "summary_zh": "s3"}]
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "translation_cache.sqlite3")
+    monkeypatch.setattr(translate_news, "TranslationCache", functools.partial(TranslationCache, path))
+    return path
+
+
+def test_articles_cache_only_aligned_translations(cache_file, monkeypatch):
+    """漏掉項目且重試仍失敗時，快取中只有與標題正確對應的翻譯。"""
+    handler = make_openai_handler(latency=0, per_item=0, skip_every=1)
+    articles = [{"title": t} for t in TITLES[:5]]
+    with FakeServer(handler) as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{server.url}/v1")
+        with contextlib.redirect_stdout(io.StringIO()):
+            translate_news.translate_articles(articles)
+
+    # 每次回覆都漏掉中間一條（單條重試時不漏），快取內容與標題一一對應
+    assert [{k: a.get(k) for k in ("title_zh", "summary_zh")} for a in articles] == [expected(t) for t in TITLES[:5]]
+    version = f"{translate_news.PROMPT_VERSION}:{translate_news.MODEL}"
+    with TranslationCache(cache_file) as cache:
+        stored = cache.get_many([cache_key(t, version) for t in TITLES[:5]])
+    assert stored == {cache_key(t, version): expected(t) for t in TITLES[:5]}
+
+
+def test_articles_keep_translations_stored_before_failure(cache_file, monkeypatch):
+    """流程中途拋出例外時，已完成的翻譯已寫入文章與快取。"""
+    articles = [{"title": t} for t in ("a", "b")]
+    items = [{"index": 1, "title_zh": "甲", "summary_zh": "s"}]
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    async def translate_all(client, titles, on_item=None):
+        await translate_news.translate_batch(reply_client(items), titles, on_item)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(translate_news, "translate_all", translate_all)
+    with contextlib.redirect_stdout(io.StringIO()):
+        translate_news.translate_report({"articles": articles})
+    assert articles[0]["title_zh"] == "甲" and "title_zh" not in articles[1]
+    version = f"{translate_news.PROMPT_VERSION}:{translate_news.MODEL}"
+    with TranslationCache(cache_file) as cache:
+        assert list(cache.get_many([cache_key("a", version), cache_key("b", version)])) == [cache_key("a", version)]